@@ -4,6 +4,6 @@ from .models import Token
 class AuthBearer(HttpBearer):
     def authenticate(self, request, token):
         try:
-            return Token.objects.get(key=token).user
+            return Token.objects.select_related('user').get(key=token).user
         except Token.DoesNotExist:
             return None
@@ -0,0 +1,90 @@
+"""
+Benchmark /api/crewai/ask throughput under ASGI with a stubbed LLM.
+
+The crew is replaced by a function that sleeps for ``--llm-latency`` seconds,
+so the numbers reflect how the request path queues and overlaps blocking
+agent work rather than the speed of the model.
+
+Usage:
+    python -m benchmarks.bench_async --llm-latency 0.5 --concurrency 1 10 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+
+def stub_llm(latency: float):
+    from crewai_api import crewai_setup
+
+    def process_prompt(system: str, prompt: str, mode: str = "agent") -> str:
+        time.sleep(latency)
+        return f"Stubbed answer to: {prompt}"
+
+    crewai_setup.process_prompt = process_prompt
+
+
+async def run_level(application, concurrency: int, total: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=application)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=None) as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(total):
+            queue.put_nowait(index)
+
+        async def client_loop():
+            while not queue.empty():
+                index = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.post("/api/crewai/ask", params={"system": "system1", "prompt": f"question {index}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "requests_per_second": round(total / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Seconds each stubbed agent run takes.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--requests-per-client', type=int, default=5)
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    stub_llm(args.llm_latency)
+    from chatbot_gpt.asgi import application
+
+    results = []
+    for concurrency in args.concurrency:
+        total = max(concurrency * args.requests_per_client, 10)
+        result = asyncio.run(run_level(application, concurrency, total))
+        results.append(result)
+        print(f"{concurrency:>4} clients: {result['requests_per_second']:>8} req/s  p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the shared keep-alive connection pool with a new connection per call.
+
+Embedding requests are sent to ``OPENAI_BASE_URL`` from ``--concurrency``
+threads, once through ``crewai_api.clients.get_http_client()`` and once
+with a fresh client per request, as the agent, tools and embedding calls
+did before they shared a pool. Start the bundled fake server (or point
+``OPENAI_BASE_URL`` at the real API) first.
+
+Usage:
+    python -m benchmarks.fake_openai --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python -m benchmarks.bench_http_pool --requests 500 --concurrency 8
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+
+def run(send, total: int, concurrency: int) -> dict:
+    latencies = []
+
+    def timed_send(_):
+        started = time.perf_counter()
+        send()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed_send, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_s": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    import httpx
+    from django.conf import settings
+    from crewai_api.clients import get_http_client
+
+    url = (settings.OPENAI_BASE_URL or "https://api.openai.com/v1").rstrip('/') + "/embeddings"
+    headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+    payload = {"model": settings.EMBEDDING_MODEL, "input": ["How do I configure authentication?"]}
+
+    def pooled():
+        get_http_client().post(url, json=payload, headers=headers).raise_for_status()
+
+    def unpooled():
+        with httpx.Client(timeout=settings.LLM_TIMEOUT) as client:
+            client.post(url, json=payload, headers=headers).raise_for_status()
+
+    results = {}
+    for name, send in (("new_connection", unpooled), ("pooled", pooled)):
+        results[name] = run(send, args.requests, args.concurrency)
+        print(f"{name:>14}: {results[name]}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+End-to-end load scenarios against a seeded database and a fake OpenAI backend.
+
+Requests go through the full Django stack in-process from ``--concurrency``
+threads, so each request's database queries can be counted. Scenarios:
+
+- ``auth``: log in as a seeded user.
+- ``ticket_list``: list the first page of tickets.
+- ``ticket_detail``: fetch a random ticket.
+- ``ai_solution``: queue a "fast" mode solution for a random ticket and
+  poll the job until it finishes (latency is the time to the solution).
+- ``ask``: ask a "fast" mode question with a unique prompt.
+
+Unless ``--openai-base-url`` is given, the bundled fake OpenAI server is
+started on ``--fake-port`` with ``--llm-latency``, so no API key is needed.
+Each scenario reports p50/p95/p99 latency, throughput, errors and the
+mean and max number of queries per request. Only queries made on the
+requesting thread are counted, so those of background AI solution workers
+and of the executor threads behind the async AI endpoints are not.
+
+Usage:
+    export SQLITE_PATH=/tmp/bench.sqlite3
+    python manage.py migrate
+    python manage.py seed_tickets --tickets 100000
+    python -m benchmarks.bench_load --requests 200 --concurrency 8 --json load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+SCENARIOS = ("auth", "ticket_list", "ticket_detail", "ai_solution", "ask")
+
+QUESTIONS = [
+    "How do I configure authentication?",
+    "What does the serializer validate?",
+    "How are permissions checked?",
+    "How do I paginate a list endpoint?",
+    "What is the recommended way to handle errors?",
+]
+
+
+class Scenarios:
+    """The requests of each scenario, given a test client and the request number."""
+
+    def __init__(self, args, tokens: list, ticket_ids: list):
+        self.args = args
+        self.tokens = tokens
+        self.ticket_ids = ticket_ids
+
+    def _headers(self, number: int) -> dict:
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.tokens[number % len(self.tokens)]}"}
+
+    def auth(self, client, number: int) -> int:
+        payload = {"username": f"bench-user-{number % self.args.users}", "password": self.args.password}
+        return client.post("/api/auth/login", json.dumps(payload), content_type="application/json").status_code
+
+    def ticket_list(self, client, number: int) -> int:
+        return client.get("/api/tickets/tickets").status_code
+
+    def ticket_detail(self, client, number: int) -> int:
+        ticket_id = random.Random(number).choice(self.ticket_ids)
+        return client.get(f"/api/tickets/tickets/{ticket_id}").status_code
+
+    def ai_solution(self, client, number: int) -> int:
+        ticket_id = random.Random(number).choice(self.ticket_ids)
+        response = client.post(f"/api/tickets/tickets/{ticket_id}/ai-solution?system=system1&mode=fast", **self._headers(number))
+        if response.status_code != 202:
+            return response.status_code
+        job = response.json()
+        deadline = time.monotonic() + self.args.job_timeout
+        while job["status"] in ("PENDING", "RUNNING") and time.monotonic() < deadline:
+            time.sleep(0.02)
+            job = client.get(f"/api/tickets/ai-solution-jobs/{job['id']}").json()
+        return 200 if job["status"] == "DONE" else 500
+
+    def ask(self, client, number: int) -> int:
+        prompt = f"{QUESTIONS[number % len(QUESTIONS)]} (request {number})"
+        response = client.post("/api/crewai/ask?" + urlencode({"system": "system1", "mode": "fast", "prompt": prompt}))
+        return response.status_code if "result" in response.json() else 500
+
+
+def run_scenario(request, total: int, concurrency: int, warmup: int) -> dict:
+    from django.db import connection
+    from django.test import Client
+
+    local = threading.local()
+
+    def send(number: int):
+        if not hasattr(local, "client"):
+            local.client = Client(HTTP_HOST="localhost")
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            status = request(local.client, number)
+        return time.perf_counter() - started, queries, status
+
+    for number in range(warmup):
+        send(-1 - number)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(send, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [sample[0] * 1000 for sample in samples]
+    queries = [sample[1] for sample in samples]
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "errors": sum(1 for sample in samples if sample[2] >= 400),
+        "queries_mean": round(statistics.mean(queries), 2),
+        "queries_max": max(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests before each scenario.')
+    parser.add_argument('--users', type=int, default=100, help='Number of users created by seed_tickets.')
+    parser.add_argument('--password', default='bench-password', help='Password given to seed_tickets.')
+    parser.add_argument('--job-timeout', type=float, default=120.0, help='Seconds to wait for an AI solution job.')
+    parser.add_argument('--openai-base-url', help='Use this OpenAI-compatible API instead of the fake server.')
+    parser.add_argument('--fake-port', type=int, default=8012)
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Latency of the fake server, in seconds.')
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    fake_server = None
+    if args.openai_base_url:
+        os.environ["OPENAI_BASE_URL"] = args.openai_base_url
+    else:
+        os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.fake_port}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+        fake_server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.fake_openai', '--port', str(args.fake_port), '--latency', str(args.llm_latency)],
+            stdout=subprocess.DEVNULL,
+        )
+        time.sleep(0.5)
+
+    import django
+
+    django.setup()
+    from django.contrib.auth.models import User
+    from authentication.models import Token
+    from ticketing.models import Ticket
+
+    tokens = list(Token.objects.filter(user__username__startswith='bench-user-').values_list('key', flat=True))
+    ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+    if not tokens or not ticket_ids:
+        raise SystemExit("No seeded data found: run `python manage.py seed_tickets` first.")
+
+    scenarios = Scenarios(args, tokens, ticket_ids)
+    results = {
+        "tickets": len(ticket_ids),
+        "users": User.objects.count(),
+        "llm_latency_s": None if args.openai_base_url else args.llm_latency,
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenarios:
+            result = run_scenario(getattr(scenarios, name), args.requests, args.concurrency, args.warmup)
+            results["scenarios"][name] = result
+            print(f"{name:>14}: {result}")
+    finally:
+        if fake_server is not None:
+            fake_server.terminate()
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
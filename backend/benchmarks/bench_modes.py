@@ -0,0 +1,106 @@
+"""
+Compare latency, LLM calls and token usage of the "agent" and "fast" answer modes.
+
+Caches are bypassed so every question pays for a full answer. This calls the
+configured OpenAI-compatible API, so it needs OPENAI_API_KEY (or
+OPENAI_BASE_URL pointing at a stand-in server).
+
+Usage:
+    python -m benchmarks.bench_modes --system system2 --json modes.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+QUESTIONS = {
+    "system1": [
+        "What is the name of the book, and who is the author?",
+        "Does the ideas come linearly?",
+        "How can I deal with the ideas that are not coming linearly?",
+    ],
+    "system2": [
+        "What is the name of the book, and who is the author?",
+        "How is DRF different from other frameworks?",
+        "Does this book cover authentication and authorization?",
+    ],
+}
+
+
+def run_agent(system: str, question: str) -> dict:
+    from langchain_community.callbacks import get_openai_callback
+    from crewai_api.crewai_setup import create_crew
+
+    with get_openai_callback() as usage:
+        create_crew(system, question).kickoff()
+    return {
+        "llm_calls": usage.successful_requests,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+    }
+
+
+def run_fast(system: str, question: str) -> dict:
+    from crewai_api import crewai_setup
+
+    calls = []
+    client = crewai_setup.get_client()
+    create = client.chat.completions.create
+
+    def counting_create(*args, **kwargs):
+        response = create(*args, **kwargs)
+        calls.append(response.usage)
+        return response
+
+    client.chat.completions.create = counting_create
+    try:
+        crewai_setup.answer_fast(system, question)
+    finally:
+        client.chat.completions.create = create
+    return {
+        "llm_calls": len(calls),
+        "prompt_tokens": sum(usage.prompt_tokens for usage in calls),
+        "completion_tokens": sum(usage.completion_tokens for usage in calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--system', default='system1')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+
+    runners = {"agent": run_agent, "fast": run_fast}
+    results = {}
+    for mode, runner in runners.items():
+        runs = []
+        for _ in range(args.repeat):
+            for question in QUESTIONS[args.system]:
+                started = time.perf_counter()
+                run = runner(args.system, question)
+                run["latency_s"] = time.perf_counter() - started
+                runs.append(run)
+        results[mode] = {
+            "runs": len(runs),
+            "median_latency_s": round(statistics.median(run["latency_s"] for run in runs), 2),
+            "mean_llm_calls": round(statistics.mean(run["llm_calls"] for run in runs), 2),
+            "mean_prompt_tokens": round(statistics.mean(run["prompt_tokens"] for run in runs)),
+            "mean_completion_tokens": round(statistics.mean(run["completion_tokens"] for run in runs)),
+        }
+        print(f"{mode:>5}: {results[mode]}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
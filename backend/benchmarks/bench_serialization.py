@@ -0,0 +1,88 @@
+"""
+Compare the ways the ticket list can be serialized to JSON bytes.
+
+``--tickets`` tickets are read from the seeded database and serialized with:
+
+- ``schema_json``: ``TicketOut`` models rendered by ninja's default encoder.
+- ``schema_orjson``: ``TicketOut`` models rendered with orjson (``API_FAST_JSON`` renderer).
+- ``values_orjson``: ``.values()`` rows shaped by ``ticket_row`` and rendered
+  with orjson, skipping pydantic (``API_FAST_JSON`` ticket list).
+
+``fetch_ms`` is the time to load the rows and ``serialize_ms`` the best of
+``--repeat`` runs turning them into bytes; the compressed sizes show what
+``API_COMPRESSION_ENABLED`` saves on the wire.
+
+Usage:
+    export SQLITE_PATH=/tmp/bench.sqlite3
+    python manage.py migrate
+    python manage.py seed_tickets --tickets 10000
+    python -m benchmarks.bench_serialization --tickets 10000 --json serialization.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+
+def best_of(repeat: int, fn) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) * 1000, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from ninja.renderers import JSONRenderer
+    from chatbot_gpt.renderers import ORJSONRenderer, dumps
+    from ticketing.models import Ticket
+    from ticketing.schemas import TICKET_VALUES, TicketOut, ticket_row
+
+    fetch_models_ms, tickets = best_of(1, lambda: list(Ticket.objects.select_related('ai_solution').order_by('created_at', 'id')[:args.tickets]))
+    fetch_values_ms, rows = best_of(1, lambda: list(Ticket.objects.values(*TICKET_VALUES).order_by('created_at', 'id')[:args.tickets]))
+    if len(tickets) < args.tickets:
+        raise SystemExit(f"Only {len(tickets)} tickets found: run `python manage.py seed_tickets --tickets {args.tickets}` first.")
+
+    def schema(renderer):
+        items = [TicketOut.from_orm(ticket).model_dump() for ticket in tickets]
+        content = renderer.render(None, {"items": items, "next_cursor": None, "count_estimate": None}, response_status=200)
+        return content.encode() if isinstance(content, str) else content
+
+    variants = {
+        "schema_json": (fetch_models_ms, lambda: schema(JSONRenderer())),
+        "schema_orjson": (fetch_models_ms, lambda: schema(ORJSONRenderer())),
+        "values_orjson": (fetch_values_ms, lambda: dumps({"items": [ticket_row(row) for row in rows], "next_cursor": None, "count_estimate": None})),
+    }
+
+    results = {"tickets": len(tickets), "variants": {}}
+    for name, (fetch_ms, serialize) in variants.items():
+        serialize_ms, content = best_of(args.repeat, serialize)
+        results["variants"][name] = {
+            "fetch_ms": fetch_ms,
+            "serialize_ms": serialize_ms,
+            "bytes": len(content),
+            "gzip_bytes": len(gzip.compress(content, compresslevel=6)),
+        }
+        print(f"{name:>14}: {results['variants'][name]}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Measure process startup cost with and without the AI stack.
+
+Each scenario runs in a fresh interpreter so import costs are paid in full:
+
+- ``check``: wall time of ``python manage.py check``.
+- ``tickets``: load the WSGI application and serve a ticket list request.
+- ``ai``: load the WSGI application and serve a "fast" mode question, which
+  imports the AI stack on first use.
+- ``ai-warm``: like ``ai`` but with ``AI_WARMUP=true``, moving the AI stack
+  cost from the first request to worker startup.
+
+The AI scenarios talk to the bundled fake OpenAI server, started on
+``--fake-port``, so no API key is needed. Run it against a migrated
+database so the requests succeed.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
+
+# Modules whose presence shows the AI stack was imported
+AI_MODULES = ("crewai", "crewai_tools", "langchain_openai", "openai", "chromadb")
+
+
+def child(scenario: str) -> None:
+    """Serve one request in this fresh process and print its timings as JSON."""
+    started = time.perf_counter()
+    from chatbot_gpt.wsgi import application  # noqa: F401
+    from django.test import Client
+
+    loaded = time.perf_counter()
+    client = Client(HTTP_HOST="localhost")
+    if scenario == "tickets":
+        response = client.get("/api/tickets/tickets")
+    else:
+        response = client.post("/api/crewai/ask?system=system1&mode=fast&prompt=What+is+this+book+about%3F")
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "startup_s": loaded - started,
+        "first_request_s": finished - loaded,
+        "status": response.status_code,
+        "ai_modules_loaded": [name for name in AI_MODULES if name in sys.modules],
+    }))
+
+
+def run(command: list, env: dict) -> tuple:
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+    return elapsed, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--child', choices=['tickets', 'ai'], help=argparse.SUPPRESS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fake-port', type=int, default=8011)
+    parser.add_argument('--json', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    env = dict(os.environ, OPENAI_BASE_URL=f"http://127.0.0.1:{args.fake_port}/v1", AI_JOB_INLINE_WORKERS="false")
+    fake_server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.fake_openai', '--port', str(args.fake_port)],
+        stdout=subprocess.DEVNULL,
+    )
+    scenarios = {
+        "check": ([sys.executable, 'manage.py', 'check'], env),
+        "tickets": ([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'tickets'], env),
+        "ai": ([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'ai'], env),
+        "ai-warm": ([sys.executable, '-m', 'benchmarks.bench_startup', '--child', 'ai'], dict(env, AI_WARMUP="true")),
+    }
+
+    results = {}
+    try:
+        time.sleep(0.5)
+        for name, (command, scenario_env) in scenarios.items():
+            runs = []
+            for _ in range(args.repeat):
+                elapsed, output = run(command, scenario_env)
+                run_result = {"process_s": elapsed}
+                if name != "check":
+                    run_result.update(json.loads(output.strip().splitlines()[-1]))
+                runs.append(run_result)
+
+            summary = {"process_s": round(statistics.median(r["process_s"] for r in runs), 3)}
+            if name != "check":
+                summary["startup_s"] = round(statistics.median(r["startup_s"] for r in runs), 3)
+                summary["first_request_s"] = round(statistics.median(r["first_request_s"] for r in runs), 3)
+                summary["status"] = runs[-1]["status"]
+                summary["ai_modules_loaded"] = runs[-1]["ai_modules_loaded"]
+            results[name] = summary
+            print(f"{name:>8}: {summary}")
+    finally:
+        fake_server.terminate()
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
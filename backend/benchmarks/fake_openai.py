@@ -0,0 +1,234 @@
+"""
+A minimal OpenAI-compatible server for running the AI endpoints offline.
+
+It answers ``/v1/chat/completions`` (streamed or not) in the ReAct format the
+CrewAI agent expects, and ``/v1/embeddings`` with deterministic vectors
+derived from the input text.
+
+Latency and failures can be injected to exercise timeouts, retries, hedged
+requests and the circuit breaker: ``--jitter`` adds random latency,
+``--stall-rate`` makes a share of requests hang for ``--stall-seconds``,
+and ``--failure-rate`` answers a share of requests with ``--failure-status``,
+as do the first ``--fail-first`` requests. Tests run it in-process with
+``start_server``.
+
+Usage:
+    python -m benchmarks.fake_openai --port 8001 --latency 0.5 --token-delay 0.02
+    python -m benchmarks.fake_openai --port 8001 --stall-rate 0.05 --stall-seconds 60 --failure-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python manage.py runserver
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+EMBEDDING_DIM = 256
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    Build a deterministic unit vector from the words of a text.
+
+    Texts sharing words get similar vectors, which is enough to exercise
+    retrieval and the semantic cache.
+
+    Args:
+        text (str): The text to embed.
+        dim (int): The vector dimension.
+
+    Returns:
+        List[float]: The embedding.
+    """
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode()).digest()
+        vector[int.from_bytes(digest[:4], 'little') % dim] += 1.0 if digest[4] % 2 else -1.0
+    norm = sum(value * value for value in vector) ** 0.5 or 1.0
+    return [value / norm for value in vector]
+
+
+def fake_answer(messages: List[dict]) -> str:
+    """
+    Build a deterministic ReAct-style answer for a conversation.
+
+    Args:
+        messages (List[dict]): The chat messages.
+
+    Returns:
+        str: The completion text.
+    """
+    question = messages[-1].get("content", "") if messages else ""
+    digest = hashlib.sha256(str(question).encode()).hexdigest()[:8]
+    return (
+        "Thought: I now know the final answer\n"
+        f"Final Answer: According to the documentation, the answer is {digest}. "
+        "Follow the documented steps and verify the configuration."
+    )
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    # Keep connections alive between requests, like the real API
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    jitter = 0.0
+    token_delay = 0.0
+    stall_rate = 0.0
+    stall_seconds = 60.0
+    failure_rate = 0.0
+    failure_status = 500
+    fail_first = 0
+    # Requests received, shared by every connection of the server
+    requests = 0
+    _requests_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with self._requests_lock:
+            type(self).requests += 1
+            number = self.requests
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        if random.random() < self.stall_rate:
+            time.sleep(self.stall_seconds)
+        if number <= self.fail_first or random.random() < self.failure_rate:
+            self._send_json({"error": {"message": "Injected failure", "type": "server_error"}}, status=self.failure_status)
+            return
+
+        if self.path.endswith("/embeddings"):
+            inputs = request.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            self._send_json({
+                "object": "list",
+                "model": request.get("model", "fake-embedding"),
+                "data": [
+                    {"object": "embedding", "index": index, "embedding": fake_embedding(text)}
+                    for index, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": sum(len(text.split()) for text in inputs), "total_tokens": sum(len(text.split()) for text in inputs)},
+            })
+        elif self.path.endswith("/chat/completions"):
+            self._chat_completion(request)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, status=404)
+
+    def _chat_completion(self, request: dict) -> None:
+        messages = request.get("messages", [])
+        answer = fake_answer(messages)
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in messages)
+        completion_tokens = len(answer.split())
+        model = request.get("model", "fake-chat")
+
+        if not request.get("stream"):
+            self._send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            })
+            return
+
+        # Streams have no Content-Length, so they end by closing the connection
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for token in answer.split(" "):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.token_delay)
+        final = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that timed out on a stalled request have already hung up
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **options) -> FakeOpenAIServer:
+    """
+    Serve fake OpenAI requests from a background thread.
+
+    Args:
+        host (str): The address to listen on.
+        port (int): The port to listen on, or 0 for any free port.
+        **options: Handler settings such as ``latency``, ``stall_rate`` or ``fail_first``.
+
+    Returns:
+        FakeOpenAIServer: The running server. Its ``RequestHandlerClass`` holds the
+        settings, which can be changed while it runs, and the request count.
+        Stop it with ``shutdown()`` and ``server_close()``.
+    """
+    handler = type('FakeOpenAIHandler', (FakeOpenAIHandler,), {"requests": 0, "_requests_lock": threading.Lock(), **options})
+    server = FakeOpenAIServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='fake-openai', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering each request.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra seconds of random latency.')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='Seconds between streamed tokens.')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Share of requests that hang before answering.')
+    parser.add_argument('--stall-seconds', type=float, default=60.0, help='How long stalled requests hang.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with an error.')
+    parser.add_argument('--failure-status', type=int, default=500, help='HTTP status of injected errors, such as 429 or 503.')
+    parser.add_argument('--fail-first', type=int, default=0, help='Number of requests answered with an error before any succeeds.')
+    args = parser.parse_args()
+
+    FakeOpenAIHandler.latency = args.latency
+    FakeOpenAIHandler.jitter = args.jitter
+    FakeOpenAIHandler.token_delay = args.token_delay
+    FakeOpenAIHandler.stall_rate = args.stall_rate
+    FakeOpenAIHandler.stall_seconds = args.stall_seconds
+    FakeOpenAIHandler.failure_rate = args.failure_rate
+    FakeOpenAIHandler.failure_status = args.failure_status
+    FakeOpenAIHandler.fail_first = args.fail_first
+    server = FakeOpenAIServer((args.host, args.port), FakeOpenAIHandler)
+    print(f"Fake OpenAI server listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
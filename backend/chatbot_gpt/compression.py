@@ -0,0 +1,55 @@
+import gzip
+import re
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+_ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+_ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least ``API_COMPRESSION_MIN_BYTES``.
+
+    Brotli is used when the client accepts it and the ``brotli`` package is
+    installed, gzip otherwise. Streaming responses, such as the streamed
+    answers, are sent as they are so their events are not held back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.API_COMPRESSION_MIN_BYTES
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        brotli = _brotli() if _ACCEPTS_BROTLI.search(accepted) else None
+        if brotli is not None:
+            content, encoding = brotli.compress(response.content, quality=settings.API_BROTLI_QUALITY), 'br'
+        elif _ACCEPTS_GZIP.search(accepted):
+            content, encoding = gzip.compress(response.content, compresslevel=settings.API_GZIP_LEVEL, mtime=0), 'gzip'
+        else:
+            return response
+
+        # Skip compression that does not pay for its header
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,50 @@
+from typing import Any
+from django.http import HttpResponse
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+_fallback = NinjaJSONEncoder()
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode data as JSON with orjson.
+
+    Datetimes are written in ISO 8601 with "Z" for UTC. Types orjson does
+    not know, such as Decimal or pydantic models, go through ninja's encoder.
+
+    Args:
+        data (Any): The data to encode.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON.
+    """
+    import orjson
+
+    return orjson.dumps(data, default=_fallback.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(data: Any, status: int = 200) -> HttpResponse:
+    """
+    Build a JSON response without validating the data against a schema.
+
+    Only use it for data read straight from the database, such as
+    ``.values()`` rows already shaped like the endpoint's response schema.
+
+    Args:
+        data (Any): The response data.
+        status (int): The HTTP status code.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    return HttpResponse(dumps(data), status=status, content_type="application/json; charset=utf-8")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Renders API responses with orjson instead of the standard library encoder."""
+
+    media_type = "application/json"
+
+    def render(self, request, data: Any, *, response_status: int) -> bytes:
+        return dumps(data)
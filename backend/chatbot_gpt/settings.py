@@ -20,6 +20,14 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
     raise ValueError("No OPENAI_API_KEY set for application")
 
+# Chat model used by the agents. Point OPENAI_BASE_URL at any OpenAI-compatible
+# server, such as benchmarks/fake_openai.py, to run without the real API.
+OPENAI_MODEL_NAME = os.getenv('OPENAI_MODEL_NAME', 'gpt-4o')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+
+# Number of documentation chunks retrieved for "fast" mode answers
+FAST_MODE_TOP_K = int(os.getenv('FAST_MODE_TOP_K', 4))
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,6 +63,40 @@ INSTALLED_APPS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Persistent, content-addressed document indexes built by `manage.py build_doc_index`
+DOC_INDEX_ROOT = os.getenv('DOC_INDEX_ROOT', os.path.join(BASE_DIR, 'doc_index'))
+
+# Document chunking and retrieval
+DOC_CHUNK_SIZE = int(os.getenv('DOC_CHUNK_SIZE', 1000))
+DOC_CHUNK_OVERLAP = int(os.getenv('DOC_CHUNK_OVERLAP', 200))
+DOC_SEARCH_TOP_K = int(os.getenv('DOC_SEARCH_TOP_K', 4))
+
+# "hybrid" fuses vector and BM25 keyword rankings with reciprocal rank fusion,
+# "vector" uses embedding similarity alone
+DOC_SEARCH_MODE = os.getenv('DOC_SEARCH_MODE', 'hybrid')
+DOC_HYBRID_CANDIDATES = int(os.getenv('DOC_HYBRID_CANDIDATES', 20))
+DOC_RRF_K = int(os.getenv('DOC_RRF_K', 60))
+
+# Context assembly: retrieved chunks whose word 3-gram Jaccard similarity to a
+# more relevant chunk reaches DOC_DEDUPE_THRESHOLD are dropped, and the rest are
+# packed into a per-request token budget (overridable per document system).
+# Ticket descriptions are shortened to TICKET_DESCRIPTION_MAX_TOKENS.
+DOC_DEDUPE_THRESHOLD = float(os.getenv('DOC_DEDUPE_THRESHOLD', 0.8))
+DOC_CONTEXT_TOKEN_BUDGET = int(os.getenv('DOC_CONTEXT_TOKEN_BUDGET', 3000))
+TICKET_DESCRIPTION_MAX_TOKENS = int(os.getenv('TICKET_DESCRIPTION_MAX_TOKENS', 1000))
+
+# Vector store behind document retrieval: "numpy" keeps each system's embeddings
+# in memory-mapped files shared by all worker processes, "chroma" uses chromadb.
+# The NumPy store trains an approximate (IVF) index once a system has
+# DOC_NUMPY_IVF_MIN_CHUNKS chunks and then scans DOC_NUMPY_IVF_NPROBE clusters.
+DOC_RETRIEVER_BACKEND = os.getenv('DOC_RETRIEVER_BACKEND', 'numpy')
+DOC_NUMPY_IVF_MIN_CHUNKS = int(os.getenv('DOC_NUMPY_IVF_MIN_CHUNKS', 50000))
+DOC_NUMPY_IVF_NPROBE = int(os.getenv('DOC_NUMPY_IVF_NPROBE', 16))
+DOC_NUMPY_IVF_ITERATIONS = int(os.getenv('DOC_NUMPY_IVF_ITERATIONS', 10))
+
+# How often (seconds) each process checks the document system registry for changes
+DOC_REGISTRY_CHECK_INTERVAL = float(os.getenv('DOC_REGISTRY_CHECK_INTERVAL', 5))
+
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -67,6 +109,19 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Fast JSON: with API_FAST_JSON, the API renders responses with orjson and the
+# ticket list serializes .values() rows without pydantic validation.
+API_FAST_JSON = os.getenv('API_FAST_JSON', 'false').lower() == 'true'
+
+# Compression of API responses of at least API_COMPRESSION_MIN_BYTES, with
+# brotli when the client accepts it and the brotli package is installed.
+API_COMPRESSION_ENABLED = os.getenv('API_COMPRESSION_ENABLED', 'false').lower() == 'true'
+API_COMPRESSION_MIN_BYTES = int(os.getenv('API_COMPRESSION_MIN_BYTES', 1024))
+API_GZIP_LEVEL = int(os.getenv('API_GZIP_LEVEL', 6))
+API_BROTLI_QUALITY = int(os.getenv('API_BROTLI_QUALITY', 4))
+if API_COMPRESSION_ENABLED:
+    MIDDLEWARE.insert(1, "chatbot_gpt.compression.CompressionMiddleware")
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -103,11 +158,122 @@ WSGI_APPLICATION = "chatbot_gpt.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        # Override with SQLITE_PATH to run benchmarks against a separate seeded database
+        "NAME": os.getenv('SQLITE_PATH', BASE_DIR / "db.sqlite3"),
     }
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# The "answers" cache holds AI answers keyed by system, normalized prompt and
+# document index version. Any backend works; the local-memory backend evicts
+# the least recently used entries once MAX_ENTRIES is reached.
+ANSWER_CACHE_ALIAS = "answers"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    ANSWER_CACHE_ALIAS: {
+        "BACKEND": os.getenv('ANSWER_CACHE_BACKEND', "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv('ANSWER_CACHE_LOCATION', "answers"),
+        "TIMEOUT": int(os.getenv('ANSWER_CACHE_TTL', 60 * 60 * 24)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1000)),
+        },
+    },
+}
+
+# Paraphrased prompts whose embedding similarity to a previously answered one
+# reaches the threshold are served from the semantic cache
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', "text-embedding-3-small")
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 500))
+
+
+# Limits on in-flight agent runs for the async AI endpoints. Blocking agent
+# work runs on a dedicated executor with AI_MAX_CONCURRENT_CALLS threads;
+# excess requests wait in arrival order without holding a thread.
+AI_MAX_CONCURRENT_CALLS = int(os.getenv('AI_MAX_CONCURRENT_CALLS', 8))
+AI_MAX_CONCURRENT_CALLS_PER_SYSTEM = int(os.getenv('AI_MAX_CONCURRENT_CALLS_PER_SYSTEM', 4))
+
+# Background AI solution jobs. Workers run inside the web process unless
+# AI_JOB_INLINE_WORKERS is false, in which case run `manage.py run_ai_jobs`.
+AI_JOB_INLINE_WORKERS = os.getenv('AI_JOB_INLINE_WORKERS', 'true').lower() == 'true'
+AI_JOB_WORKERS = int(os.getenv('AI_JOB_WORKERS', 2))
+AI_JOB_MAX_ATTEMPTS = int(os.getenv('AI_JOB_MAX_ATTEMPTS', 3))
+AI_JOB_POLL_INTERVAL = float(os.getenv('AI_JOB_POLL_INTERVAL', 2))
+AI_JOB_STALE_AFTER = int(os.getenv('AI_JOB_STALE_AFTER', 600))
+AI_JOB_FAIRNESS_WINDOW = int(os.getenv('AI_JOB_FAIRNESS_WINDOW', 600))
+
+# Speculative AI solutions: when enabled, saving a ticket with one of
+# AI_SPECULATIVE_PRIORITIES queues a low-priority job so the solution is
+# usually ready before anyone opens the ticket.
+AI_SPECULATIVE_ENABLED = os.getenv('AI_SPECULATIVE_ENABLED', 'false').lower() == 'true'
+AI_SPECULATIVE_PRIORITIES = [
+    priority.strip().upper()
+    for priority in os.getenv('AI_SPECULATIVE_PRIORITIES', 'LOW,MEDIUM,HIGH').split(',')
+    if priority.strip()
+]
+AI_SPECULATIVE_SYSTEM = os.getenv('AI_SPECULATIVE_SYSTEM', 'system1')
+AI_SPECULATIVE_MODE = os.getenv('AI_SPECULATIVE_MODE', 'agent')
+
+# Reuse the solution of a near-duplicate earlier ticket instead of calling the
+# LLM when word 3-gram similarity reaches AI_REUSE_SIMILARITY. Disliked
+# solutions are never reused; liked ones are preferred.
+AI_REUSE_ENABLED = os.getenv('AI_REUSE_ENABLED', 'true').lower() == 'true'
+AI_REUSE_SIMILARITY = float(os.getenv('AI_REUSE_SIMILARITY', 0.8))
+AI_REUSE_MIN_LIKES = int(os.getenv('AI_REUSE_MIN_LIKES', 0))
+
+# Ticket list pagination. Pages hold TICKET_PAGE_SIZE tickets unless the
+# client asks for another size, up to TICKET_PAGE_SIZE_MAX. The total count
+# estimate is cached for TICKET_COUNT_CACHE_TTL seconds.
+TICKET_PAGE_SIZE = int(os.getenv('TICKET_PAGE_SIZE', 50))
+TICKET_PAGE_SIZE_MAX = int(os.getenv('TICKET_PAGE_SIZE_MAX', 200))
+TICKET_COUNT_CACHE_TTL = int(os.getenv('TICKET_COUNT_CACHE_TTL', 60))
+
+# Rows fetched per database round trip and encoded per block by ticket exports
+TICKET_EXPORT_CHUNK_SIZE = int(os.getenv('TICKET_EXPORT_CHUNK_SIZE', 2000))
+
+# Most tickets queued by one batch AI solution request
+AI_BATCH_MAX_TICKETS = int(os.getenv('AI_BATCH_MAX_TICKETS', 1000))
+
+# Calls to the LLM provider. Each attempt gets LLM_TIMEOUT seconds and all
+# attempts of one call LLM_DEADLINE seconds; transient errors are retried
+# LLM_MAX_RETRIES times with jittered exponential backoff. With
+# LLM_HEDGE_ENABLED, a call still running past its p95 latency is duplicated
+# and the first response wins. A whole agent run, made of many calls, is
+# given up on after LLM_AGENT_DEADLINE seconds. After LLM_BREAKER_FAILURES
+# failures in a row the circuit breaker rejects calls for LLM_BREAKER_RESET
+# seconds.
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 30))
+LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', 60))
+LLM_AGENT_DEADLINE = float(os.getenv('LLM_AGENT_DEADLINE', 120))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 2))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', 0.5))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', 8))
+LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'false').lower() == 'true'
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+LLM_HEDGE_MAX_WORKERS = int(os.getenv('LLM_HEDGE_MAX_WORKERS', 32))
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', 30))
+
+# Pooled keep-alive HTTP connections shared by the agent LLM, embeddings and
+# direct completions. Requests go to OPENAI_BASE_URL; point it at a local
+# OpenAI-compatible server (see benchmarks/fake_openai.py) to run offline.
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv('LLM_POOL_MAX_CONNECTIONS', 100))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv('LLM_POOL_MAX_KEEPALIVE', 20))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.getenv('LLM_POOL_KEEPALIVE_EXPIRY', 30))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', 5))
+
+
+# The AI stack is imported on first use. Set AI_WARMUP=true to load it and open
+# every system's index when a WSGI/ASGI worker starts instead.
+AI_WARMUP = os.getenv('AI_WARMUP', 'false').lower() == 'true'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
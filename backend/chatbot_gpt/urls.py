@@ -1,16 +1,20 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from ninja import NinjaAPI
+from .renderers import ORJSONRenderer
 from crewai_api.api import router as crewai_router
 from authentication.api import router as auth_router
 from ticketing.api import router as ticketing_router
+from crewai_api.views import metrics
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=ORJSONRenderer() if settings.API_FAST_JSON else None)
 api.add_router("/crewai/", crewai_router)
 api.add_router("/auth/", auth_router)
 api.add_router("/tickets/", ticketing_router)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics', metrics, name='metrics'),
     path('api/', api.urls),
 ]
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_gpt.settings")
 
 application = get_wsgi_application()
+
+from django.conf import settings
+
+if settings.AI_WARMUP:
+    from crewai_api.warmup import warm_up
+
+    warm_up()
@@ -1,3 +1,29 @@
 from django.contrib import admin
+from .models import DocumentSystem, SystemDocument
+from .registry import schedule_index
 
-# Register your models here.
+
+class SystemDocumentInline(admin.TabularInline):
+    model = SystemDocument
+    extra = 1
+    readonly_fields = ('uploaded_at',)
+
+
+@admin.register(DocumentSystem)
+class DocumentSystemAdmin(admin.ModelAdmin):
+    list_display = ('name', 'title', 'is_active', 'index_status', 'indexed_at', 'updated_at')
+    readonly_fields = ('index_status', 'index_error', 'indexed_at', 'created_at', 'updated_at')
+    inlines = [SystemDocumentInline]
+    actions = ['reindex']
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Touch the system so every worker's registry check notices the new documents
+        form.instance.index_status = 'PENDING'
+        form.instance.save(update_fields=['index_status', 'updated_at'])
+        schedule_index(form.instance)
+
+    @admin.action(description="Re-index selected systems")
+    def reindex(self, request, queryset):
+        for system in queryset:
+            schedule_index(system)
@@ -0,0 +1,218 @@
+import hashlib
+import re
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from django.core.cache import caches
+from . import metrics
+
+# How long a computing process may hold the cross-process lock for a key
+LOCK_TIMEOUT = 300
+
+# How often waiters poll the cache while another process computes the answer
+POLL_INTERVAL = 0.25
+
+# Answer modes: "agent" runs the documentation analyst crew, "fast" makes a
+# single completion over the top retrieved chunks
+ANSWER_MODES = ("agent", "fast")
+
+# Counters that are cache lookups, mapped to the cache and result they are exported as
+_CACHE_EVENTS = {
+    "hits": ("answer", "hit"),
+    "misses": ("answer", "miss"),
+    "coalesced": ("answer", "coalesced"),
+    "semantic_hits": ("semantic", "hit"),
+    "semantic_misses": ("semantic", "miss"),
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class _Flight:
+    """An in-process computation that concurrent callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+_inflight: Dict[str, _Flight] = {}
+_inflight_lock = threading.Lock()
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.ANSWER_CACHE_ALIAS]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so trivially different phrasings share a cache entry.
+
+    Args:
+        prompt (str): The raw prompt.
+
+    Returns:
+        str: The lowercased prompt with collapsed whitespace and no trailing punctuation.
+    """
+    return _WHITESPACE.sub(' ', prompt).strip().lower().rstrip('?.! ')
+
+
+def cache_key(system: str, prompt: str, version: str, mode: str = "agent") -> str:
+    """
+    Build the cache key for an answer.
+
+    Args:
+        system (str): The system name.
+        prompt (str): The prompt or question.
+        version (str): The version of the system's document index.
+        mode (str): The answer mode, "agent" or "fast".
+
+    Returns:
+        str: The cache key.
+    """
+    digest = hashlib.sha256(f"{system}\0{version}\0{mode}\0{normalize_prompt(prompt)}".encode()).hexdigest()
+    return f"answer:{system}:{digest}"
+
+
+def record(system: str, field: str, amount: float = 1) -> None:
+    """
+    Add to one of the per-system cache counters.
+
+    Args:
+        system (str): The system name.
+        field (str): The counter to increment.
+        amount (float): The amount to add.
+    """
+    with _stats_lock:
+        counters = _stats.setdefault(system, {"hits": 0, "misses": 0, "coalesced": 0, "saved_seconds": 0.0})
+        counters[field] = counters.get(field, 0) + amount
+    if field in _CACHE_EVENTS:
+        cache, result = _CACHE_EVENTS[field]
+        metrics.CACHE_REQUESTS.inc(amount, system=system, cache=cache, result=result)
+
+
+def get_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Return the answer cache counters per system.
+
+    Returns:
+        dict: Hits, misses (requests that ran the model), coalesced waits, semantic cache
+        hits and misses, and saved seconds keyed by system.
+    """
+    with _stats_lock:
+        return {system: dict(counters) for system, counters in _stats.items()}
+
+
+def _lookup(system: str, key: str) -> Optional[str]:
+    entry = _cache().get(key)
+    if entry is None:
+        return None
+    record(system, "hits")
+    record(system, "saved_seconds", entry["latency"])
+    return entry["answer"]
+
+
+def peek(system: str, prompt: str, version: str, mode: str = "agent") -> Optional[str]:
+    """
+    Return a cached answer without computing it on a miss.
+
+    Args:
+        system (str): The system name.
+        prompt (str): The prompt or question.
+        version (str): The version of the system's document index.
+        mode (str): The answer mode, "agent" or "fast".
+
+    Returns:
+        Optional[str]: The cached answer, or None.
+    """
+    return _lookup(system, cache_key(system, prompt, version, mode))
+
+
+def _compute(system: str, key: str, compute: Callable[[], str]) -> str:
+    """
+    Compute an answer while holding the cross-process lock for its key.
+
+    If another process already holds the lock, wait for it to publish the
+    answer instead of paying for a second LLM round trip. A lock left by a
+    process that died expires after ``LOCK_TIMEOUT``, and the next waiter
+    takes it over. Each holder stores a unique token in the lock and only
+    deletes the lock while it still holds that token.
+    """
+    cache = _cache()
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    while not cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+        time.sleep(POLL_INTERVAL)
+        answer = _lookup(system, key)
+        if answer is not None:
+            return answer
+
+    try:
+        started = time.monotonic()
+        answer = compute()
+        cache.set(key, {"answer": answer, "latency": time.monotonic() - started})
+        return answer
+    finally:
+        # A lock that expired during a long computation and was taken over
+        # holds another token. The cache API has no atomic compare-and-delete,
+        # so only an expiry between these two calls can still slip through
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def get_or_compute(system: str, prompt: str, version: str, compute: Callable[[], str], mode: str = "agent") -> str:
+    """
+    Return a cached answer, or compute and cache it.
+
+    Concurrent identical requests in the same process share one computation,
+    and requests in other processes wait on a lock held in the cache backend.
+    Errors raised by ``compute`` are propagated and never cached.
+
+    A lookup that finds nothing is not counted as a miss here, as
+    ``compute`` may still be served by another cache; ``compute`` records
+    the miss with ``record(system, "misses")`` when it runs the model.
+
+    Args:
+        system (str): The system name.
+        prompt (str): The prompt or question.
+        version (str): The version of the system's document index.
+        compute (Callable[[], str]): Produces the answer on a cache miss.
+        mode (str): The answer mode, "agent" or "fast".
+
+    Returns:
+        str: The answer.
+    """
+    key = cache_key(system, prompt, version, mode)
+    answer = _lookup(system, key)
+    if answer is not None:
+        return answer
+
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        record(system, "coalesced")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _compute(system, key, compute)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        flight.done.set()
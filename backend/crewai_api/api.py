@@ -1,10 +1,40 @@
-from ninja import Router
-from .crewai_setup import process_prompt
+from typing import List
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from ninja import Router, File, Form, Query, UploadedFile
+from ninja.errors import HttpError
+from authentication.auth import AuthBearer
+from . import metrics
+from .concurrency import run_llm_call
+from .answer_cache import ANSWER_MODES, get_stats
+from .models import DocumentSystem, SystemDocument
+from .registry import schedule_index, system_names
+from .resilience import ProviderUnavailable, get_breaker
+from .schemas import DocumentSystemOut
 
 router = Router()
+auth = AuthBearer()
+
+# Every PDF file starts with this signature
+PDF_MAGIC = b'%PDF'
+
+def _process_prompt(system: str, prompt: str, mode: str) -> str:
+    # The AI stack is imported on first use, on the executor rather than the event loop,
+    # so workers that never answer questions don't load it
+    from .crewai_setup import process_prompt
+
+    return process_prompt(system, prompt, mode)
+
+def _stream_answer(system: str, prompt: str):
+    from .streaming import stream_answer
+
+    return stream_answer(system, prompt)
 
 @router.post("/ask")
-def ask_question(request, system: str, prompt: str):
+async def ask_question(request, system: str, prompt: str, mode: str = "agent"):
     """
     Endpoint to ask a question to the AI system.
 
@@ -12,19 +42,148 @@ def ask_question(request, system: str, prompt: str):
         request: The HTTP request object.
         system (str): The system to use for generating the solution.
         prompt (str): The prompt or question to ask the AI system.
+        mode (str): "agent" to run the documentation analyst crew, or "fast" for a single retrieval and completion.
 
     Returns:
         dict: A dictionary containing the result or an error message.
+
+    Raises:
+        HttpError: 503 while the AI provider is unavailable.
     """
     if not system or not prompt:
         return {"error": "Both system and prompt are required"}
 
+    if mode not in ANSWER_MODES:
+        return {"error": f"Invalid mode: {mode}. Available modes: {', '.join(ANSWER_MODES)}"}
+
+    systems = await sync_to_async(system_names)()
+    if system not in systems:
+        return {"error": f"Invalid system: {system}. Available systems: {', '.join(systems)}"}
+
     try:
-        result = process_prompt(system, prompt)
+        with metrics.labelled(endpoint="ask", system=system):
+            result = await run_llm_call(system, _process_prompt, system, prompt, mode)
         return {"result": str(result)}
+    except ProviderUnavailable as e:
+        raise HttpError(503, str(e))
     except ValueError as e:
         return {"error": str(e)}
     except FileNotFoundError as e:
         return {"error": str(e)}
     except Exception as e:
         return {"error": f"An unexpected error occurred: {str(e)}"}
+
+@router.post("/ask/stream")
+async def ask_question_stream(request, system: str, prompt: str, stream_format: str = Query("sse", alias="format")):
+    """
+    Endpoint to ask a question and stream the answer as it is produced.
+
+    Args:
+        request: The HTTP request object.
+        system (str): The system to use for generating the solution.
+        prompt (str): The prompt or question to ask the AI system.
+        stream_format (str): The ``format`` query parameter, "sse" for Server-Sent Events or "ndjson" for newline-delimited JSON.
+
+    Returns:
+        StreamingHttpResponse: The stream of agent steps, answer tokens and the final answer,
+        or a dictionary containing an error message.
+
+    Raises:
+        HttpError: 503 while the AI provider is unavailable.
+    """
+    if not system or not prompt:
+        return {"error": "Both system and prompt are required"}
+
+    if get_breaker().retry_after():
+        raise HttpError(503, "The AI provider is temporarily unavailable")
+
+    try:
+        # Importing the AI stack and resolving the system, which reads the registry, need a synchronous context
+        events = await sync_to_async(_stream_answer)(system, prompt)
+    except (ValueError, FileNotFoundError) as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"An unexpected error occurred: {str(e)}"}
+
+    from .streaming import format_sse, format_ndjson
+
+    if stream_format == "ndjson":
+        response = StreamingHttpResponse((format_ndjson(event) async for event in events), content_type="application/x-ndjson")
+    else:
+        response = StreamingHttpResponse((format_sse(event) async for event in events), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+@router.get("/cache/stats")
+def cache_stats(request):
+    """
+    Endpoint to inspect the answer cache.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        dict: Hits, misses, coalesced requests and saved seconds per system.
+    """
+    return get_stats()
+
+@router.get("/systems", response=List[DocumentSystemOut])
+def list_systems(request):
+    """
+    Endpoint to list the document systems and their indexing status.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        List[DocumentSystemOut]: The registered document systems.
+    """
+    systems = DocumentSystem.objects.prefetch_related('documents').order_by('name')
+    return [DocumentSystemOut.from_system(system) for system in systems]
+
+@router.post("/systems", response={202: DocumentSystemOut}, auth=auth)
+def upload_system(request, name: str = Form(...), title: str = Form(...), files: List[UploadedFile] = File(...)):
+    """
+    Endpoint to register a document system or add documents to an existing one.
+
+    The system is indexed in the background; running workers pick it up on
+    their next registry check without a restart.
+
+    Args:
+        request: The HTTP request object.
+        name (str): The system name used by the ``system`` parameter of the AI endpoints.
+        title (str): The documentation title used in prompts.
+        files (List[UploadedFile]): The PDF documents to add.
+
+    Returns:
+        DocumentSystemOut: The system, with its index status.
+
+    Raises:
+        HttpError: 400 if the name is not a slug or a file is not a PDF, 403 for non-admins.
+    """
+    if not request.auth.is_superuser:
+        raise HttpError(403, "Only admins can upload documentation")
+
+    # The name becomes a directory under DOC_INDEX_ROOT, and get_or_create does not run field validators
+    try:
+        validate_slug(name)
+    except ValidationError:
+        raise HttpError(400, f"Invalid system name: {name}. Use letters, numbers, underscores or hyphens")
+
+    for upload in files:
+        signature = upload.read(len(PDF_MAGIC))
+        upload.seek(0)
+        if not upload.name.lower().endswith('.pdf') or signature != PDF_MAGIC:
+            raise HttpError(400, f"Only PDF documents are supported: {upload.name}")
+
+    with transaction.atomic():
+        system, _ = DocumentSystem.objects.get_or_create(name=name, defaults={"title": title})
+        for upload in files:
+            SystemDocument.objects.create(system=system, file=upload)
+        system.title = title
+        system.index_status = 'PENDING'
+        system.save()
+        schedule_index(system)
+
+    return 202, DocumentSystemOut.from_system(system)
@@ -0,0 +1,91 @@
+import os
+import threading
+from django.conf import settings
+
+_http_client = None
+_async_http_client = None
+_openai_client = None
+_lock = threading.Lock()
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout():
+    import httpx
+
+    return httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+
+
+def get_http_client():
+    """
+    Return the pooled HTTP client shared by all synchronous LLM and embedding traffic.
+
+    Connections are kept alive and reused across requests, so calls after
+    the first skip the TCP and TLS handshakes.
+
+    Returns:
+        httpx.Client: The client, limited by ``LLM_POOL_MAX_CONNECTIONS``.
+    """
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                import httpx
+
+                _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+    return _http_client
+
+
+def get_async_http_client():
+    """
+    Return the pooled HTTP client shared by all asynchronous LLM and embedding traffic.
+
+    The client binds to the event loop it is first used on, which is the
+    worker's loop under an ASGI server.
+
+    Returns:
+        httpx.AsyncClient: The client, limited by ``LLM_POOL_MAX_CONNECTIONS``.
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        with _lock:
+            if _async_http_client is None:
+                import httpx
+
+                _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+    return _async_http_client
+
+
+def get_openai_client():
+    """
+    Return the OpenAI client used for direct completions and embeddings.
+
+    Requests go to ``OPENAI_BASE_URL`` over the shared connection pool.
+    Retries are left to ``resilience.call``.
+
+    Returns:
+        OpenAI: The client.
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+
+        client = OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=get_http_client(),
+            max_retries=0,
+        )
+        with _lock:
+            if _openai_client is None:
+                _openai_client = client
+    return _openai_client
+
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from django.conf import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Semaphores are bound to an event loop, so each loop gets its own set
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[asyncio.Semaphore, Dict[str, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the executor dedicated to blocking agent work.
+
+    Returns:
+        ThreadPoolExecutor: The executor, sized by ``AI_MAX_CONCURRENT_CALLS``.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.AI_MAX_CONCURRENT_CALLS, thread_name_prefix='ai-llm')
+    return _executor
+
+
+def _semaphores(system: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    if loop not in _limits:
+        _limits[loop] = (asyncio.Semaphore(settings.AI_MAX_CONCURRENT_CALLS), {})
+    global_limit, system_limits = _limits[loop]
+    if system not in system_limits:
+        system_limits[system] = asyncio.Semaphore(settings.AI_MAX_CONCURRENT_CALLS_PER_SYSTEM)
+    return global_limit, system_limits[system]
+
+
+async def run_llm_call(system: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking agent work for a system without blocking the event loop.
+
+    Calls wait for a per-system slot and then a global slot before running
+    on the dedicated executor. Waiters are served in arrival order and hold
+    no thread while they queue.
+
+    Args:
+        system (str): The system the call is for.
+        fn (Callable): The blocking function to run.
+        *args: Positional arguments for ``fn``.
+        **kwargs: Keyword arguments for ``fn``.
+
+    Returns:
+        The return value of ``fn``.
+    """
+    global_limit, system_limit = _semaphores(system)
+    async with system_limit:
+        async with global_limit:
+            context = contextvars.copy_context()
+            call = functools.partial(fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(get_executor(), context.run, call)
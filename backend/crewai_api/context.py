@@ -0,0 +1,166 @@
+import re
+from typing import List, Optional, Sequence, Set, Tuple
+from django.conf import settings
+
+# Separator placed between packed chunks, and where text was cut from a truncated description
+CHUNK_SEPARATOR = "\n\n---\n\n"
+ELLIPSIS = " [...] "
+
+_SENTENCE = re.compile(r'(?<=[.!?])\s+|\n+')
+_WORD = re.compile(r'\w+')
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        import tiktoken
+
+        try:
+            _encoding = tiktoken.encoding_for_model(settings.OPENAI_MODEL_NAME)
+        except KeyError:
+            _encoding = tiktoken.get_encoding('o200k_base')
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text with the chat model's tokenizer.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The number of tokens.
+    """
+    return len(_get_encoding().encode(text, disallowed_special=()))
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[start:start + size]) for start in range(len(words) - size + 1)}
+
+
+def dedupe_chunks(chunks: Sequence[str], seen: Optional[List[Set[Tuple[str, ...]]]] = None) -> List[str]:
+    """
+    Drop chunks that are near-identical to a more relevant one.
+
+    Chunks are compared by the Jaccard similarity of their word 3-grams;
+    those at or above ``DOC_DEDUPE_THRESHOLD`` against an earlier chunk are
+    dropped, which removes repeated passages and heavily overlapping chunks.
+
+    Args:
+        chunks (Sequence[str]): The chunks, most relevant first.
+        seen (Optional[List[Set]]): Shingles of chunks kept earlier, such as by a previous
+            search in the same agent run. Kept chunks are appended to it.
+
+    Returns:
+        List[str]: The chunks that are kept, in their original order.
+    """
+    seen = seen if seen is not None else []
+    kept = []
+    for chunk in chunks:
+        shingles = _shingles(chunk)
+        if any(len(shingles & other) / max(len(shingles | other), 1) >= settings.DOC_DEDUPE_THRESHOLD for other in seen):
+            continue
+        seen.append(shingles)
+        kept.append(chunk)
+    return kept
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    Shorten a text to a token limit while keeping its meaning.
+
+    Repeated lines (such as log spam) are collapsed, then whole sentences
+    are kept from the start, where the problem is usually stated, and from
+    the end, where errors and the latest details usually are. The cut is
+    marked with ``[...]``.
+
+    Args:
+        text (str): The text to shorten.
+        max_tokens (int): The maximum number of tokens to keep.
+
+    Returns:
+        str: The text, unchanged if it already fits.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = []
+    for line in text.splitlines():
+        if line.strip() and (not lines or line.strip() != lines[-1].strip()):
+            lines.append(line)
+    text = "\n".join(lines)
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = [sentence for sentence in _SENTENCE.split(text) if sentence.strip()]
+    budget = max_tokens - count_tokens(ELLIPSIS)
+    head: List[str] = []
+    tail: List[str] = []
+    used = 0
+    # Give the opening two thirds of the budget, the ending the rest
+    head_budget = budget * 2 // 3
+    for sentence in sentences:
+        tokens = count_tokens(sentence) + 1
+        if used + tokens > head_budget:
+            break
+        head.append(sentence)
+        used += tokens
+    for sentence in reversed(sentences[len(head):]):
+        tokens = count_tokens(sentence) + 1
+        if used + tokens > budget:
+            break
+        tail.insert(0, sentence)
+        used += tokens
+
+    if not head and not tail:
+        # A single sentence longer than the whole budget: cut it by tokens
+        encoding = _get_encoding()
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) + ELLIPSIS.rstrip()
+    return " ".join(head) + ELLIPSIS + " ".join(tail) if tail else " ".join(head) + ELLIPSIS.rstrip()
+
+
+def pack_chunks(chunks: Sequence[str], budget: int) -> Tuple[List[str], int]:
+    """
+    Select the most relevant chunks that fit in a token budget.
+
+    Chunks are taken in relevance order; one that does not fit is skipped
+    so smaller, less relevant chunks can still use the remaining budget.
+
+    Args:
+        chunks (Sequence[str]): The chunks, most relevant first.
+        budget (int): The maximum number of tokens for the packed chunks and their separators.
+
+    Returns:
+        tuple: The packed chunks and the number of tokens they use.
+    """
+    separator_tokens = count_tokens(CHUNK_SEPARATOR)
+    packed: List[str] = []
+    used = 0
+    for chunk in chunks:
+        tokens = count_tokens(chunk) + (separator_tokens if packed else 0)
+        if used + tokens > budget:
+            continue
+        packed.append(chunk)
+        used += tokens
+    return packed, used
+
+
+def build_context(chunks: Sequence[str], budget: int) -> Tuple[str, int]:
+    """
+    Assemble retrieved chunks into prompt context within a token budget.
+
+    Args:
+        chunks (Sequence[str]): The retrieved chunks, most relevant first.
+        budget (int): The maximum number of context tokens.
+
+    Returns:
+        tuple: The context text and the number of tokens it uses.
+    """
+    packed, used = pack_chunks(dedupe_chunks(chunks), budget)
+    return CHUNK_SEPARATOR.join(packed), used
@@ -1,39 +1,136 @@
 import os
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List, Optional
+from django.conf import settings
 from crewai import Agent, Task, Crew
-from crewai_tools import PDFSearchTool
+from langchain_openai import ChatOpenAI
 from openai import OpenAI
+from . import answer_cache, metrics, resilience, semantic_cache
+from .answer_cache import ANSWER_MODES
+from .clients import get_async_http_client, get_http_client, get_openai_client
+from .context import build_context
+from .embeddings import embed_texts
+from .doc_index import get_search_tool, index_version, search_chunks
+from .registry import get_system
+from .resilience import ProviderUnavailable
 
-# Initialize OpenAI client with API key from environment variables
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+def get_client() -> OpenAI:
+    """
+    Return the OpenAI client for direct completions.
+
+    Returns:
+        OpenAI: The client shared with the embedding calls, over the pooled HTTP connections.
+    """
+    return get_openai_client()
+
+def get_documents(system: str) -> List[Path]:
+    """
+    Return the documentation files of a system that exist on disk.
+
+    Args:
+        system (str): The system name.
+
+    Returns:
+        List[Path]: The paths of the system's PDF documents.
+
+    Raises:
+        ValueError: If the system is not valid.
+        FileNotFoundError: If none of the system's PDF files exist.
+    """
+    record = get_system(system)
+    if record is None:
+        raise ValueError(f"Invalid system: {system}")
+
+    paths = [path for path in record["documents"] if path.exists()]
+    if not paths:
+        missing = ', '.join(str(path) for path in record["documents"]) or 'no uploaded documents'
+        raise FileNotFoundError(f"PDF file not found for system {system} at {missing}")
+    return paths
+
+def system_title(system: str) -> str:
+    """
+    Return the title of a system's documentation, as used in prompts.
+
+    Args:
+        system (str): The system name.
+
+    Returns:
+        str: The documentation title.
+
+    Raises:
+        ValueError: If the system is not valid.
+    """
+    record = get_system(system)
+    if record is None:
+        raise ValueError(f"Invalid system: {system}")
+    return record["title"]
+
+def context_budget(system: str) -> int:
+    """
+    Return the maximum number of documentation context tokens per request for a system.
 
-# Mapping of system names to their respective PDF documentation paths
-SYSTEM_PDF_MAP: Dict[str, Path] = {
-    "system1": Path('media/system1_documentation.pdf'),
-    "system2": Path('media/system2_documentation.pdf'),
-}
+    Args:
+        system (str): The system name.
 
-# Mapping of system names to their respective filenames
-SYSTEM_FILENAME_MAP: Dict[str, str] = {
-    "system1": "DO THE WORK BOOK",
-    "system2": "DJANGO REST FRAMEWORK BOOK",
-}
+    Returns:
+        int: The system's token budget, or ``DOC_CONTEXT_TOKEN_BUDGET`` if it has none.
+    """
+    record = get_system(system)
+    return record["context_token_budget"] if record else settings.DOC_CONTEXT_TOKEN_BUDGET
 
-# Initialize PDF search tools for each system if the PDF file exists
-PDF_SEARCH_TOOLS = {
-    system: PDFSearchTool(pdf=str(path))
-    for system, path in SYSTEM_PDF_MAP.items()
-    if path.exists()
-}
+def record_usage(system: str, usage: Optional[Dict], mode: str) -> None:
+    """
+    Add an answer's LLM usage to the system's counters and metrics.
 
-def create_crew(system: str, prompt: str) -> Crew:
+    Args:
+        system (str): The system name.
+        usage (Optional[Dict]): Prompt and completion token counts and the number of
+            successful LLM requests, if the model reported them.
+        mode (str): The answer mode, "agent" or "fast".
+    """
+    if not usage:
+        return
+    answer_cache.record(system, "llm_answers")
+    for kind in ("prompt_tokens", "completion_tokens"):
+        answer_cache.record(system, kind, usage.get(kind, 0))
+        metrics.TOKENS.observe(usage.get(kind, 0), system=system, kind=kind.split('_')[0])
+    metrics.LLM_CALLS.observe(usage.get("successful_requests", 0), system=system, mode=mode)
+
+def build_llm(streaming: bool = False, callbacks: Optional[List] = None) -> ChatOpenAI:
+    """
+    Build the chat model used by the documentation analyst agent.
+
+    Each LLM call of the agent is limited to ``LLM_TIMEOUT`` seconds and
+    retried up to ``LLM_MAX_RETRIES`` times by the OpenAI client. Requests
+    go through the shared connection pool.
+
+    Args:
+        streaming (bool): Whether to stream tokens to the callbacks as they are generated.
+        callbacks (Optional[List]): LangChain callback handlers attached to the model.
+
+    Returns:
+        ChatOpenAI: The configured chat model.
+    """
+    return ChatOpenAI(
+        model=settings.OPENAI_MODEL_NAME,
+        base_url=settings.OPENAI_BASE_URL,
+        streaming=streaming,
+        callbacks=callbacks,
+        timeout=settings.LLM_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
+def create_crew(system: str, prompt: str, llm: Optional[ChatOpenAI] = None, step_callback: Optional[Callable] = None) -> Crew:
     """
     Create a Crew instance for analyzing system documentation.
 
     Args:
         system (str): The system name to analyze.
         prompt (str): The prompt or question to analyze.
+        llm (Optional[ChatOpenAI]): The chat model for the agent (default is ``build_llm()``).
+        step_callback (Optional[Callable]): Called with each intermediate agent step.
 
     Returns:
         Crew: The Crew instance configured for the specified system.
@@ -42,26 +139,22 @@ def create_crew(system: str, prompt: str) -> Crew:
         ValueError: If the system is not valid.
         FileNotFoundError: If the PDF file for the system does not exist.
     """
-    if system not in SYSTEM_PDF_MAP:
-        raise ValueError(f"Invalid system: {system}")
-
-    pdf_path = SYSTEM_PDF_MAP[system]
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"PDF file not found for system {system} at {pdf_path.absolute()}")
-
-    # Initialize PDFSearchTool with the specific PDF path
-    pdf_search_tool = PDFSearchTool(pdf=str(pdf_path))
+    # Reuse the warm search tool backed by the persistent document index
+    pdf_search_tool = get_search_tool(system, get_documents(system), context_budget(system))
+    title = system_title(system)
 
     analyst_agent = Agent(
-        role=f'{SYSTEM_FILENAME_MAP[system].capitalize()} Documentation Analyst',
-        goal=f'Efficiently analyze the {SYSTEM_FILENAME_MAP[system]} documentation and provide accurate, summarized answers based solely on the documentation',
-        backstory=f'You are an expert at quickly understanding and interpreting {SYSTEM_FILENAME_MAP[system]} documentation. You excel at extracting key information and presenting it in a clear, concise manner without adding any external information or mentioning where in the document the information was found.',
+        role=f'{title.capitalize()} Documentation Analyst',
+        goal=f'Efficiently analyze the {title} documentation and provide accurate, summarized answers based solely on the documentation',
+        backstory=f'You are an expert at quickly understanding and interpreting {title} documentation. You excel at extracting key information and presenting it in a clear, concise manner without adding any external information or mentioning where in the document the information was found.',
         tools=[pdf_search_tool],
+        llm=llm or build_llm(),
+        step_callback=step_callback,
         verbose=True
     )
 
     analyze_task = Task(
-        description=f'Quickly analyze the relevant parts of the {SYSTEM_FILENAME_MAP[system]} documentation and provide a summarized answer to the following question: {prompt}. If the question is not related to the document content, politely ask the user to provide a question related to the {SYSTEM_FILENAME_MAP[system]} documentation.',
+        description=f'Quickly analyze the relevant parts of the {title} documentation and provide a summarized answer to the following question: {prompt}. If the question is not related to the document content, politely ask the user to provide a question related to the {title} documentation.',
         expected_output="A concise and accurate answer to the user's question, based solely on the system documentation. The answer should be clear, to the point, and not include any information not present in the documentation. Do not mention where in the document the information was found unless if the question specifically asks for that information. If the information is not found or if the question is unrelated to the document, politely ask the user to provide a question related to the system documentation.",
         agent=analyst_agent
     )
@@ -74,21 +167,163 @@ def create_crew(system: str, prompt: str) -> Crew:
 
     return crew
 
-def process_prompt(system: str, prompt: str) -> str:
+def answer_fast(system: str, prompt: str) -> str:
+    """
+    Answer a prompt with one retrieval and one completion, bypassing the agent loop.
+
+    Args:
+        system (str): The system name to use for processing the prompt.
+        prompt (str): The prompt or question to process.
+
+    Returns:
+        str: The answer produced by the model.
+
+    Raises:
+        ProviderUnavailable: If the LLM provider is unhealthy.
+    """
+    filename = system_title(system)
+    chunks = search_chunks(system, get_documents(system), prompt, settings.FAST_MODE_TOP_K)
+    context, context_tokens = build_context(chunks, context_budget(system))
+    answer_cache.record(system, "context_tokens", context_tokens)
+    metrics.TOKENS.observe(context_tokens, system=system, kind="context")
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                f"You are a {filename} documentation analyst. Answer the user's question concisely and accurately, "
+                f"based solely on the documentation excerpts below. Do not add any information that is not present in "
+                f"the excerpts, and do not mention where in the document the information was found unless the question "
+                f"specifically asks for it. If the answer is not in the excerpts or the question is unrelated to the "
+                f"{filename} documentation, politely ask the user to provide a question related to the documentation.\n\n"
+                f"Documentation excerpts:\n{context}"
+            ),
+        },
+        {"role": "user", "content": prompt},
+    ]
+    with metrics.timed("llm", system=system):
+        response = resilience.call("chat", lambda timeout: get_client().chat.completions.create(
+            model=settings.OPENAI_MODEL_NAME,
+            temperature=0,
+            messages=messages,
+            timeout=timeout,
+        ))
+    if response.usage is not None:
+        record_usage(system, {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "successful_requests": 1,
+        }, "fast")
+    return response.choices[0].message.content or ""
+
+def run_crew(system: str, prompt: str, llm: Optional[ChatOpenAI] = None, step_callback: Optional[Callable] = None) -> str:
+    """
+    Answer a prompt with the documentation analyst crew, recording its usage.
+
+    Args:
+        system (str): The system name to use for processing the prompt.
+        prompt (str): The prompt or question to process.
+        llm (Optional[ChatOpenAI]): The chat model to use (default is ``build_llm()``).
+        step_callback (Optional[Callable]): Called with each intermediate agent step.
+
+    Returns:
+        str: The crew's answer.
+
+    Raises:
+        ProviderUnavailable: If the LLM provider is unhealthy or the run takes longer than ``LLM_AGENT_DEADLINE``.
+    """
+    steps = []
+
+    def on_step(step) -> None:
+        steps.append(step)
+        if step_callback is not None:
+            step_callback(step)
+
+    crew = create_crew(system, prompt, llm=llm, step_callback=on_step)
+    with metrics.timed("agent", system=system), resilience.guarded("agent"):
+        answer = str(resilience.run_with_deadline("agent", crew.kickoff, settings.LLM_AGENT_DEADLINE))
+
+    metrics.AGENT_ITERATIONS.observe(len(steps), system=system)
+    context_tokens = sum(getattr(tool, 'context_tokens', 0) for agent in crew.agents for tool in agent.tools)
+    metrics.TOKENS.observe(context_tokens, system=system, kind="context")
+    record_usage(system, getattr(crew, 'usage_metrics', None), "agent")
+    return answer
+
+def generate_answer(system: str, prompt: str, mode: str = "agent", llm: Optional[ChatOpenAI] = None, step_callback: Optional[Callable] = None) -> str:
+    """
+    Answer a prompt using the specified system's documentation.
+
+    Answers are cached per system, normalized prompt and document index
+    version, and concurrent identical prompts share a single crew run. On an
+    exact miss, paraphrases of previously answered prompts are served from
+    the semantic cache.
+
+    Args:
+        system (str): The system name to use for processing the prompt.
+        prompt (str): The prompt or question to process.
+        mode (str): "agent" to run the crew, or "fast" for a single retrieval and completion.
+        llm (Optional[ChatOpenAI]): The chat model of the crew, if it runs (default is ``build_llm()``).
+        step_callback (Optional[Callable]): Called with each intermediate agent step, if the crew runs.
+
+    Returns:
+        str: The answer.
+
+    Raises:
+        ValueError: If the system or mode is not valid.
+        FileNotFoundError: If the PDF file for the system does not exist.
+        ProviderUnavailable: If the LLM provider is unhealthy.
+    """
+    if mode not in ANSWER_MODES:
+        raise ValueError(f"Invalid mode: {mode}. Available modes: {', '.join(ANSWER_MODES)}")
+
+    with metrics.labelled(system=system), metrics.timed("answer"):
+        version = index_version(system, get_documents(system))
+        return answer_cache.get_or_compute(
+            system, prompt, version, lambda: _compute_answer(system, prompt, version, mode, llm, step_callback), mode
+        )
+
+def _compute_answer(system: str, prompt: str, version: str, mode: str, llm: Optional[ChatOpenAI] = None, step_callback: Optional[Callable] = None) -> str:
+    """Produce an answer on an exact cache miss, trying the semantic cache first."""
+    vector = None
+    if settings.SEMANTIC_CACHE_ENABLED:
+        try:
+            vector = embed_texts([prompt])[0]
+        except Exception as e:
+            print(f"Error embedding prompt for semantic cache: {e}")
+        else:
+            answer = semantic_cache.lookup(system, version, vector, mode)
+            if answer is not None:
+                return answer
+
+    # Only a request that runs the model counts as an answer cache miss
+    answer_cache.record(system, "misses")
+    if mode == "fast":
+        answer = answer_fast(system, prompt)
+    else:
+        answer = run_crew(system, prompt, llm=llm, step_callback=step_callback)
+    if vector is not None:
+        semantic_cache.store(system, version, vector, answer, mode)
+    return answer
+
+def process_prompt(system: str, prompt: str, mode: str = "agent") -> str:
     """
     Process a prompt using the specified system's documentation.
 
     Args:
         system (str): The system name to use for processing the prompt.
         prompt (str): The prompt or question to process.
+        mode (str): "agent" to run the crew, or "fast" for a single retrieval and completion.
 
     Returns:
         str: The result of processing the prompt.
+
+    Raises:
+        ProviderUnavailable: If the LLM provider is unhealthy, so callers can
+            report the outage instead of returning an error as the answer.
     """
     try:
-        crew = create_crew(system, prompt)
-        result = crew.kickoff()
-        return str(result)
+        return generate_answer(system, prompt, mode)
+    except ProviderUnavailable:
+        raise
     except Exception as e:
         print(f"Error processing prompt: {e}")
         return f"An error occurred while processing your request: {str(e)}"
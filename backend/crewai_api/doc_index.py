@@ -0,0 +1,303 @@
+import fcntl
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from django.conf import settings
+from . import ingest, metrics
+from .embeddings import embed_texts
+from .keyword_index import KeywordIndex
+from .tools import DocumentSearchTool
+from .vector_store import open_store
+
+# Name of the file recording which documents, pages and chunks are indexed
+MANIFEST_NAME = 'manifest.json'
+
+# Name of the BM25 keyword index file kept next to each vector store
+KEYWORDS_NAME = 'keywords.json'
+
+# Warm vector stores and keyword indexes per system, with the index version they hold
+_WARM_STORES: Dict[str, Tuple[str, object, KeywordIndex]] = {}
+
+# Cached digests per PDF path, keyed by the (mtime, size) they were computed for
+_DIGESTS: Dict[Path, Tuple[Tuple[int, int], str]] = {}
+
+_lock = threading.Lock()
+
+
+def pdf_digest(pdf_path: Path) -> str:
+    """
+    Compute the SHA-256 digest of a PDF's contents.
+
+    The digest is cached per path and only recomputed when the file's
+    modification time or size changes, so calling this on every request
+    costs a single ``stat``.
+
+    Args:
+        pdf_path (Path): The path to the PDF file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    stat = pdf_path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _DIGESTS.get(pdf_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    sha = hashlib.sha256()
+    with open(pdf_path, 'rb') as pdf_file:
+        for block in iter(lambda: pdf_file.read(1024 * 1024), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+    _DIGESTS[pdf_path] = (signature, digest)
+    return digest
+
+
+def index_dir(system: str) -> Path:
+    """
+    Return the on-disk directory holding a system's index.
+
+    Args:
+        system (str): The system name.
+
+    Returns:
+        Path: The index directory for this system.
+
+    Raises:
+        ValueError: If the name would place the directory outside ``DOC_INDEX_ROOT``.
+    """
+    root = Path(settings.DOC_INDEX_ROOT).resolve()
+    path = (root / system).resolve()
+    if path == root or not path.is_relative_to(root):
+        raise ValueError(f"Invalid system name: {system}")
+    return path
+
+
+def store_dir(system: str) -> Path:
+    """
+    Return the directory holding a system's vector store and manifest.
+
+    Each retriever backend keeps its own store, so switching
+    ``DOC_RETRIEVER_BACKEND`` builds a fresh index instead of reusing a
+    manifest that describes another backend's data.
+
+    Args:
+        system (str): The system name.
+
+    Returns:
+        Path: The store directory for this system and the configured backend.
+    """
+    return index_dir(system) / settings.DOC_RETRIEVER_BACKEND
+
+
+def _documents(paths: Sequence[Path]) -> List[Tuple[Path, str]]:
+    """Return the existing documents among ``paths`` with their digests."""
+    return [(Path(path), pdf_digest(Path(path))) for path in paths if Path(path).exists()]
+
+
+def index_version(system: str, paths: Sequence[Path]) -> str:
+    """
+    Return the version identifier of a system's document index.
+
+    The version changes whenever a document is added, removed or edited.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+
+    Returns:
+        str: A digest over the names and contents of the system's documents.
+    """
+    lines = sorted(f"{path.name}:{digest}" for path, digest in _documents(paths))
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def is_built(system: str, paths: Sequence[Path]) -> bool:
+    """
+    Check whether the index on disk matches the current documents.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+
+    Returns:
+        bool: True if the index is up to date.
+    """
+    manifest = ingest.load_manifest(store_dir(system) / MANIFEST_NAME)
+    return manifest["version"] == index_version(system, paths)
+
+
+@contextmanager
+def _index_lock(system: str):
+    """Hold an exclusive lock on a system's index across processes."""
+    directory = index_dir(system)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _open_store(system: str):
+    directory = store_dir(system)
+    directory.mkdir(parents=True, exist_ok=True)
+    return open_store(directory, system)
+
+
+def _open_keywords(system: str) -> KeywordIndex:
+    return KeywordIndex(store_dir(system) / KEYWORDS_NAME)
+
+
+def build_index(system: str, paths: Sequence[Path], force: bool = False) -> Dict[str, int]:
+    """
+    Bring a system's index up to date with its documents.
+
+    Only new or changed pages are embedded and chunks from removed or edited
+    pages are deleted. The keyword index is updated alongside the vectors.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+        force (bool): Discard the existing index and rebuild it from scratch.
+
+    Returns:
+        dict: The number of chunks added, removed and indexed in total.
+    """
+    version = index_version(system, paths)
+    with _lock, _index_lock(system):
+        store, keywords = _open_store(system), _open_keywords(system)
+        stats = ingest.sync(store, store_dir(system) / MANIFEST_NAME, _documents(paths), version, force=force, keywords=keywords)
+        _WARM_STORES[system] = (version, store, keywords)
+    return stats
+
+
+def get_index(system: str, paths: Sequence[Path]) -> Tuple[object, KeywordIndex]:
+    """
+    Return the warm vector store and keyword index for a system.
+
+    Both are opened once per process and reused across requests. If the
+    documents changed since they were opened, the index is synced first.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+
+    Returns:
+        tuple: The system's vector store, as configured by ``DOC_RETRIEVER_BACKEND``, and its keyword index.
+    """
+    version = index_version(system, paths)
+    warm: Optional[Tuple[str, object, KeywordIndex]] = _WARM_STORES.get(system)
+    if warm and warm[0] == version:
+        return warm[1], warm[2]
+
+    with _lock, _index_lock(system):
+        warm = _WARM_STORES.get(system)
+        if warm and warm[0] == version:
+            return warm[1], warm[2]
+        store, keywords = _open_store(system), _open_keywords(system)
+        manifest_path = store_dir(system) / MANIFEST_NAME
+        if ingest.load_manifest(manifest_path)["version"] != version:
+            ingest.sync(store, manifest_path, _documents(paths), version, keywords=keywords)
+        elif not keywords.exists():
+            # Indexes built before keyword search existed get their keyword index on first use
+            ingest.sync_keywords(store, keywords, set(store.ids()), {})
+        _WARM_STORES[system] = (version, store, keywords)
+        return store, keywords
+
+
+def get_store(system: str, paths: Sequence[Path]):
+    """
+    Return the warm vector store for a system.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+
+    Returns:
+        The system's vector store, as configured by ``DOC_RETRIEVER_BACKEND``.
+    """
+    return get_index(system, paths)[0]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """
+    Merge several rankings of chunk IDs with reciprocal rank fusion.
+
+    Each chunk scores ``1 / (k + rank)`` in every ranking it appears in, so
+    chunks ranked well by both keyword and vector search rise to the top
+    without having to calibrate BM25 scores against cosine similarities.
+
+    Args:
+        rankings (Sequence[Sequence[str]]): Chunk IDs from each retriever, best first.
+        k (int): The rank offset damping the weight of the top ranks.
+
+    Returns:
+        List[str]: The fused chunk IDs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def search_chunks(system: str, paths: Sequence[Path], query: str, k: Optional[int] = None) -> List[str]:
+    """
+    Retrieve the chunks of a system's documentation most relevant to a query.
+
+    With ``DOC_SEARCH_MODE`` set to "hybrid", the top
+    ``DOC_HYBRID_CANDIDATES`` chunks from vector search and from BM25
+    keyword search are merged with reciprocal rank fusion, so exact
+    identifiers such as error codes and class names are not lost to
+    embedding similarity.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+        query (str): The search query.
+        k (Optional[int]): The number of chunks to return (default is ``DOC_SEARCH_TOP_K``).
+
+    Returns:
+        List[str]: The chunk texts, most relevant first.
+    """
+    with metrics.timed("retrieval", system=system):
+        return _search(system, paths, query, k or settings.DOC_SEARCH_TOP_K)
+
+
+def _search(system: str, paths: Sequence[Path], query: str, k: int) -> List[str]:
+    store, keywords = get_index(system, paths)
+    if settings.DOC_SEARCH_MODE != "hybrid":
+        return [text for _, text, _ in store.search(embed_texts([query])[0], k)]
+
+    candidates = max(k, settings.DOC_HYBRID_CANDIDATES)
+    vector_hits = store.search(embed_texts([query])[0], candidates)
+    keyword_hits = keywords.search(query, candidates)
+    fused = reciprocal_rank_fusion(
+        [[chunk_id for chunk_id, _, _ in vector_hits], [chunk_id for chunk_id, _ in keyword_hits]],
+        settings.DOC_RRF_K,
+    )[:k]
+
+    texts = {chunk_id: text for chunk_id, text, _ in vector_hits}
+    missing = [chunk_id for chunk_id in fused if chunk_id not in texts]
+    texts.update(zip(missing, store.texts(missing)))
+    return [texts[chunk_id] for chunk_id in fused]
+
+
+def get_search_tool(system: str, paths: Sequence[Path], token_budget: int) -> DocumentSearchTool:
+    """
+    Return a search tool over a system's documentation for the analyst agent.
+
+    Args:
+        system (str): The system name.
+        paths (Sequence[Path]): The paths to the system's documents.
+        token_budget (int): The maximum documentation tokens the tool returns over the agent run.
+
+    Returns:
+        DocumentSearchTool: The search tool.
+    """
+    get_index(system, paths)
+    return DocumentSearchTool(system=system, documents=[str(path) for path in paths], token_budget=token_budget)
@@ -0,0 +1,28 @@
+from typing import List
+import numpy as np
+from django.conf import settings
+from . import metrics, resilience
+from .clients import get_openai_client
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts with the configured embedding model.
+
+    Args:
+        texts (List[str]): The texts to embed.
+
+    Returns:
+        np.ndarray: A float32 matrix with one L2-normalized row per text.
+
+    Raises:
+        ProviderUnavailable: If the embedding provider is unhealthy.
+    """
+    with metrics.timed("embedding"):
+        response = resilience.call(
+            "embedding",
+            lambda timeout: get_openai_client().embeddings.create(model=settings.EMBEDDING_MODEL, input=texts, timeout=timeout),
+        )
+    vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from django.conf import settings
+from pypdf import PdfReader
+from .embeddings import embed_texts
+
+# Number of chunks embedded per embedding request
+EMBED_BATCH_SIZE = 100
+
+
+def chunk_id(text: str) -> str:
+    """
+    Return the content-addressed ID of a chunk.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        str: The chunk ID.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def page_hash(text: str) -> str:
+    """
+    Hash a PDF page's extracted text.
+
+    The raw content stream is not enough: pages can share one stream yet
+    render different text through their resources, such as form XObjects.
+
+    Args:
+        text (str): The page text.
+
+    Returns:
+        str: The hex digest of the page text.
+    """
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def split_text(text: str) -> List[str]:
+    """
+    Split a page's text into overlapping chunks.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        List[str]: The chunks, each at most ``DOC_CHUNK_SIZE`` characters.
+    """
+    text = " ".join(text.split())
+    size, overlap = settings.DOC_CHUNK_SIZE, settings.DOC_CHUNK_OVERLAP
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Prefer to break on a word boundary
+            space = text.rfind(" ", start + size // 2, end)
+            end = space if space != -1 else end
+        chunks.append(text[start:end].strip())
+        if end == len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [chunk for chunk in chunks if chunk]
+
+
+def load_manifest(path: Path) -> Dict:
+    """
+    Load an index manifest, or an empty one if it does not exist.
+
+    Args:
+        path (Path): The manifest path.
+
+    Returns:
+        dict: The manifest.
+    """
+    if not path.exists():
+        return {"version": None, "documents": {}}
+    return json.loads(path.read_text())
+
+
+def _write_manifest(path: Path, manifest: Dict) -> None:
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path)
+
+
+def sync_keywords(store, keywords, wanted: Set[str], new_texts: Dict[str, str]) -> None:
+    """
+    Bring a keyword index in line with the chunks of a vector store.
+
+    Args:
+        store: The system's vector store.
+        keywords (KeywordIndex): The system's keyword index.
+        wanted (Set[str]): The IDs of every chunk that should be indexed.
+        new_texts (Dict[str, str]): Texts of chunks just added, to avoid reading them back from the store.
+    """
+    indexed = set(keywords.ids())
+    stale = indexed - wanted
+    missing = [cid for cid in wanted if cid not in indexed]
+    if not stale and not missing and keywords.exists():
+        return
+
+    keywords.delete(stale)
+    from_store = [cid for cid in missing if cid not in new_texts]
+    texts = dict(zip(from_store, store.texts(from_store)))
+    texts.update((cid, new_texts[cid]) for cid in missing if cid in new_texts)
+    keywords.add(missing, [texts[cid] for cid in missing])
+    keywords.save()
+
+
+def sync(store, manifest_path: Path, documents: List[Tuple[Path, str]], version: str, force: bool = False, keywords=None) -> Dict[str, int]:
+    """
+    Bring a system's index in line with its documents, embedding only what changed.
+
+    Documents whose digest is unchanged are skipped. For changed documents,
+    pages whose text hash is already indexed reuse their chunks; only the
+    text of new pages is chunked and embedded. Chunks no longer
+    referenced by any document are removed from the store.
+
+    Args:
+        store: The system's vector store.
+        manifest_path (Path): Where the index manifest is kept.
+        documents (List[Tuple[Path, str]]): Each document's path and content digest.
+        version (str): The index version the documents correspond to.
+        force (bool): Discard the existing index and rebuild it from scratch.
+        keywords (Optional[KeywordIndex]): The system's keyword index, kept in line with the store.
+
+    Returns:
+        dict: The number of chunks added, removed and indexed in total.
+    """
+    manifest = load_manifest(manifest_path)
+    if force:
+        store.reset()
+        if keywords is not None:
+            keywords.reset()
+        manifest = {"version": None, "documents": {}}
+
+    known_pages: Dict[str, List[str]] = {
+        page["hash"]: page["chunks"]
+        for document in manifest["documents"].values()
+        for page in document["pages"]
+    }
+    new_chunks: Dict[str, Tuple[str, str]] = {}
+    indexed: Dict[str, Dict] = {}
+
+    for path, digest in documents:
+        previous = manifest["documents"].get(path.name)
+        if previous and previous["sha256"] == digest:
+            indexed[path.name] = previous
+            continue
+
+        pages = []
+        for page in PdfReader(path).pages:
+            page_text = page.extract_text() or ""
+            key = page_hash(page_text)
+            if key not in known_pages:
+                chunk_ids = []
+                for text in split_text(page_text):
+                    new_chunks.setdefault(chunk_id(text), (text, path.name))
+                    chunk_ids.append(chunk_id(text))
+                known_pages[key] = chunk_ids
+            pages.append({"hash": key, "chunks": known_pages[key]})
+        indexed[path.name] = {"sha256": digest, "pages": pages}
+
+    wanted = {cid for document in indexed.values() for page in document["pages"] for cid in page["chunks"]}
+    existing = set(store.ids())
+    to_add = [cid for cid in new_chunks if cid in wanted and cid not in existing]
+    for start in range(0, len(to_add), EMBED_BATCH_SIZE):
+        batch = to_add[start:start + EMBED_BATCH_SIZE]
+        texts = [new_chunks[cid][0] for cid in batch]
+        store.add(batch, texts, [{"source": new_chunks[cid][1]} for cid in batch], embed_texts(texts))
+
+    stale = list(existing - wanted)
+    store.delete(stale)
+    store.optimize()
+    if keywords is not None:
+        sync_keywords(store, keywords, wanted, {cid: new_chunks[cid][0] for cid in to_add})
+
+    _write_manifest(manifest_path, {"version": version, "documents": indexed})
+    return {"added": len(to_add), "removed": len(stale), "chunks": len(wanted)}
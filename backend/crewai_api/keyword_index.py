@@ -0,0 +1,153 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Identifiers such as ModelSerializer, DEFAULT_PERMISSION_CLASSES, E1045 or rest_framework.views
+_TOKEN = re.compile(r'[A-Za-z0-9_]+(?:[.\-][A-Za-z0-9_]+)*')
+_CAMEL = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its of on or so that the
+their them then there these they this to was what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Identifiers are kept whole so exact matches on names like
+    ``ModelSerializer`` or ``DEFAULT_PERMISSION_CLASSES`` score highly, and
+    their camel-case, snake-case and dotted parts are added as well so
+    partial matches still count.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms, stopwords removed.
+    """
+    terms = []
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        lowered = token.lower()
+        if lowered not in _STOPWORDS:
+            terms.append(lowered)
+        parts = [part.lower() for piece in re.split(r'[._\-]', token) for part in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part not in _STOPWORDS)
+    return terms
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over a system's chunks, persisted next to its vector store.
+
+    The file stores each chunk's term frequencies; postings lists are built
+    in memory when the index is first searched.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.docs: Dict[str, Dict[str, int]] = {}
+        if self.path.exists():
+            self.docs = json.loads(self.path.read_text())["docs"]
+        self._postings: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        self._lengths: Dict[str, int] = {}
+        self._average_length = 0.0
+
+    def exists(self) -> bool:
+        """
+        Check whether the index has been written to disk.
+
+        Returns:
+            bool: True if the index file exists.
+        """
+        return self.path.exists()
+
+    def ids(self) -> List[str]:
+        """
+        Return the IDs of every indexed chunk.
+
+        Returns:
+            List[str]: The chunk IDs.
+        """
+        return list(self.docs.keys())
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]) -> None:
+        """
+        Index chunks.
+
+        Args:
+            ids (Iterable[str]): The chunk IDs.
+            texts (Iterable[str]): The chunk texts.
+        """
+        for chunk_id, text in zip(ids, texts):
+            self.docs[chunk_id] = dict(Counter(tokenize(text)))
+        self._postings = None
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """
+        Remove chunks from the index.
+
+        Args:
+            ids (Iterable[str]): The IDs of the chunks to remove.
+        """
+        for chunk_id in ids:
+            self.docs.pop(chunk_id, None)
+        self._postings = None
+
+    def reset(self) -> None:
+        """Remove every chunk."""
+        self.docs = {}
+        self._postings = None
+
+    def save(self) -> None:
+        """Write the index to disk atomically."""
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({"docs": self.docs}))
+        os.replace(tmp_path, self.path)
+
+    def _build(self) -> None:
+        postings: Dict[str, List[Tuple[str, int]]] = {}
+        for chunk_id, frequencies in self.docs.items():
+            for term, frequency in frequencies.items():
+                postings.setdefault(term, []).append((chunk_id, frequency))
+        self._lengths = {chunk_id: sum(frequencies.values()) for chunk_id, frequencies in self.docs.items()}
+        self._average_length = sum(self._lengths.values()) / max(len(self._lengths), 1)
+        self._postings = postings
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query (str): The search query.
+            k (int): The number of chunks to return.
+
+        Returns:
+            List[Tuple[str, float]]: (chunk ID, BM25 score), best first.
+        """
+        if self._postings is None:
+            self._build()
+
+        count = len(self.docs)
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[chunk_id] / self._average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
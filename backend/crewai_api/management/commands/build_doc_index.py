@@ -0,0 +1,42 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from crewai_api.doc_index import build_index, is_built
+from crewai_api.models import DocumentSystem
+
+
+class Command(BaseCommand):
+    help = "Bring the persistent document index of each registered system in line with its PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--system', action='append', help='Only build the index for this system (repeatable).')
+        parser.add_argument('--force', action='store_true', help='Discard the existing index and rebuild it from scratch.')
+
+    def handle(self, *args, **options):
+        systems = DocumentSystem.objects.filter(is_active=True).prefetch_related('documents').order_by('name')
+        if options['system']:
+            unknown = set(options['system']) - set(systems.filter(name__in=options['system']).values_list('name', flat=True))
+            if unknown:
+                raise CommandError(f"Invalid system: {', '.join(sorted(unknown))}")
+            systems = systems.filter(name__in=options['system'])
+
+        for system in systems:
+            paths = []
+            for document in system.documents.all():
+                path = Path(document.file.path)
+                if path.exists():
+                    paths.append(path)
+                else:
+                    self.stderr.write(f"{system.name}: PDF not found at {path}")
+            if not paths:
+                self.stderr.write(f"Skipping {system.name}: no documents found")
+                continue
+
+            if is_built(system.name, paths) and not options['force']:
+                self.stdout.write(f"{system.name}: index is up to date")
+            else:
+                stats = build_index(system.name, paths, force=options['force'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{system.name}: {stats['added']} chunk(s) added, {stats['removed']} removed, {stats['chunks']} indexed"
+                ))
+            DocumentSystem.objects.filter(id=system.id).update(index_status='READY', index_error='', indexed_at=timezone.now())
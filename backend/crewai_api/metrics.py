@@ -0,0 +1,205 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+# Labels filled in from the surrounding code when an observation does not set them
+_labels: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar('ai_metric_labels', default={})
+
+_metrics: List["_Metric"] = []
+
+
+@contextmanager
+def labelled(**labels: str):
+    """
+    Set default metric labels, such as ``system`` and ``endpoint``, for the enclosed code.
+
+    The labels follow the code into executor threads started with a copied
+    context, as ``run_llm_call`` does.
+
+    Args:
+        **labels: The label values.
+    """
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        defaults = _labels.get()
+        return tuple(str(labels.get(name, defaults.get(name, 'unknown'))) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Add to the counter.
+
+        Args:
+            amount (float): The amount to add.
+            **labels: Label values; missing ones come from ``labelled``.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value (float): The observed value.
+            **labels: Label values; missing ones come from ``labelled``.
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                bucket_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    'ai_stage_duration_seconds',
+    'Time spent in each stage of the AI pipeline.',
+    ('system', 'endpoint', 'stage'),
+    LATENCY_BUCKETS,
+)
+LLM_CALLS = Histogram(
+    'ai_llm_calls_per_answer',
+    'LLM round trips made to produce one answer.',
+    ('system', 'endpoint', 'mode'),
+    COUNT_BUCKETS,
+)
+AGENT_ITERATIONS = Histogram(
+    'ai_agent_iterations_per_answer',
+    'Reasoning steps the documentation analyst agent took for one answer.',
+    ('system', 'endpoint'),
+    COUNT_BUCKETS,
+)
+TOKENS = Histogram(
+    'ai_tokens_per_answer',
+    'Tokens used for one answer, by kind (context, prompt or completion).',
+    ('system', 'endpoint', 'kind'),
+    TOKEN_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'ai_cache_requests_total',
+    'Answer and semantic cache lookups, by result.',
+    ('system', 'endpoint', 'cache', 'result'),
+)
+PROVIDER_EVENTS = Counter(
+    'ai_provider_events_total',
+    'Failed, retried, hedged, timed out and circuit-breaker-rejected calls to the LLM provider.',
+    ('system', 'endpoint', 'operation', 'event'),
+)
+
+
+@contextmanager
+def timed(stage: str, **labels: str):
+    """
+    Time the enclosed code as a stage of the AI pipeline.
+
+    Args:
+        stage (str): The stage name, such as "retrieval", "embedding" or "llm".
+        **labels: Label values; missing ones come from ``labelled``.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, **labels)
+
+
+def render() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
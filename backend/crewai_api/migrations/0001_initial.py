@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSystem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('index_status', models.CharField(choices=[('PENDING', 'Pending'), ('INDEXING', 'Indexing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('index_error', models.TextField(blank=True, default='')),
+                ('indexed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SystemDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='documentation/')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('system', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='crewai_api.documentsystem')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# The systems that were hardcoded before the registry existed, with their
+# documents relative to MEDIA_ROOT
+SEED_SYSTEMS = [
+    ("system1", "DO THE WORK BOOK", ["system1_documentation.pdf", "system1_documentation2.pdf"]),
+    ("system2", "DJANGO REST FRAMEWORK BOOK", ["system2_documentation.pdf"]),
+]
+
+
+def seed_systems(apps, schema_editor):
+    DocumentSystem = apps.get_model('crewai_api', 'DocumentSystem')
+    SystemDocument = apps.get_model('crewai_api', 'SystemDocument')
+    for name, title, files in SEED_SYSTEMS:
+        system, created = DocumentSystem.objects.get_or_create(name=name, defaults={"title": title})
+        if created:
+            SystemDocument.objects.bulk_create([SystemDocument(system=system, file=file) for file in files])
+
+
+def remove_systems(apps, schema_editor):
+    DocumentSystem = apps.get_model('crewai_api', 'DocumentSystem')
+    DocumentSystem.objects.filter(name__in=[name for name, _, _ in SEED_SYSTEMS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crewai_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_systems, remove_systems),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crewai_api', '0002_seed_document_systems'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentsystem',
+            name='context_token_budget',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+
+class DocumentSystem(models.Model):
+    INDEX_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('INDEXING', 'Indexing'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+
+    name = models.SlugField(max_length=50, unique=True)
+    title = models.CharField(max_length=200)
+    is_active = models.BooleanField(default=True)
+    # Maximum tokens of documentation context per request; DOC_CONTEXT_TOKEN_BUDGET when empty
+    context_token_budget = models.PositiveIntegerField(null=True, blank=True)
+    index_status = models.CharField(max_length=10, choices=INDEX_STATUS_CHOICES, default='PENDING')
+    index_error = models.TextField(blank=True, default='')
+    indexed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+class SystemDocument(models.Model):
+    system = models.ForeignKey(DocumentSystem, on_delete=models.CASCADE, related_name='documents')
+    file = models.FileField(upload_to='documentation/')
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.file.name
@@ -0,0 +1,139 @@
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from .models import DocumentSystem
+
+# Registry snapshot shared by every thread of the process
+_registry: Dict = {"version": None, "checked_at": 0.0, "systems": {}}
+_lock = threading.Lock()
+
+
+def registry_version() -> Tuple:
+    """
+    Return a cheap fingerprint of the document system registry.
+
+    The fingerprint changes whenever a system is added, edited or removed, or
+    a document is uploaded or deleted, and costs a single aggregate query.
+
+    Returns:
+        tuple: The number of systems and documents and their latest changes.
+    """
+    result = DocumentSystem.objects.aggregate(
+        system_count=Count('id', distinct=True),
+        last_update=Max('updated_at'),
+        document_count=Count('documents', distinct=True),
+        last_document=Max('documents__id'),
+    )
+    return (result['system_count'], result['last_update'], result['document_count'], result['last_document'])
+
+
+def _load() -> Dict[str, Dict]:
+    systems: Dict[str, Dict] = {}
+    for system in DocumentSystem.objects.filter(is_active=True).prefetch_related('documents').order_by('name'):
+        systems[system.name] = {
+            "title": system.title,
+            "context_token_budget": system.context_token_budget or settings.DOC_CONTEXT_TOKEN_BUDGET,
+            "documents": [Path(document.file.path) for document in system.documents.order_by('id')],
+        }
+    return systems
+
+
+def get_systems() -> Dict[str, Dict]:
+    """
+    Return the active document systems.
+
+    The registry is loaded once per process and reloaded when its version
+    changes. The version is checked at most every ``DOC_REGISTRY_CHECK_INTERVAL``
+    seconds, so workers pick up new or changed systems without a restart.
+
+    Returns:
+        dict: Each system's title, context token budget and document paths, keyed by system name.
+    """
+    now = time.monotonic()
+    if now - _registry["checked_at"] < settings.DOC_REGISTRY_CHECK_INTERVAL:
+        return _registry["systems"]
+
+    with _lock:
+        if now - _registry["checked_at"] < settings.DOC_REGISTRY_CHECK_INTERVAL:
+            return _registry["systems"]
+        version = registry_version()
+        if version != _registry["version"]:
+            _registry["systems"] = _load()
+            _registry["version"] = version
+        _registry["checked_at"] = time.monotonic()
+        return _registry["systems"]
+
+
+def get_system(name: str) -> Optional[Dict]:
+    """
+    Return an active document system by name.
+
+    Args:
+        name (str): The system name.
+
+    Returns:
+        Optional[dict]: The system's title and document paths, or None if there is no such system.
+    """
+    return get_systems().get(name)
+
+
+def system_names() -> List[str]:
+    """
+    Return the names of the active document systems.
+
+    Returns:
+        List[str]: The system names.
+    """
+    return list(get_systems().keys())
+
+
+def invalidate() -> None:
+    """Force the next registry read in this process to check the version."""
+    _registry["checked_at"] = 0.0
+
+
+def index_system(system_id: int) -> None:
+    """
+    Bring a document system's index in line with its documents.
+
+    Only new or changed pages are embedded, so this is cheap for systems
+    that are already indexed.
+
+    Args:
+        system_id (int): The ID of the document system to index.
+    """
+    from .doc_index import build_index
+
+    close_old_connections()
+    try:
+        system = DocumentSystem.objects.get(id=system_id)
+        # Status updates go through update() so they do not bump the registry version
+        DocumentSystem.objects.filter(id=system_id).update(index_status='INDEXING', index_error='')
+        paths = [Path(document.file.path) for document in system.documents.all()]
+        build_index(system.name, [path for path in paths if path.exists()])
+        DocumentSystem.objects.filter(id=system_id).update(index_status='READY', indexed_at=timezone.now())
+    except DocumentSystem.DoesNotExist:
+        pass
+    except Exception as e:
+        print(f"Error indexing document system {system_id}: {e}")
+        DocumentSystem.objects.filter(id=system_id).update(index_status='FAILED', index_error=str(e))
+    finally:
+        close_old_connections()
+
+
+def schedule_index(system: DocumentSystem) -> None:
+    """
+    Index a document system in the background once the current transaction commits.
+
+    Args:
+        system (DocumentSystem): The document system to index.
+    """
+    invalidate()
+    transaction.on_commit(lambda: threading.Thread(
+        target=index_system, args=(system.id,), name=f"index-{system.name}", daemon=True
+    ).start())
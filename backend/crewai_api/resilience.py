@@ -0,0 +1,398 @@
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, TypeVar
+from django.conf import settings
+from . import metrics
+
+T = TypeVar('T')
+
+# Successful call latencies kept per operation to estimate its p95
+LATENCY_WINDOW = 200
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Set while the current context runs under a call the breaker let through, so
+# the provider calls nested in it, such as the searches of an agent run, are
+# not refused while that call is the half-open trial
+_admitted: contextvars.ContextVar[bool] = contextvars.ContextVar('resilience_admitted', default=False)
+
+
+class ProviderUnavailable(Exception):
+    """
+    Raised when the LLM provider is unhealthy: the circuit breaker is open,
+    or a call kept failing with transient errors until its retries or
+    deadline ran out.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider after consecutive failures.
+
+    After ``failure_threshold`` transient failures in a row the breaker
+    opens and calls fail immediately. Once ``reset_timeout`` seconds have
+    passed, one trial call is let through: success closes the breaker,
+    failure opens it again. A trial that ends without telling either way is
+    released, and one that is never settled is given up on after
+    ``trial_timeout`` seconds, so the breaker cannot stay half-open.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, trial_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout or reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+        self._trial_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go to the provider.
+
+        Returns:
+            bool: True if the breaker is closed, or if this call is the half-open trial.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self._retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_started = time.monotonic()
+            self._trial_thread = threading.get_ident()
+            return True
+
+    def retry_after(self) -> float:
+        """
+        Return how long until the provider will be tried again.
+
+        Returns:
+            float: Seconds until the breaker lets a trial call through, or 0 if it is
+            closed or a trial may start now. While a trial is in flight this is the
+            time left before it is given up on.
+        """
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self) -> float:
+        if self.state == self.CLOSED:
+            return 0.0
+        if self.state == self.HALF_OPEN:
+            return max(0.0, self.trial_timeout - (time.monotonic() - self._trial_started))
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def release(self) -> None:
+        """
+        End the calling thread's trial without judging the provider, for
+        instance after an invalid request, so the next call becomes the trial.
+        Does nothing unless this thread holds the half-open trial.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_thread == threading.get_ident():
+                self.state = self.OPEN
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self) -> None:
+        """Count a transient failure, opening the breaker at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful call latencies of one operation."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record the latency of a successful call.
+
+        Args:
+            seconds (float): The call latency.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """
+        Return the 95th percentile latency.
+
+        Returns:
+            Optional[float]: The p95 in seconds, or None until ``LLM_HEDGE_MIN_SAMPLES`` calls were seen.
+        """
+        with self._lock:
+            if len(self._samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+_breaker: Optional[CircuitBreaker] = None
+_latencies: Dict[str, LatencyTracker] = {}
+
+
+def get_breaker() -> CircuitBreaker:
+    """
+    Return the circuit breaker shared by every call to the LLM provider.
+
+    Returns:
+        CircuitBreaker: The breaker, configured by ``LLM_BREAKER_FAILURES`` and ``LLM_BREAKER_RESET``.
+    """
+    global _breaker
+    if _breaker is None:
+        with _executor_lock:
+            if _breaker is None:
+                # A trial call may legitimately run until the call or agent deadline
+                _breaker = CircuitBreaker(
+                    settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET,
+                    max(settings.LLM_BREAKER_RESET, settings.LLM_DEADLINE, settings.LLM_AGENT_DEADLINE),
+                )
+    return _breaker
+
+
+def _latency(operation: str) -> LatencyTracker:
+    return _latencies.setdefault(operation, LatencyTracker())
+
+
+def _admit(breaker: CircuitBreaker, operation: str) -> bool:
+    """
+    Let a call through the breaker, or raise if it is open.
+
+    Returns:
+        bool: True if the call is nested in one already let through, and so must not settle the breaker's trial.
+    """
+    if _admitted.get():
+        return True
+    if not breaker.allow():
+        metrics.PROVIDER_EVENTS.inc(operation=operation, event='rejected')
+        raise ProviderUnavailable("The AI provider is temporarily unavailable", breaker.retry_after())
+    return False
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.LLM_HEDGE_MAX_WORKERS, thread_name_prefix='ai-hedge')
+    return _executor
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Check whether an error is worth retrying: timeouts, connection errors,
+    rate limits and server errors.
+
+    Args:
+        error (BaseException): The error raised by a provider call.
+
+    Returns:
+        bool: True if the call may succeed when retried.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import httpx
+        import openai
+    except ImportError:
+        pass
+    else:
+        if isinstance(error, (httpx.TransportError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+            return True
+    status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def backoff(attempt: int) -> float:
+    """
+    Return the delay before a retry, with full jitter.
+
+    Args:
+        attempt (int): The number of attempts made so far, starting at 1.
+
+    Returns:
+        float: A random delay between 0 and ``LLM_BACKOFF_BASE * 2 ** (attempt - 1)``, capped at ``LLM_BACKOFF_MAX``.
+    """
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def _attempt(operation: str, fn: Callable[[float], T], timeout: float) -> T:
+    """Make one attempt, hedging it with a duplicate request once it passes the operation's p95."""
+    hedge_after = _latency(operation).p95() if settings.LLM_HEDGE_ENABLED else None
+    if hedge_after is None or hedge_after >= timeout:
+        return fn(timeout)
+
+    executor = _get_executor()
+    deadline = time.monotonic() + timeout
+    # Copy the context per request so metric labels follow both into the pool
+    pending = {executor.submit(contextvars.copy_context().run, fn, timeout)}
+    done, _ = wait(pending, timeout=hedge_after)
+    if not done:
+        metrics.PROVIDER_EVENTS.inc(operation=operation, event='hedged')
+        pending.add(executor.submit(contextvars.copy_context().run, fn, timeout - hedge_after))
+
+    error: BaseException = TimeoutError(f"{operation} call timed out after {timeout:.1f}s")
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                for loser in pending:
+                    loser.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def call(operation: str, fn: Callable[[float], T]) -> T:
+    """
+    Call the LLM provider with a deadline, retries and the circuit breaker.
+
+    Each attempt is given at most ``LLM_TIMEOUT`` seconds and all attempts
+    together at most ``LLM_DEADLINE``. Transient errors are retried up to
+    ``LLM_MAX_RETRIES`` times with jittered exponential backoff; other
+    errors, such as invalid requests, are raised immediately. With
+    ``LLM_HEDGE_ENABLED``, an attempt still running past the operation's
+    p95 latency gets a duplicate request and the first response wins.
+
+    Args:
+        operation (str): The kind of call, such as "chat" or "embedding", whose latencies are tracked together.
+        fn (Callable[[float], T]): Makes the request, given the timeout in seconds for this attempt.
+
+    Returns:
+        The return value of ``fn``.
+
+    Raises:
+        ProviderUnavailable: If the breaker is open or every attempt failed with a transient error.
+    """
+    breaker = get_breaker()
+    nested = _admit(breaker, operation)
+    token = _admitted.set(True)
+
+    deadline = time.monotonic() + settings.LLM_DEADLINE
+    error: Optional[BaseException] = None
+    try:
+        for attempt in range(1, settings.LLM_MAX_RETRIES + 2):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            started = time.monotonic()
+            try:
+                result = _attempt(operation, fn, min(settings.LLM_TIMEOUT, remaining))
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                error = e
+                metrics.PROVIDER_EVENTS.inc(operation=operation, event='failed')
+                breaker.record_failure()
+                if breaker.state == CircuitBreaker.OPEN or attempt > settings.LLM_MAX_RETRIES:
+                    break
+                metrics.PROVIDER_EVENTS.inc(operation=operation, event='retried')
+                time.sleep(min(backoff(attempt), max(0.0, deadline - time.monotonic())))
+                continue
+            breaker.record_success()
+            _latency(operation).observe(time.monotonic() - started)
+            return result
+    finally:
+        _admitted.reset(token)
+        if not nested:
+            # Settle a trial that ended on a non-transient error or was interrupted
+            breaker.release()
+
+    raise ProviderUnavailable(f"The AI provider is unavailable: {error or 'deadline exceeded'}", breaker.retry_after())
+
+
+@contextmanager
+def guarded(operation: str):
+    """
+    Run provider calls that manage their own timeouts and retries, such as
+    an agent run, under the circuit breaker.
+
+    Calls made through ``call`` inside the block are part of the guarded
+    call: they are let through even while it is the half-open trial, and
+    their outcomes count towards the breaker as usual.
+
+    Args:
+        operation (str): The kind of call, used in metrics.
+
+    Raises:
+        ProviderUnavailable: If the breaker is open or the enclosed code failed with a transient error.
+    """
+    breaker = get_breaker()
+    nested = _admit(breaker, operation)
+    token = _admitted.set(True)
+    try:
+        yield
+    except ProviderUnavailable:
+        # A nested call already counted its failures
+        raise
+    except Exception as e:
+        if not is_transient(e):
+            raise
+        metrics.PROVIDER_EVENTS.inc(operation=operation, event='failed')
+        breaker.record_failure()
+        raise ProviderUnavailable(f"The AI provider is unavailable: {e}", breaker.retry_after()) from e
+    else:
+        breaker.record_success()
+    finally:
+        _admitted.reset(token)
+        if not nested:
+            # Settle a trial that ended on a non-transient error or was interrupted
+            breaker.release()
+
+
+def run_with_deadline(operation: str, fn: Callable[[], T], seconds: float) -> T:
+    """
+    Wait at most ``seconds`` for a blocking call that has no overall timeout
+    of its own, such as an agent run made of many provider calls.
+
+    The call runs on the hedging pool and keeps running there if it is
+    given up on, until its own per-request timeouts end it.
+
+    Args:
+        operation (str): The kind of call, used in metrics.
+        fn (Callable[[], T]): The call to make.
+        seconds (float): How long to wait for it.
+
+    Returns:
+        The return value of ``fn``.
+
+    Raises:
+        TimeoutError: If the call did not finish in time.
+    """
+    future = _get_executor().submit(contextvars.copy_context().run, fn)
+    done, _ = wait([future], timeout=seconds)
+    if not done:
+        future.cancel()
+        metrics.PROVIDER_EVENTS.inc(operation=operation, event='timed_out')
+        raise TimeoutError(f"{operation} call did not finish within {seconds:.0f}s")
+    return future.result()
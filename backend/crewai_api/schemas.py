@@ -0,0 +1,43 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class SystemDocumentOut(BaseModel):
+    id: int
+    file: str
+    uploaded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentSystemOut(BaseModel):
+    id: int
+    name: str
+    title: str
+    is_active: bool
+    context_token_budget: Optional[int]
+    index_status: str
+    index_error: str
+    indexed_at: Optional[datetime]
+    updated_at: datetime
+    documents: List[SystemDocumentOut]
+
+    @classmethod
+    def from_system(cls, system):
+        return cls(
+            id=system.id,
+            name=system.name,
+            title=system.title,
+            is_active=system.is_active,
+            context_token_budget=system.context_token_budget,
+            index_status=system.index_status,
+            index_error=system.index_error,
+            indexed_at=system.indexed_at,
+            updated_at=system.updated_at,
+            documents=[
+                SystemDocumentOut(id=document.id, file=document.file.name, uploaded_at=document.uploaded_at)
+                for document in system.documents.all()
+            ],
+        )
@@ -0,0 +1,101 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from django.conf import settings
+from . import answer_cache
+
+
+class _SystemCache:
+    """Previously answered prompts for one system, stored as a matrix of embeddings."""
+
+    def __init__(self, version: str, capacity: int, dim: int):
+        self.version = version
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.answers: List[Optional[str]] = [None] * capacity
+        self.size = 0
+
+
+# Stored answers per (system, answer mode)
+_caches: Dict[Tuple[str, str], _SystemCache] = {}
+_lock = threading.Lock()
+_clock = 0
+
+
+def _tick() -> int:
+    global _clock
+    _clock += 1
+    return _clock
+
+
+def _get(system: str, mode: str, version: str, dim: int) -> _SystemCache:
+    """Return the cache for a system and mode, dropping it if the document index version changed."""
+    cache = _caches.get((system, mode))
+    if cache is None or cache.version != version or cache.vectors.shape[1] != dim:
+        cache = _caches[(system, mode)] = _SystemCache(version, settings.SEMANTIC_CACHE_MAX_ENTRIES, dim)
+    return cache
+
+
+def lookup(system: str, version: str, vector: np.ndarray, mode: str = "agent") -> Optional[str]:
+    """
+    Find the stored answer whose prompt is most similar to the given one.
+
+    Args:
+        system (str): The system name.
+        version (str): The version of the system's document index.
+        vector (np.ndarray): The normalized embedding of the prompt.
+        mode (str): The answer mode, "agent" or "fast".
+
+    Returns:
+        Optional[str]: The stored answer if its similarity reaches the threshold, otherwise None.
+    """
+    with _lock:
+        cache = _get(system, mode, version, vector.shape[0])
+        if cache.size == 0:
+            answer_cache.record(system, "semantic_misses")
+            return None
+
+        similarities = cache.vectors[:cache.size] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < settings.SEMANTIC_CACHE_THRESHOLD:
+            answer_cache.record(system, "semantic_misses")
+            return None
+
+        cache.last_used[best] = _tick()
+        answer_cache.record(system, "semantic_hits")
+        return cache.answers[best]
+
+
+def store(system: str, version: str, vector: np.ndarray, answer: str, mode: str = "agent") -> None:
+    """
+    Remember an answer, evicting the least recently used entry when full.
+
+    Args:
+        system (str): The system name.
+        version (str): The version of the system's document index.
+        vector (np.ndarray): The normalized embedding of the prompt.
+        answer (str): The answer to store.
+        mode (str): The answer mode, "agent" or "fast".
+    """
+    with _lock:
+        cache = _get(system, mode, version, vector.shape[0])
+        if cache.size < len(cache.answers):
+            slot = cache.size
+            cache.size += 1
+        else:
+            slot = int(np.argmin(cache.last_used))
+        cache.vectors[slot] = vector
+        cache.answers[slot] = answer
+        cache.last_used[slot] = _tick()
+
+
+def invalidate(system: str) -> None:
+    """
+    Drop every stored answer for a system.
+
+    Args:
+        system (str): The system name.
+    """
+    with _lock:
+        for key in [key for key in _caches if key[0] == system]:
+            del _caches[key]
@@ -0,0 +1,165 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict
+from asgiref.sync import sync_to_async
+from langchain_core.callbacks import BaseCallbackHandler
+from . import answer_cache, metrics
+from .concurrency import run_llm_call
+from .crewai_setup import build_llm, generate_answer, get_documents
+from .doc_index import index_version
+
+# Marker the ReAct agent writes before its final answer
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Seconds between keep-alive events while the agent is thinking
+HEARTBEAT_INTERVAL = 10
+
+_DONE = object()
+
+
+class _TokenHandler(BaseCallbackHandler):
+    """Forward the agent's final answer tokens as events."""
+
+    def __init__(self, emit: Callable[[Dict[str, Any]], None]):
+        self.emit = emit
+        self.buffer = ""
+        self.answering = False
+        # Whether the model was called, rather than the answer coming from a cache
+        self.called = False
+
+    def on_llm_start(self, *args, **kwargs) -> None:
+        self.buffer = ""
+        self.answering = False
+        self.called = True
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if self.answering:
+            self.emit({"type": "token", "text": token})
+            return
+
+        self.buffer += token
+        if FINAL_ANSWER_MARKER in self.buffer:
+            self.answering = True
+            rest = self.buffer.split(FINAL_ANSWER_MARKER, 1)[1].lstrip()
+            if rest:
+                self.emit({"type": "token", "text": rest})
+
+
+def _describe_step(step: Any) -> Dict[str, Any]:
+    """
+    Convert an intermediate agent step into a JSON-serializable event.
+
+    Args:
+        step: An agent action, a list of (action, observation) pairs, or the agent's finish.
+
+    Returns:
+        dict: The step event.
+    """
+    if isinstance(step, list):
+        return {
+            "type": "step",
+            "actions": [
+                {
+                    "tool": getattr(action, "tool", None),
+                    "input": str(getattr(action, "tool_input", "")),
+                    "observation": str(observation)[:500],
+                }
+                for action, observation in step
+            ],
+        }
+    return {"type": "step", "log": str(getattr(step, "log", step))[:500]}
+
+
+def stream_answer(system: str, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Answer a prompt, yielding events as the agent works.
+
+    The system is validated before the stream starts. The stream yields a
+    ``start`` event immediately, followed by ``step`` events for
+    intermediate agent steps, ``token`` events for final answer tokens, and
+    one ``answer`` event with the full answer (or an ``error`` event).
+    Cached answers, paraphrases served by the semantic cache and answers
+    shared with a concurrent identical request are returned as a single
+    ``answer`` event. The crew runs under the same concurrency limits and
+    caches as the other AI endpoints.
+
+    Args:
+        system (str): The system name to use for processing the prompt.
+        prompt (str): The prompt or question to process.
+
+    Returns:
+        AsyncIterator[dict]: The stream events.
+
+    Raises:
+        ValueError: If the system is not valid.
+        FileNotFoundError: If the PDF file for the system does not exist.
+    """
+    return _events(system, prompt, index_version(system, get_documents(system)))
+
+
+def _run_crew(system: str, prompt: str, emit: Callable[[Dict[str, Any]], None]) -> None:
+    """Answer through the caches, running the crew with streaming callbacks on a miss."""
+    handler = _TokenHandler(emit)
+    try:
+        llm = build_llm(streaming=True, callbacks=[handler])
+        with metrics.labelled(endpoint="ask_stream", system=system):
+            answer = generate_answer(system, prompt, llm=llm, step_callback=lambda step: emit(_describe_step(step)))
+        emit({"type": "answer", "text": answer, "cached": not handler.called})
+    except Exception as e:
+        print(f"Error streaming prompt: {e}")
+        emit({"type": "error", "error": f"An error occurred while processing your request: {str(e)}"})
+
+
+async def _events(system: str, prompt: str, version: str) -> AsyncIterator[Dict[str, Any]]:
+    yield {"type": "start", "system": system}
+
+    # The cache backend may be the database, which needs a synchronous context
+    cached = await sync_to_async(answer_cache.peek)(system, prompt, version)
+    if cached is not None:
+        yield {"type": "answer", "text": cached, "cached": True}
+        return
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: Dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    task = asyncio.ensure_future(run_llm_call(system, _run_crew, system, prompt, emit))
+    task.add_done_callback(lambda _: events.put_nowait(_DONE))
+
+    while True:
+        try:
+            event = await asyncio.wait_for(events.get(), HEARTBEAT_INTERVAL)
+        except asyncio.TimeoutError:
+            yield {"type": "heartbeat"}
+            continue
+        if event is _DONE:
+            return
+        yield event
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Format an event as a Server-Sent Event.
+
+    Args:
+        event (dict): The event to format.
+
+    Returns:
+        str: The SSE frame.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def format_ndjson(event: Dict[str, Any]) -> str:
+    """
+    Format an event as one line of newline-delimited JSON.
+
+    Args:
+        event (dict): The event to format.
+
+    Returns:
+        str: The JSON line.
+    """
+    return json.dumps(event) + "\n"
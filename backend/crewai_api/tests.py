@@ -1,3 +1,868 @@
-from django.test import TestCase
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+from authentication.models import Token
+from . import answer_cache, context, ingest, registry, resilience, semantic_cache
+from .doc_index import index_dir, reciprocal_rank_fusion, search_chunks
+from .keyword_index import KeywordIndex, tokenize
+from .models import DocumentSystem, SystemDocument
+from .vector_store import CURRENT_FILE, NumpyStore
 
-# Create your tests here.
+
+class FakeLLM:
+    """Stands in for the chat model, streaming a ReAct completion to its callback handlers."""
+
+    def __init__(self, streaming: bool = False, callbacks=None):
+        self.callbacks = callbacks or []
+
+    def complete(self, text: str) -> None:
+        for handler in self.callbacks:
+            handler.on_llm_start()
+            for token in text.split(' '):
+                handler.on_llm_new_token(token + ' ')
+
+
+class FakeCrew:
+    """Stands in for ``run_crew``, counting the crew runs and answering every prompt the same way."""
+
+    answer = "Use the reset link"
+
+    def __init__(self):
+        self.runs = 0
+
+    def __call__(self, system, prompt, llm=None, step_callback=None):
+        self.runs += 1
+        if step_callback is not None:
+            step_callback([(SimpleNamespace(tool="Search the documentation", tool_input="reset password"), "Reset links expire")])
+        (llm or FakeLLM()).complete(f"Thought: I know the answer Final Answer: {self.answer}")
+        return self.answer
+
+
+def fake_embed(texts):
+    """Embed texts as normalized counts of their lowercase words, so rewordings of a prompt stay close."""
+    vocabulary = ["reset", "password", "my", "how", "do", "i", "can", "printer", "offline"]
+    vectors = np.array(
+        [[text.lower().rstrip('?').split().count(word) for word in vocabulary] for text in texts], dtype=np.float32
+    )
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def make_pdf(path: Path, pages) -> None:
+    """
+    Write a PDF with one line of text per page. Every page draws its text
+    through a form XObject with the same content stream, so only the
+    resources tell the pages apart.
+    """
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for text in pages:
+        page = writer.add_blank_page(612, 792)
+        form = DecodedStreamObject()
+        form.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        form.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(612), NumberObject(792)]),
+            NameObject('/Resources'): DictionaryObject({NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})}),
+        })
+        contents = DecodedStreamObject()
+        contents.set_data(b"/Fm0 Do")
+        page[NameObject('/Contents')] = writer._add_object(contents)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/XObject'): DictionaryObject({NameObject('/Fm0'): writer._add_object(form)}),
+        })
+    writer.write(path)
+
+
+class WordEncoding:
+    """Stands in for the tiktoken encoding, one token per word with its leading whitespace, and needs no download."""
+
+    def encode(self, text: str, disallowed_special=()):
+        return re.findall(r'\s*\S+|\s+$', text)
+
+    def decode(self, tokens) -> str:
+        return "".join(tokens)
+
+
+class FakeProviderMixin:
+    """Patch the document lookups, embeddings and crew of ``system1`` with local fakes and empty the caches."""
+
+    def setUp(self):
+        super().setUp()
+        caches[settings.ANSWER_CACHE_ALIAS].clear()
+        semantic_cache.invalidate('system1')
+        self.crew = FakeCrew()
+        for target, value in (
+            ('crewai_api.crewai_setup.run_crew', self.crew),
+            ('crewai_api.crewai_setup.embed_texts', fake_embed),
+            ('crewai_api.crewai_setup.get_documents', lambda system: []),
+            ('crewai_api.crewai_setup.index_version', lambda system, documents: 'v1'),
+            ('crewai_api.streaming.get_documents', lambda system: []),
+            ('crewai_api.streaming.index_version', lambda system, documents: 'v1'),
+            ('crewai_api.streaming.build_llm', FakeLLM),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class NumpyStoreTests(SimpleTestCase):
+    """The NumPy store swaps whole versions of its files and searches them exactly or by IVF."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.store = NumpyStore(self.directory, 'system1')
+        self.vectors = np.eye(4, dtype=np.float32)
+        self.store.add(['a', 'b', 'c', 'd'], ['alpha', 'beta', 'gamma', 'delta'], [{}] * 4, self.vectors)
+
+    def test_delete_switches_to_a_complete_new_version(self):
+        before = self.store.version_dir
+        self.store.delete(['b'])
+        self.assertEqual((self.directory / CURRENT_FILE).read_text(), self.store.version_dir.name)
+        self.assertNotEqual(self.store.version_dir, before)
+        self.assertFalse((before / 'table.bin').exists())
+
+        reopened = NumpyStore(self.directory, 'system1')
+        self.assertEqual(reopened.ids(), ['a', 'c', 'd'])
+        self.assertEqual(reopened.texts(['d', 'a']), ['delta', 'alpha'])
+        self.assertEqual(reopened.search(self.vectors[2], 1)[0][:2], ('c', 'gamma'))
+
+        reopened.delete(['a'])
+        reopened.add(['e'], ['epsilon'], [{}], self.vectors[:1])
+        self.assertEqual(NumpyStore(self.directory, 'system1').ids(), ['c', 'd', 'e'])
+
+    def test_reset_removes_every_chunk(self):
+        self.store.reset()
+        self.assertEqual(NumpyStore(self.directory, 'system1').ids(), [])
+        self.assertEqual(self.store.search(self.vectors[0], 3), [])
+
+    @override_settings(DOC_NUMPY_IVF_NPROBE=1)
+    def test_ivf_search_of_empty_clusters_finds_nothing(self):
+        # Every row is in the second cluster, and the query is closest to the first
+        centroids = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float32)
+        self.store.ivf = (centroids, np.arange(4, dtype=np.int32), np.array([0, 0, 4]))
+        self.assertEqual(self.store.search(self.vectors[0], 2), [])
+        self.assertEqual([chunk_id for chunk_id, _, _ in self.store.search(self.vectors[1], 2)][0], 'b')
+
+
+@override_settings(DOC_DEDUPE_THRESHOLD=0.8)
+@mock.patch('crewai_api.context._encoding', WordEncoding())
+class ContextBudgetTests(SimpleTestCase):
+    """Documentation context and ticket descriptions never exceed their token budgets, and repeats are dropped."""
+
+    chunks = [
+        "Reset links expire after an hour. Request a new link from the sign in page.",
+        "Printers go offline when idle. " * 6,
+        "Reset links expire after an hour. Request a new link from the sign in page!",
+        "Error E1045 means the disk is full.",
+        "Reset links expire after one hour. Request another link from the sign in page.",
+    ]
+
+    def test_near_duplicates_are_dropped_in_rank_order(self):
+        self.assertEqual(context.dedupe_chunks(self.chunks), [self.chunks[0], self.chunks[1], self.chunks[3], self.chunks[4]])
+        # The less relevant copy is the one dropped
+        self.assertEqual(context.dedupe_chunks(self.chunks[2::-2]), [self.chunks[2]])
+
+    def test_chunks_seen_by_an_earlier_search_are_dropped(self):
+        seen = []
+        self.assertEqual(context.dedupe_chunks(self.chunks[:2], seen), self.chunks[:2])
+        self.assertEqual(context.dedupe_chunks(self.chunks[2:4], seen), [self.chunks[3]])
+
+    def test_packing_never_exceeds_the_budget(self):
+        separator = context.count_tokens(context.CHUNK_SEPARATOR)
+        for budget in range(0, 80):
+            packed, used = context.pack_chunks(self.chunks, budget)
+            self.assertLessEqual(used, budget)
+            self.assertEqual(used, sum(map(context.count_tokens, packed)) + separator * max(len(packed) - 1, 0))
+            text, tokens = context.build_context(self.chunks, budget)
+            self.assertLessEqual(context.count_tokens(text), budget)
+
+    def test_packing_skips_chunks_that_do_not_fit(self):
+        budget = context.count_tokens(self.chunks[0]) + context.count_tokens(context.CHUNK_SEPARATOR) + context.count_tokens(self.chunks[3])
+        packed, used = context.pack_chunks(self.chunks, budget)
+        self.assertEqual(packed, [self.chunks[0], self.chunks[3]])
+        self.assertEqual(used, budget)
+
+    def test_truncation_never_exceeds_the_budget(self):
+        description = "\n".join(
+            ["The printer in room 4 stopped printing this morning."]
+            + ["ERROR spooler: job 17 failed"] * 20
+            + [f"Step {number}: I restarted the printer and checked the cable." for number in range(20)]
+            + ["The last error was E1045, disk full."]
+        )
+        for budget in (5, 10, 25, 50, 100, 1000):
+            truncated = context.truncate_text(description, budget)
+            self.assertLessEqual(context.count_tokens(truncated), budget)
+        self.assertEqual(context.truncate_text("Printer offline.", 10), "Printer offline.")
+
+    def test_truncation_keeps_the_opening_and_the_latest_details(self):
+        description = " ".join(
+            ["The printer in room 4 stopped printing."]
+            + [f"Step {number}: I checked the cable again." for number in range(30)]
+            + ["The last error was E1045."]
+        )
+        truncated = context.truncate_text(description, 40)
+        self.assertTrue(truncated.startswith("The printer in room 4 stopped printing."))
+        self.assertTrue(truncated.endswith("The last error was E1045."))
+        self.assertIn(context.ELLIPSIS.strip(), truncated)
+        # Repeated log lines are collapsed before anything is cut
+        self.assertEqual(context.truncate_text("Jam\nJam\nJam\nJam\nJam\nJam", 2), "Jam")
+
+
+class KeywordSearchTests(SimpleTestCase):
+    """BM25 finds exact identifiers, and fusing it with vector search keeps them in the results."""
+
+    chunks = {
+        'reset': "Reset links expire after an hour, so request a new reset link",
+        'printer': "Printers go offline when idle and reconnect after a restart",
+        'serializer': "A ModelSerializer maps model fields to serializer fields",
+        'error': "Error E1045 means the disk is full",
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.keywords = KeywordIndex(self.directory / 'keywords.json')
+        self.keywords.add(self.chunks.keys(), self.chunks.values())
+
+    def test_identifiers_are_kept_whole_and_split(self):
+        self.assertEqual(tokenize("The ModelSerializer of rest_framework.views"), [
+            'modelserializer', 'model', 'serializer', 'rest_framework.views', 'rest', 'framework', 'views',
+        ])
+
+    def test_exact_error_codes_and_class_names_are_found(self):
+        self.assertEqual(self.keywords.search("What does E1045 mean?", 4)[0][0], 'error')
+        self.assertEqual(self.keywords.search("How do I use a model serializer?", 4)[0][0], 'serializer')
+        self.assertEqual(self.keywords.search("kubernetes", 4), [])
+
+    def test_repeated_terms_score_higher_but_rare_terms_weigh_more(self):
+        self.keywords.add(['reset_once'], ["Reset the password from the settings page"])
+        ranked = [chunk_id for chunk_id, _ in self.keywords.search("reset link", 5)]
+        self.assertEqual(ranked[:2], ['reset', 'reset_once'])
+        scores = dict(self.keywords.search("offline disk", 5))
+        self.assertEqual(set(scores), {'printer', 'error'})
+
+    def test_index_survives_a_reload(self):
+        self.keywords.save()
+        reloaded = KeywordIndex(self.directory / 'keywords.json')
+        self.assertEqual(reloaded.search("E1045", 1), self.keywords.search("E1045", 1))
+        reloaded.delete(['error'])
+        self.assertEqual(reloaded.search("E1045", 1), [])
+
+    def test_fusion_favours_chunks_ranked_by_both_retrievers(self):
+        fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['c', 'd']], k=60)
+        self.assertEqual(fused, ['c', 'a', 'b', 'd'])
+
+    def test_hybrid_search_recalls_exact_terms_that_vector_search_misses(self):
+        store = NumpyStore(self.directory / 'store', 'system1')
+        store.add(list(self.chunks), list(self.chunks.values()), [{}] * 4, np.eye(4, dtype=np.float32))
+        # The query embeds closest to the printer chunk, and the error chunk comes last
+        query = np.array([0.2, 1, 0.1, 0.05], dtype=np.float32)
+        query /= np.linalg.norm(query)
+        for target, value in (
+            ('crewai_api.doc_index.get_index', lambda system, paths: (store, self.keywords)),
+            ('crewai_api.doc_index.embed_texts', lambda texts: query[None, :]),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with self.settings(DOC_SEARCH_MODE='vector'):
+            self.assertNotIn(self.chunks['error'], search_chunks('system1', [], "What does E1045 mean?", 2))
+        with self.settings(DOC_SEARCH_MODE='hybrid', DOC_HYBRID_CANDIDATES=4, DOC_RRF_K=60):
+            self.assertEqual(
+                search_chunks('system1', [], "What does E1045 mean?", 2), [self.chunks['error'], self.chunks['printer']]
+            )
+
+
+@override_settings(DOC_CHUNK_SIZE=1000)
+class IngestTests(SimpleTestCase):
+    """Re-ingesting a document embeds only the pages that changed and removes the chunks of the old ones."""
+
+    pages = ["Reset links expire after an hour", "Printers go offline when idle", "Error E1045 means the disk is full"]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.pdf = self.directory / 'guide.pdf'
+        self.store = NumpyStore(self.directory / 'store', 'system1')
+        self.keywords = KeywordIndex(self.directory / 'keywords.json')
+        self.embedded = []
+
+        def embed(texts):
+            self.embedded.extend(texts)
+            return fake_embed(texts)
+
+        patcher = mock.patch('crewai_api.ingest.embed_texts', embed)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _sync(self, pages, digest):
+        make_pdf(self.pdf, pages)
+        return ingest.sync(self.store, self.directory / 'manifest.json', [(self.pdf, digest)], digest, keywords=self.keywords)
+
+    def test_pages_sharing_a_content_stream_are_indexed_separately(self):
+        self._sync(self.pages, 'v1')
+        self.assertEqual(sorted(self.store.texts(self.store.ids())), sorted(self.pages))
+
+    def test_only_the_edited_page_is_re_embedded(self):
+        self._sync(self.pages, 'v1')
+        self.embedded.clear()
+        edited = [self.pages[0], "Printers reconnect after a restart", self.pages[2]]
+
+        stats = self._sync(edited, 'v2')
+
+        self.assertEqual(self.embedded, ["Printers reconnect after a restart"])
+        self.assertEqual(stats, {"added": 1, "removed": 1, "chunks": 3})
+        self.assertEqual(set(self.store.ids()), {ingest.chunk_id(text) for text in edited})
+        self.assertEqual(set(self.keywords.ids()), {ingest.chunk_id(text) for text in edited})
+
+    def test_unchanged_document_is_skipped(self):
+        self._sync(self.pages, 'v1')
+        self.embedded.clear()
+        self.assertEqual(self._sync(self.pages, 'v1'), {"added": 0, "removed": 0, "chunks": 3})
+        self.assertEqual(self.embedded, [])
+
+
+@override_settings(DOC_REGISTRY_CHECK_INTERVAL=60)
+@mock.patch('crewai_api.registry.close_old_connections')
+class DocumentRegistryTests(TestCase):
+    """Uploaded systems are validated, indexed in the background and picked up by running workers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Start without the systems seeded by the migrations
+        DocumentSystem.objects.all().delete()
+        admin = User.objects.create_superuser(username='admin', password='password')
+        Token.objects.create(user=admin, key='a' * 40)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        paths = self.settings(MEDIA_ROOT=str(self.directory / 'media'), DOC_INDEX_ROOT=str(self.directory / 'index'))
+        paths.enable()
+        self.addCleanup(paths.disable)
+        patcher = mock.patch.dict(registry._registry, {"version": None, "checked_at": 0.0, "systems": {}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        make_pdf(self.directory / 'guide.pdf', ["Reset links expire after an hour"])
+        self.pdf = (self.directory / 'guide.pdf').read_bytes()
+
+    def _upload(self, name, content=None, filename='guide.pdf'):
+        return self.client.post(
+            '/api/crewai/systems',
+            {"name": name, "title": "Guide", "files": SimpleUploadedFile(filename, content or self.pdf)},
+            HTTP_AUTHORIZATION=f'Bearer {"a" * 40}',
+        )
+
+    def test_version_changes_with_systems_and_documents(self, close_old_connections):
+        empty = registry.registry_version()
+        system = DocumentSystem.objects.create(name='system1', title="Guide")
+        with_system = registry.registry_version()
+        SystemDocument.objects.create(system=system, file='documentation/guide.pdf')
+        with_document = registry.registry_version()
+        self.assertEqual(len({empty, with_system, with_document}), 3)
+        self.assertEqual(registry.registry_version(), with_document)
+
+    def test_changes_are_picked_up_after_the_check_interval(self, close_old_connections):
+        DocumentSystem.objects.create(name='system1', title="Guide")
+        self.assertEqual(registry.system_names(), ['system1'])
+
+        DocumentSystem.objects.create(name='system2', title="Manual")
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.system_names(), ['system1'])
+
+        # Once the interval passes, an unchanged version costs one query and a changed one reloads
+        registry.invalidate()
+        self.assertEqual(registry.system_names(), ['system1', 'system2'])
+        registry.invalidate()
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.system_names(), ['system1', 'system2'])
+
+    def test_upload_indexes_the_system_in_the_background(self, close_old_connections):
+        with mock.patch('crewai_api.registry.threading.Thread') as thread, self.captureOnCommitCallbacks(execute=True):
+            response = self._upload('system1')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['index_status'], 'PENDING')
+        thread.return_value.start.assert_called_once()
+
+        with mock.patch('crewai_api.doc_index.build_index') as build_index:
+            thread.call_args.kwargs['target'](*thread.call_args.kwargs['args'])
+        system = DocumentSystem.objects.get(name='system1')
+        build_index.assert_called_once_with('system1', [Path(system.documents.get().file.path)])
+        self.assertEqual(system.index_status, 'READY')
+        self.assertEqual(registry.get_system('system1')['documents'], [Path(system.documents.get().file.path)])
+
+    def test_upload_rejects_names_that_are_not_slugs(self, close_old_connections):
+        for name in ('../../x', 'system 1', 'a/b'):
+            self.assertEqual(self._upload(name).status_code, 400)
+        self.assertFalse(DocumentSystem.objects.exists())
+
+    def test_upload_rejects_files_that_are_not_pdfs(self, close_old_connections):
+        self.assertEqual(self._upload('system1', b'<html></html>').status_code, 400)
+        self.assertEqual(self._upload('system1', filename='guide.txt').status_code, 400)
+        self.assertFalse(DocumentSystem.objects.exists())
+
+    def test_index_dir_stays_inside_the_root(self, close_old_connections):
+        self.assertEqual(index_dir('system1'), (self.directory / 'index' / 'system1').resolve())
+        for name in ('../../x', '..', '/tmp/x', ''):
+            with self.assertRaises(ValueError):
+                index_dir(name)
+
+
+@mock.patch('crewai_api.api.system_names', return_value=['system1'])
+class AskEndpointTests(SimpleTestCase):
+    """The ask endpoints load the AI stack off the event loop and report its failures as errors."""
+
+    def test_failing_import_is_reported_as_an_error(self, system_names):
+        with mock.patch.dict(sys.modules, {'crewai_api.crewai_setup': None, 'crewai_api.streaming': None}):
+            for path in ('/api/crewai/ask', '/api/crewai/ask/stream'):
+                response = self.client.post(path + '?system=system1&prompt=How+do+I+reset+my+password%3F')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("An unexpected error occurred", response.json()['error'])
+
+    def test_missing_configuration_is_reported_as_an_error(self, system_names):
+        with mock.patch('crewai_api.crewai_setup.process_prompt', side_effect=ValueError("OPENAI_API_KEY is not set")):
+            response = self.client.post('/api/crewai/ask?system=system1&prompt=How+do+I+reset+my+password%3F')
+        self.assertEqual(response.json(), {"error": "OPENAI_API_KEY is not set"})
+
+
+@override_settings(SEMANTIC_CACHE_ENABLED=False)
+@mock.patch('crewai_api.api.system_names', return_value=['system1'])
+class MetricsEndpointTests(FakeProviderMixin, SimpleTestCase):
+    """/api/metrics exports the cache and stage counters of the answers this process gave."""
+
+    def _sample(self, name, **labels):
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response['Content-Type'], "text/plain; version=0.0.4; charset=utf-8")
+        total = 0.0
+        for line in response.content.decode().splitlines():
+            series, _, value = line.rpartition(' ')
+            if series.split('{')[0] == name and all(f'{label}="{expected}"' in series for label, expected in labels.items()):
+                total += float(value)
+        return total
+
+    def _ask(self):
+        response = self.client.post('/api/crewai/ask?system=system1&prompt=How+do+I+reset+my+password%3F')
+        self.assertEqual(response.json(), {"result": FakeCrew.answer})
+
+    def test_counts_answer_cache_misses_and_hits(self, system_names):
+        labels = {"system": "system1", "endpoint": "ask", "cache": "answer"}
+        misses = self._sample('ai_cache_requests_total', result="miss", **labels)
+        hits = self._sample('ai_cache_requests_total', result="hit", **labels)
+        answers = self._sample('ai_stage_duration_seconds_count', system="system1", endpoint="ask", stage="answer")
+
+        self._ask()
+        self.assertEqual(self._sample('ai_cache_requests_total', result="miss", **labels), misses + 1)
+        self.assertEqual(self._sample('ai_cache_requests_total', result="hit", **labels), hits)
+
+        self._ask()
+        self.assertEqual(self._sample('ai_cache_requests_total', result="miss", **labels), misses + 1)
+        self.assertEqual(self._sample('ai_cache_requests_total', result="hit", **labels), hits + 1)
+        self.assertEqual(self.crew.runs, 1)
+        self.assertEqual(
+            self._sample('ai_stage_duration_seconds_count', system="system1", endpoint="ask", stage="answer"), answers + 2
+        )
+
+
+class AnswerCacheTests(SimpleTestCase):
+    """Identical questions share one computation, within and across processes."""
+
+    def setUp(self):
+        self.cache = caches[settings.ANSWER_CACHE_ALIAS]
+        self.cache.clear()
+        self.key = answer_cache.cache_key('system1', "How do I reset my password?", 'v1')
+
+    def _coalesced(self):
+        return answer_cache.get_stats().get('system1', {}).get('coalesced', 0)
+
+    def test_concurrent_identical_questions_share_one_computation(self):
+        started, release = threading.Event(), threading.Event()
+        computed, results = [], []
+
+        def compute():
+            computed.append(1)
+            started.set()
+            release.wait(5)
+            return "Use the reset link"
+
+        def ask(prompt):
+            results.append(answer_cache.get_or_compute('system1', prompt, 'v1', compute))
+
+        coalesced = self._coalesced()
+        threads = [threading.Thread(target=ask, args=("How do I reset my password?",))]
+        threads[0].start()
+        started.wait(5)
+        threads += [threading.Thread(target=ask, args=(" how do I reset my  password",)) for _ in range(4)]
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self._coalesced() < coalesced + 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(results, ["Use the reset link"] * 5)
+        self.assertEqual(self._coalesced(), coalesced + 4)
+        # Later requests are served from the cache
+        self.assertEqual(answer_cache.get_or_compute('system1', "How do I reset my password", 'v1', compute), "Use the reset link")
+        self.assertEqual(len(computed), 1)
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise TimeoutError("The model timed out")
+
+        with self.assertRaises(TimeoutError):
+            answer_cache.get_or_compute('system1', "How do I reset my password?", 'v1', fail)
+        self.assertIsNone(self.cache.get(f"{self.key}:lock"))
+        answer = answer_cache.get_or_compute('system1', "How do I reset my password?", 'v1', lambda: "Use the reset link")
+        self.assertEqual(answer, "Use the reset link")
+
+    def test_lock_taken_over_by_another_process_is_not_released(self):
+        def compute():
+            # The lock expired during a slow computation and another process took it
+            self.cache.set(f"{self.key}:lock", 'other-process')
+            return "Use the reset link"
+
+        answer = answer_cache.get_or_compute('system1', "How do I reset my password?", 'v1', compute)
+        self.assertEqual(answer, "Use the reset link")
+        self.assertEqual(self.cache.get(f"{self.key}:lock"), 'other-process')
+
+    def test_own_lock_is_released(self):
+        answer_cache.get_or_compute('system1', "How do I reset my password?", 'v1', lambda: "Use the reset link")
+        self.assertIsNone(self.cache.get(f"{self.key}:lock"))
+
+
+# "how do i reset my password" and "how can i reset my password" are 5/6 similar under fake_embed
+@override_settings(SEMANTIC_CACHE_ENABLED=True, SEMANTIC_CACHE_THRESHOLD=0.8)
+class StreamingTests(FakeProviderMixin, SimpleTestCase):
+    """The streaming endpoint's answers go through the same caches as the other AI endpoints."""
+
+    async def _events(self, prompt):
+        from .streaming import stream_answer
+
+        return [event async for event in stream_answer('system1', prompt)]
+
+    async def test_streams_steps_and_tokens_then_serves_the_cached_answer(self):
+        events = await self._events("How do I reset my password?")
+        self.assertEqual([event['type'] for event in events[:2]], ['start', 'step'])
+        self.assertEqual(events[1]['actions'][0]['tool'], "Search the documentation")
+        tokens = ''.join(event['text'] for event in events if event['type'] == 'token')
+        self.assertEqual(tokens.strip(), FakeCrew.answer)
+        self.assertEqual(events[-1], {"type": "answer", "text": FakeCrew.answer, "cached": False})
+
+        for prompt in ("how do i reset my password", "How can I reset my password?"):
+            events = await self._events(prompt)
+            self.assertEqual([event['type'] for event in events], ['start', 'answer'])
+            self.assertTrue(events[-1]['cached'])
+        self.assertEqual(self.crew.runs, 1)
+
+
+@override_settings(SEMANTIC_CACHE_ENABLED=True, SEMANTIC_CACHE_THRESHOLD=0.8)
+class SemanticCacheTests(FakeProviderMixin, SimpleTestCase):
+    """Rewordings of answered questions are served without running the crew again."""
+
+    def _answer(self, prompt, mode="agent"):
+        from .crewai_setup import generate_answer
+
+        return generate_answer('system1', prompt, mode)
+
+    def test_rewording_is_served_from_the_semantic_cache(self):
+        self._answer("How do I reset my password?")
+        self.assertEqual(self._answer("How can I reset my password?"), FakeCrew.answer)
+        self.assertEqual(self.crew.runs, 1)
+
+        self._answer("My printer is offline")
+        self.assertEqual(self.crew.runs, 2)
+
+    def test_semantic_hit_is_not_counted_as_an_answer_cache_miss(self):
+        def counters():
+            stats = answer_cache.get_stats().get('system1', {})
+            return {field: stats.get(field, 0) for field in ('hits', 'misses', 'semantic_hits', 'semantic_misses')}
+
+        before = counters()
+        self._answer("How do I reset my password?")
+        self._answer("How can I reset my password?")
+        self._answer("How can I reset my password?")
+        after = counters()
+        self.assertEqual(
+            {field: after[field] - before[field] for field in after},
+            {'hits': 1, 'misses': 1, 'semantic_hits': 1, 'semantic_misses': 1},
+        )
+
+    def test_entries_are_kept_per_mode_and_index_version(self):
+        vector = fake_embed(["How do I reset my password?"])[0]
+        semantic_cache.store('system1', 'v1', vector, "Agent answer")
+        self.assertEqual(semantic_cache.lookup('system1', 'v1', vector), "Agent answer")
+        self.assertIsNone(semantic_cache.lookup('system1', 'v1', vector, mode="fast"))
+        # A new index version drops the system's entries
+        self.assertIsNone(semantic_cache.lookup('system1', 'v2', vector))
+        self.assertIsNone(semantic_cache.lookup('system1', 'v1', vector))
+
+    @override_settings(SEMANTIC_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entry_is_evicted(self):
+        password, printer, how = fake_embed(["reset my password", "printer offline", "how do i"])
+        semantic_cache.store('system1', 'v1', password, "Use the reset link")
+        semantic_cache.store('system1', 'v1', printer, "Restart the printer")
+        semantic_cache.lookup('system1', 'v1', password)
+        semantic_cache.store('system1', 'v1', how, "Ask the service desk")
+        self.assertEqual(semantic_cache.lookup('system1', 'v1', password), "Use the reset link")
+        self.assertIsNone(semantic_cache.lookup('system1', 'v1', printer))
+
+
+class Flaky:
+    """A provider call that fails with ``error`` the first ``failures`` times, recording the timeout of each attempt."""
+
+    def __init__(self, failures: int, error: Exception = None):
+        self.failures = failures
+        self.error = error or TimeoutError("The provider timed out")
+        self.timeouts = []
+
+    def __call__(self, timeout: float) -> str:
+        self.timeouts.append(timeout)
+        if len(self.timeouts) <= self.failures:
+            raise self.error
+        return "ok"
+
+
+@override_settings(
+    LLM_TIMEOUT=1, LLM_DEADLINE=5, LLM_MAX_RETRIES=2, LLM_BACKOFF_BASE=0.01, LLM_BACKOFF_MAX=0.02,
+    LLM_HEDGE_ENABLED=False, LLM_BREAKER_FAILURES=3, LLM_BREAKER_RESET=0.05,
+)
+class ResilienceTests(SimpleTestCase):
+    """Provider calls are retried with backoff within a deadline, behind a circuit breaker that cannot wedge."""
+
+    def setUp(self):
+        # Every test gets a fresh breaker built from its settings
+        patcher = mock.patch.object(resilience, '_breaker', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        call = Flaky(failures=2)
+        with mock.patch('crewai_api.resilience.time.sleep') as sleep:
+            self.assertEqual(resilience.call("chat", call), "ok")
+        self.assertEqual(len(call.timeouts), 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(resilience.get_breaker().state, resilience.CircuitBreaker.CLOSED)
+
+    @override_settings(LLM_BACKOFF_BASE=0.5, LLM_BACKOFF_MAX=3)
+    def test_backoff_doubles_up_to_the_cap(self):
+        with mock.patch('crewai_api.resilience.random.uniform', side_effect=lambda low, high: high):
+            self.assertEqual([resilience.backoff(attempt) for attempt in range(1, 6)], [0.5, 1, 2, 3, 3])
+
+    def test_gives_up_after_the_retries(self):
+        call = Flaky(failures=10)
+        with self.assertRaises(resilience.ProviderUnavailable):
+            resilience.call("chat", call)
+        self.assertEqual(len(call.timeouts), 3)
+
+    def test_non_transient_errors_are_raised_at_once(self):
+        call = Flaky(failures=10, error=ValueError("Invalid request"))
+        with self.assertRaises(ValueError):
+            resilience.call("chat", call)
+        self.assertEqual(len(call.timeouts), 1)
+        self.assertEqual(resilience.get_breaker().state, resilience.CircuitBreaker.CLOSED)
+
+    @override_settings(LLM_TIMEOUT=0.1, LLM_DEADLINE=0.15, LLM_MAX_RETRIES=10, LLM_BREAKER_FAILURES=100)
+    def test_deadline_bounds_every_attempt(self):
+        timeouts = []
+
+        def slow(timeout):
+            timeouts.append(timeout)
+            time.sleep(timeout)
+            raise TimeoutError("The provider timed out")
+
+        started = time.monotonic()
+        with self.assertRaises(resilience.ProviderUnavailable):
+            resilience.call("chat", slow)
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertEqual(timeouts[0], 0.1)
+        self.assertLessEqual(sum(timeouts), 0.15 + 0.01)
+
+    def test_breaker_opens_then_a_trial_closes_it(self):
+        breaker = resilience.get_breaker()
+        with self.assertRaises(resilience.ProviderUnavailable):
+            resilience.call("chat", Flaky(failures=10))
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.OPEN)
+
+        call = Flaky(failures=0)
+        with self.assertRaises(resilience.ProviderUnavailable) as rejected:
+            resilience.call("chat", call)
+        self.assertEqual(call.timeouts, [])
+        self.assertGreater(rejected.exception.retry_after, 0)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.retry_after(), 0)
+        self.assertEqual(resilience.call("chat", call), "ok")
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens_the_breaker(self):
+        breaker = resilience.get_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        with self.assertRaises(resilience.ProviderUnavailable):
+            resilience.call("chat", Flaky(failures=10))
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.OPEN)
+        self.assertGreater(breaker.retry_after(), 0)
+
+    def test_trial_in_flight_holds_other_calls_back(self):
+        breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=0.05, trial_timeout=0.1)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.HALF_OPEN)
+        self.assertGreater(breaker.retry_after(), 0)
+        self.assertFalse(breaker.allow())
+
+        # A trial that is never settled is given up on
+        time.sleep(0.11)
+        self.assertEqual(breaker.retry_after(), 0)
+        self.assertTrue(breaker.allow())
+
+    def test_trial_ending_in_a_non_transient_error_does_not_wedge_the_breaker(self):
+        breaker = resilience.get_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        with self.assertRaises(ValueError):
+            resilience.call("chat", Flaky(failures=1, error=ValueError("Invalid request")))
+        # Released, so the next call is the trial
+        self.assertEqual((breaker.state, breaker.retry_after()), (resilience.CircuitBreaker.OPEN, 0))
+
+        with self.assertRaises(KeyError):
+            with resilience.guarded("agent"):
+                raise KeyError("tool")
+        self.assertEqual((breaker.state, breaker.retry_after()), (resilience.CircuitBreaker.OPEN, 0))
+
+        with resilience.guarded("agent"):
+            pass
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.CLOSED)
+
+
+@override_settings(
+    LLM_TIMEOUT=1, LLM_DEADLINE=5, LLM_MAX_RETRIES=2, LLM_BACKOFF_BASE=0.01, LLM_BACKOFF_MAX=0.02,
+    LLM_HEDGE_ENABLED=False, LLM_BREAKER_FAILURES=3, LLM_BREAKER_RESET=0.05, LLM_AGENT_DEADLINE=5,
+)
+class FakeServerResilienceTests(SimpleTestCase):
+    """Real client calls to a local fake OpenAI-compatible server are retried, bounded and cut off by the breaker."""
+
+    def setUp(self):
+        patcher = mock.patch.object(resilience, '_breaker', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _serve(self, **options):
+        from benchmarks.fake_openai import start_server
+
+        server = start_server(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base_url = self.settings(OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1")
+        base_url.enable()
+        self.addCleanup(base_url.disable)
+        # The client is built for the new base URL on first use
+        client = mock.patch('crewai_api.clients._openai_client', None)
+        client.start()
+        self.addCleanup(client.stop)
+        return server.RequestHandlerClass
+
+    def _open_breaker(self):
+        breaker = resilience.get_breaker()
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        return breaker
+
+    def _run_crew(self, kickoff):
+        from .crewai_setup import run_crew
+
+        crew = SimpleNamespace(kickoff=kickoff, agents=[], usage_metrics=None)
+        with mock.patch('crewai_api.crewai_setup.create_crew', return_value=crew):
+            return run_crew('system1', "How do I reset my password?")
+
+    def test_server_errors_and_rate_limits_are_retried(self):
+        from .embeddings import embed_texts
+
+        for status in (503, 429):
+            with self.subTest(status=status):
+                handler = self._serve(fail_first=2, failure_status=status)
+                self.assertEqual(embed_texts(["reset password"]).shape, (1, 256))
+                self.assertEqual(handler.requests, 3)
+                self.assertEqual(resilience.get_breaker().state, resilience.CircuitBreaker.CLOSED)
+
+    @override_settings(LLM_TIMEOUT=0.2, LLM_DEADLINE=0.5, LLM_BREAKER_FAILURES=100)
+    def test_stalled_requests_are_cut_off_by_the_deadline(self):
+        from .embeddings import embed_texts
+
+        self._serve(stall_rate=1, stall_seconds=3)
+        started = time.monotonic()
+        with self.assertRaises(resilience.ProviderUnavailable):
+            embed_texts(["reset password"])
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_breaker_stops_calling_a_failing_provider_until_a_trial_succeeds(self):
+        from .embeddings import embed_texts
+
+        handler = self._serve(failure_rate=1)
+        with self.assertRaises(resilience.ProviderUnavailable):
+            embed_texts(["reset password"])
+        self.assertEqual(handler.requests, 3)
+        with self.assertRaises(resilience.ProviderUnavailable):
+            embed_texts(["reset password"])
+        self.assertEqual(handler.requests, 3)
+
+        handler.failure_rate = 0
+        time.sleep(0.06)
+        embed_texts(["reset password"])
+        self.assertEqual(resilience.get_breaker().state, resilience.CircuitBreaker.CLOSED)
+
+    def test_searches_of_an_agent_run_are_let_through_during_its_trial(self):
+        from .embeddings import embed_texts
+
+        handler = self._serve()
+        breaker = self._open_breaker()
+
+        def kickoff():
+            self.assertEqual(breaker.state, resilience.CircuitBreaker.HALF_OPEN)
+            embed_texts(["reset password"])
+            return "Use the reset link"
+
+        self.assertEqual(self._run_crew(kickoff), "Use the reset link")
+        self.assertEqual(handler.requests, 1)
+        self.assertEqual(breaker.state, resilience.CircuitBreaker.CLOSED)
+
+    @override_settings(LLM_AGENT_DEADLINE=0.2)
+    def test_agent_run_is_cut_off_by_its_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        started = time.monotonic()
+        with self.assertRaises(resilience.ProviderUnavailable):
+            self._run_crew(lambda: release.wait(5))
+        self.assertLess(time.monotonic() - started, 1)
@@ -0,0 +1,52 @@
+from typing import List, Set, Tuple, Type
+from crewai_tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+
+class DocumentSearchToolSchema(BaseModel):
+    search_query: str = Field(..., description="Mandatory query you want to use to search the documentation")
+
+
+class DocumentSearchTool(BaseTool):
+    """
+    Hybrid semantic and keyword search over a system's indexed documentation.
+
+    One tool is created per agent run. Chunks already returned earlier in the
+    run, or near-identical to them, are not returned again, and the total
+    documentation text returned is capped at ``token_budget`` tokens.
+    """
+
+    name: str = "Search the documentation"
+    description: str = (
+        "A tool that can be used to search the system's documentation. It combines semantic and keyword search, "
+        "so include exact identifiers such as error codes, setting names or class names in the query."
+    )
+    args_schema: Type[BaseModel] = DocumentSearchToolSchema
+    system: str
+    documents: List[str]
+    token_budget: int
+    _seen: List[Set[Tuple[str, ...]]] = PrivateAttr(default_factory=list)
+    _used: int = PrivateAttr(default=0)
+
+    @property
+    def context_tokens(self) -> int:
+        """The documentation tokens returned so far in this agent run."""
+        return self._used
+
+    def _run(self, search_query: str, **kwargs) -> str:
+        from .answer_cache import record
+        from .context import CHUNK_SEPARATOR, dedupe_chunks, pack_chunks
+        from .doc_index import search_chunks
+
+        remaining = self.token_budget - self._used
+        if remaining <= 0:
+            return "The documentation context budget for this question is used up. Answer with the information already found."
+
+        chunks = dedupe_chunks(search_chunks(self.system, self.documents, search_query), self._seen)
+        if not chunks:
+            return "No new relevant content found in the documentation."
+
+        packed, used = pack_chunks(chunks, remaining)
+        self._used += used
+        record(self.system, "context_tokens", used)
+        return CHUNK_SEPARATOR.join(packed) if packed else "No relevant content found within the remaining documentation context budget."
@@ -0,0 +1,403 @@
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from django.conf import settings
+
+# Row layout of the NumPy store's side table: chunk ID and the byte range of its text
+TABLE_DTYPE = np.dtype([('id', 'S32'), ('offset', '<i8'), ('length', '<i4')])
+
+# Rows assigned to IVF clusters per matrix product while training the index
+IVF_BLOCK_SIZE = 65536
+
+# File in a NumPy store's directory naming the subdirectory that holds the current files
+CURRENT_FILE = 'CURRENT'
+
+# The NumPy store's files, in the current version's directory
+STORE_FILES = ('table.bin', 'embeddings.f32', 'chunks.bin', 'meta.json') + tuple(
+    f'ivf_{part}.npy' for part in ('centroids', 'order', 'bounds')
+)
+
+
+class ChromaStore:
+    """Chunk embeddings for one system, persisted in a local chromadb collection."""
+
+    def __init__(self, directory: Path, name: str):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=str(directory))
+        self.name = name
+        self.collection = self.client.get_or_create_collection(name, metadata={"hnsw:space": "cosine"})
+
+    def ids(self) -> List[str]:
+        """
+        Return the IDs of every stored chunk.
+
+        Returns:
+            List[str]: The chunk IDs.
+        """
+        return self.collection.get(include=[])["ids"]
+
+    def texts(self, ids: List[str]) -> List[str]:
+        """
+        Return the texts of stored chunks.
+
+        Args:
+            ids (List[str]): The chunk IDs.
+
+        Returns:
+            List[str]: The chunk texts, in the order of ``ids``.
+        """
+        if not ids:
+            return []
+        result = self.collection.get(ids=ids, include=["documents"])
+        texts = dict(zip(result["ids"], result["documents"]))
+        return [texts[chunk_id] for chunk_id in ids]
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        Store chunks with their embeddings.
+
+        Args:
+            ids (List[str]): The chunk IDs.
+            texts (List[str]): The chunk texts.
+            metadatas (List[Dict]): Metadata stored with each chunk.
+            embeddings (np.ndarray): One embedding row per chunk.
+        """
+        if ids:
+            self.collection.add(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings.tolist())
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove chunks.
+
+        Args:
+            ids (List[str]): The IDs of the chunks to remove.
+        """
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def reset(self) -> None:
+        """Remove every chunk."""
+        self.client.delete_collection(self.name)
+        self.collection = self.client.get_or_create_collection(self.name, metadata={"hnsw:space": "cosine"})
+
+    def optimize(self) -> None:
+        """Nothing to do; chromadb maintains its HNSW index on write."""
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, str, float]]:
+        """
+        Find the chunks closest to a query embedding.
+
+        Args:
+            vector (np.ndarray): The normalized query embedding.
+            k (int): The number of chunks to return.
+
+        Returns:
+            List[Tuple[str, str, float]]: (chunk ID, text, cosine similarity), most similar first.
+        """
+        result = self.collection.query(query_embeddings=[vector.tolist()], n_results=k, include=["documents", "distances"])
+        return [
+            (chunk_id, text, 1.0 - distance)
+            for chunk_id, text, distance in zip(result["ids"][0], result["documents"][0], result["distances"][0])
+        ]
+
+
+class NumpyStore:
+    """
+    Chunk embeddings for one system as a memory-mapped float32 matrix.
+
+    The store is a directory of flat files: ``embeddings.f32`` holds one row
+    per chunk, ``chunks.bin`` the UTF-8 chunk texts back to back, and
+    ``table.bin`` a ``TABLE_DTYPE`` row per chunk pointing into it. Files are
+    opened read-only with ``np.memmap``, so every worker process on a host
+    shares the same pages through the OS page cache.
+
+    The files live in a version subdirectory named by ``CURRENT_FILE``. New
+    chunks are appended in place. Deletions and resets write a complete new
+    version and switch ``CURRENT_FILE`` to it with one ``os.replace``, so a
+    reader sees either every old file or every new one, and readers that
+    already mapped the old files keep a consistent view. Writers must hold
+    the index lock.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self._load()
+
+    def _path(self, filename: str) -> Path:
+        return self.version_dir / filename
+
+    def _current_version(self) -> str:
+        current_path = self.directory / CURRENT_FILE
+        # Stores written before versioning keep their files in the directory itself
+        return current_path.read_text().strip() if current_path.exists() else '.'
+
+    def _new_version(self) -> Path:
+        """Create an empty directory for the next version of the files."""
+        current = self.version_dir.name if self.version_dir != self.directory else 'v0'
+        version_dir = self.directory / f'v{int(current[1:]) + 1}'
+        # Left behind by a write that was interrupted before the swap
+        shutil.rmtree(version_dir, ignore_errors=True)
+        version_dir.mkdir()
+        return version_dir
+
+    def _swap(self, version_dir: Path) -> None:
+        """Make a fully written version current, then remove the previous one."""
+        previous = self.version_dir
+        tmp_path = self.directory / (CURRENT_FILE + '.tmp')
+        tmp_path.write_text(version_dir.name)
+        os.replace(tmp_path, self.directory / CURRENT_FILE)
+        if previous == self.directory:
+            for filename in STORE_FILES:
+                (previous / filename).unlink(missing_ok=True)
+        else:
+            # Processes that mapped the old files keep them until they reload
+            shutil.rmtree(previous, ignore_errors=True)
+        self._load()
+
+    def _load(self) -> None:
+        self.version_dir = self.directory / self._current_version()
+        meta_path = self._path('meta.json')
+        self.dim: Optional[int] = json.loads(meta_path.read_text())["dim"] if meta_path.exists() else None
+
+        table_path, matrix_path, texts_path = self._path('table.bin'), self._path('embeddings.f32'), self._path('chunks.bin')
+        table_rows = table_path.stat().st_size // TABLE_DTYPE.itemsize if table_path.exists() else 0
+        matrix_rows = matrix_path.stat().st_size // (4 * self.dim) if self.dim and matrix_path.exists() else 0
+        # Rows are complete only once their table entry is written, which happens last
+        count = min(table_rows, matrix_rows)
+
+        if count:
+            self.table = np.memmap(table_path, dtype=TABLE_DTYPE, mode='r', shape=(count,))
+            self.matrix = np.memmap(matrix_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+            self.text_bytes = np.memmap(texts_path, dtype=np.uint8, mode='r')
+        else:
+            self.table = np.empty(0, dtype=TABLE_DTYPE)
+            self.matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+            self.text_bytes = np.empty(0, dtype=np.uint8)
+        self.ivf = self._load_ivf(count)
+        self._rows: Optional[Dict[str, int]] = None
+
+    def _load_ivf(self, count: int) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        paths = [self._path(f'ivf_{part}.npy') for part in ('centroids', 'order', 'bounds')]
+        if not count or not all(path.exists() for path in paths):
+            return None
+        centroids, order, bounds = (np.load(path, mmap_mode='r') for path in paths)
+        # An index trained before later appends or deletions no longer covers every row
+        return (centroids, order, bounds) if len(order) == count else None
+
+    def _text(self, row: int) -> str:
+        entry = self.table[row]
+        return bytes(self.text_bytes[entry['offset']:entry['offset'] + entry['length']]).decode()
+
+    def _replace(self, filename: str, data: bytes) -> None:
+        tmp_path = self._path(filename + '.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self._path(filename))
+
+    def _drop_ivf(self) -> None:
+        for part in ('centroids', 'order', 'bounds'):
+            self._path(f'ivf_{part}.npy').unlink(missing_ok=True)
+
+    def ids(self) -> List[str]:
+        """
+        Return the IDs of every stored chunk.
+
+        Returns:
+            List[str]: The chunk IDs.
+        """
+        return [chunk_id.decode() for chunk_id in self.table['id']]
+
+    def texts(self, ids: List[str]) -> List[str]:
+        """
+        Return the texts of stored chunks.
+
+        Args:
+            ids (List[str]): The chunk IDs.
+
+        Returns:
+            List[str]: The chunk texts, in the order of ``ids``.
+        """
+        if self._rows is None:
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids())}
+        return [self._text(self._rows[chunk_id]) for chunk_id in ids]
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict], embeddings: np.ndarray) -> None:
+        """
+        Store chunks with their embeddings.
+
+        Args:
+            ids (List[str]): The chunk IDs.
+            texts (List[str]): The chunk texts.
+            metadatas (List[Dict]): Unused; kept for interface compatibility with ``ChromaStore``.
+            embeddings (np.ndarray): One embedding row per chunk.
+        """
+        if not ids:
+            return
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self._replace('meta.json', json.dumps({"dim": self.dim}).encode())
+
+        count = len(self.table)
+        texts_path = self._path('chunks.bin')
+        offset = texts_path.stat().st_size if texts_path.exists() else 0
+        encoded = [text.encode() for text in texts]
+        rows = np.zeros(len(ids), dtype=TABLE_DTYPE)
+        rows['id'] = [chunk_id.encode() for chunk_id in ids]
+        rows['length'] = [len(data) for data in encoded]
+        rows['offset'] = offset + np.concatenate(([0], np.cumsum(rows['length'][:-1], dtype=np.int64)))
+
+        # Drop rows left half-written by an interrupted append before adding new ones
+        for filename, size in (('embeddings.f32', count * 4 * self.dim), ('table.bin', count * TABLE_DTYPE.itemsize)):
+            with open(self._path(filename), 'ab') as data_file:
+                data_file.truncate(size)
+
+        with open(texts_path, 'ab') as data_file:
+            data_file.write(b''.join(encoded))
+        with open(self._path('embeddings.f32'), 'ab') as data_file:
+            data_file.write(embeddings.tobytes())
+        with open(self._path('table.bin'), 'ab') as data_file:
+            data_file.write(rows.tobytes())
+        self._load()
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove chunks, compacting the files.
+
+        Args:
+            ids (List[str]): The IDs of the chunks to remove.
+        """
+        if not ids or not len(self.table):
+            return
+
+        keep = np.flatnonzero(~np.isin(self.table['id'], [chunk_id.encode() for chunk_id in ids]))
+        if len(keep) == len(self.table):
+            return
+
+        texts = [bytes(self.text_bytes[entry['offset']:entry['offset'] + entry['length']]) for entry in self.table[keep]]
+        rows = np.array(self.table[keep])
+        rows['offset'] = np.concatenate(([0], np.cumsum(rows['length'][:-1], dtype=np.int64)))
+        matrix = np.ascontiguousarray(self.matrix[keep])
+
+        version_dir = self._new_version()
+        (version_dir / 'meta.json').write_text(json.dumps({"dim": self.dim}))
+        (version_dir / 'chunks.bin').write_bytes(b''.join(texts))
+        (version_dir / 'embeddings.f32').write_bytes(matrix.tobytes())
+        (version_dir / 'table.bin').write_bytes(rows.tobytes())
+        self._swap(version_dir)
+
+    def reset(self) -> None:
+        """Remove every chunk."""
+        self._swap(self._new_version())
+
+    def optimize(self) -> None:
+        """
+        Train the approximate (IVF) index once the store is large enough.
+
+        Chunks are clustered with spherical k-means into about sqrt(n)
+        clusters, and searches then scan only the ``DOC_NUMPY_IVF_NPROBE``
+        clusters closest to the query. Below ``DOC_NUMPY_IVF_MIN_CHUNKS``
+        chunks an exact scan is fast enough and no index is kept.
+        """
+        count = len(self.table)
+        if count < settings.DOC_NUMPY_IVF_MIN_CHUNKS:
+            self._drop_ivf()
+            self.ivf = None
+            return
+        if self.ivf is not None:
+            return
+
+        nlist = max(1, int(math.sqrt(count)))
+        rng = np.random.default_rng(0)
+        centroids = np.array(self.matrix[np.sort(rng.choice(count, nlist, replace=False))])
+        assignments = np.empty(count, dtype=np.int32)
+        for _ in range(settings.DOC_NUMPY_IVF_ITERATIONS):
+            for start in range(0, count, IVF_BLOCK_SIZE):
+                block = self.matrix[start:start + IVF_BLOCK_SIZE]
+                assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, self.matrix)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        order = np.argsort(assignments, kind='stable').astype(np.int32)
+        bounds = np.searchsorted(assignments[order], np.arange(nlist + 1)).astype(np.int64)
+        for part, array in (('centroids', centroids.astype(np.float32)), ('bounds', bounds), ('order', order)):
+            tmp_path = self._path(f'ivf_{part}.tmp.npy')
+            np.save(tmp_path, array)
+            os.replace(tmp_path, self._path(f'ivf_{part}.npy'))
+        self.ivf = self._load_ivf(count)
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, str, float]]:
+        """
+        Find the chunks closest to a query embedding.
+
+        Scores are one matrix-vector product over every chunk, or over the
+        chunks of the nearest clusters when the IVF index is trained.
+
+        Args:
+            vector (np.ndarray): The normalized query embedding.
+            k (int): The number of chunks to return.
+
+        Returns:
+            List[Tuple[str, str, float]]: (chunk ID, text, cosine similarity), most similar first.
+        """
+        if not len(self.table) or k <= 0:
+            return []
+
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.ivf is not None:
+            centroids, order, bounds = self.ivf
+            nprobe = min(settings.DOC_NUMPY_IVF_NPROBE, len(centroids))
+            probes = np.argpartition(-(centroids @ vector), nprobe - 1)[:nprobe]
+            rows = np.sort(np.concatenate([order[bounds[cluster]:bounds[cluster + 1]] for cluster in probes]))
+            if not len(rows):
+                # Every probed cluster is empty
+                return []
+            scores = self.matrix[rows] @ vector
+        else:
+            rows = None
+            scores = self.matrix @ vector
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.table[row]['id'].decode(), self._text(row), float(scores[index]))
+            for index, row in zip(top, rows[top] if rows is not None else top)
+        ]
+
+
+# Retriever backends selectable with the DOC_RETRIEVER_BACKEND setting
+STORE_BACKENDS = {
+    "chroma": ChromaStore,
+    "numpy": NumpyStore,
+}
+
+
+def open_store(directory: Path, name: str):
+    """
+    Open a system's vector store with the configured retriever backend.
+
+    Args:
+        directory (Path): The directory holding the store's files.
+        name (str): The system name.
+
+    Returns:
+        The vector store, a ``ChromaStore`` or ``NumpyStore``.
+
+    Raises:
+        ValueError: If ``DOC_RETRIEVER_BACKEND`` names an unknown backend.
+    """
+    backend = STORE_BACKENDS.get(settings.DOC_RETRIEVER_BACKEND)
+    if backend is None:
+        raise ValueError(f"Invalid retriever backend: {settings.DOC_RETRIEVER_BACKEND}. Available backends: {', '.join(STORE_BACKENDS)}")
+    return backend(directory, name)
@@ -1,3 +1,15 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from .metrics import CONTENT_TYPE, render
 
-# Create your views here.
+
+def metrics(request):
+    """
+    Expose the AI pipeline metrics of this process in the Prometheus text format.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        HttpResponse: The metrics exposition.
+    """
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,27 @@
+import time
+from pathlib import Path
+
+
+def warm_up() -> None:
+    """
+    Load the AI stack and open every system's document index.
+
+    The AI stack is otherwise imported on the first AI request. Workers that
+    serve AI traffic can call this at startup (``AI_WARMUP=true``) so that
+    cost is paid before the first request rather than during it.
+    """
+    started = time.perf_counter()
+    from . import crewai_setup, streaming  # noqa: F401
+    from .doc_index import get_store
+    from .registry import get_systems
+
+    crewai_setup.get_client()
+    for name, record in get_systems().items():
+        paths = [Path(path) for path in record["documents"] if Path(path).exists()]
+        if not paths:
+            continue
+        try:
+            get_store(name, paths)
+        except Exception as e:
+            print(f"Error warming up the index for system {name}: {e}")
+    print(f"AI stack warmed up in {time.perf_counter() - started:.2f}s")
@@ -1,9 +1,20 @@
-from ninja import Router
+from ninja import Query, Router
 from django.shortcuts import get_object_or_404
-from .models import Ticket, AISolution
-from .schemas import TicketIn, TicketOut, AISolutionOut
-from crewai_api.crewai_setup import process_prompt, SYSTEM_PDF_MAP
-from typing import List
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .models import Ticket, AISolution, AISolutionJob
+from .schemas import TicketIn, TicketOut, AISolutionJobOut, AISolutionBatchIn, AISolutionBatchOut, SimilarTicketOut, TicketPageOut, TicketFilterIn, TICKET_VALUES, solution_out, ticket_row
+from .jobs import enqueue, enqueue_many, start_workers
+from .similarity import find_similar
+from .pagination import estimate_count, page_size, paginate
+from .search import filter_tickets
+from .export import EXPORT_FORMATS, aiter_blocks, encode, export_rows
+from crewai_api.answer_cache import ANSWER_MODES
+from django.conf import settings
+from crewai_api.registry import system_names
+from crewai_api.resilience import get_breaker
+from chatbot_gpt.renderers import json_response
+from typing import List, Optional
 from ninja.errors import HttpError
 from authentication.auth import AuthBearer
 
@@ -30,6 +41,44 @@ def create_ticket(request, ticket_in: TicketIn):
     )
     return TicketOut.from_orm(ticket)
 
+@router.get("/tickets/export", auth=auth)
+def export_tickets(
+    request,
+    filters: TicketFilterIn = Query(...),
+    export_format: str = Query("ndjson", alias="format"),
+    after_id: int = 0,
+):
+    """
+    Stream every matching ticket with its AI solution, in ID order.
+
+    Rows are read through a database cursor and written as they are read,
+    so memory stays flat however many tickets there are, under WSGI and
+    ASGI alike. If the download is interrupted, request again with
+    ``after_id`` set to the last ID received.
+
+    Args:
+        request: The HTTP request object.
+        filters (TicketFilterIn): The same filters as the ticket list.
+        export_format (str): The ``format`` query parameter, "ndjson" for one JSON ticket per line, or "csv" (default is "ndjson").
+        after_id (int): Only export tickets with a greater ID (default is 0).
+
+    Returns:
+        StreamingHttpResponse: The export, as an attachment.
+    """
+    if not request.auth.is_superuser:
+        raise HttpError(403, "Only admins can export tickets")
+
+    if export_format not in EXPORT_FORMATS:
+        raise HttpError(400, f"Invalid format. Available formats: {', '.join(EXPORT_FORMATS)}")
+
+    tickets = filter_tickets(Ticket.objects.all(), filters.dict())
+    blocks = encode(export_rows(tickets, after_id), export_format, header=not after_id)
+    if isinstance(request, ASGIRequest):
+        blocks = aiter_blocks(blocks)
+    response = StreamingHttpResponse(blocks, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="tickets.{export_format}"'
+    return response
+
 @router.get("/tickets/{ticket_id}", response=TicketOut)
 def get_ticket(request, ticket_id: int):
     """
@@ -42,45 +91,179 @@ def get_ticket(request, ticket_id: int):
     Returns:
         TicketOut: The output schema representing the retrieved ticket.
     """
+    ticket = get_object_or_404(Ticket.objects.select_related('ai_solution'), id=ticket_id)
+    return TicketOut.from_orm(ticket)
+
+@router.get("/tickets/{ticket_id}/similar", response=List[SimilarTicketOut])
+def get_similar_tickets(request, ticket_id: int, limit: int = 5):
+    """
+    Find earlier tickets that are near-duplicates of a ticket.
+
+    Solutions of similar tickets are included unless they were disliked, so
+    they can be offered before generating a new one.
+
+    Args:
+        request: The HTTP request object.
+        ticket_id (int): The ID of the ticket to match.
+        limit (int): The maximum number of tickets to return (default is 5).
+
+    Returns:
+        List[SimilarTicketOut]: The similar tickets, most similar first.
+    """
     ticket = get_object_or_404(Ticket, id=ticket_id)
-    return ticket
+    similar_tickets = []
+    for similar, similarity in find_similar(ticket, limit=min(limit, 50)):
+        solution = solution_out(similar)
+        similar_tickets.append(SimilarTicketOut(
+            ticket_id=similar.id,
+            title=similar.title,
+            similarity=round(similarity, 4),
+            solution=solution if solution and solution.dislikes == 0 else None,
+        ))
+    return similar_tickets
 
-@router.post("/tickets/{ticket_id}/ai-solution", response=AISolutionOut)
-def generate_ai_solution(request, ticket_id: int, system: str = "system1"):
+@router.post("/tickets/{ticket_id}/ai-solution", response={202: AISolutionJobOut}, auth=auth)
+def generate_ai_solution(request, ticket_id: int, system: str = "system1", mode: str = "agent"):
     """
-    Generate an AI solution for a ticket.
+    Queue AI solution generation for a ticket.
+
+    The solution is generated by a background worker; poll
+    ``/ai-solution-jobs/{job_id}`` for the result. A ticket without a
+    solution reuses the solution of a near-duplicate earlier ticket when
+    one qualifies, without calling the LLM.
 
     Args:
         request: The HTTP request object.
         ticket_id (int): The ID of the ticket for which to generate a solution.
         system (str): The system to use for generating the solution (default is "system1").
+        mode (str): "agent" to run the documentation analyst crew, or "fast" for a single retrieval and completion.
 
     Returns:
-        AISolutionOut: The output schema representing the generated AI solution.
+        AISolutionJobOut: The output schema representing the queued job.
     """
     ticket = get_object_or_404(Ticket, id=ticket_id)
-    prompt = f"Provide a solution for the following ticket: {ticket.description}"
 
-    if system not in SYSTEM_PDF_MAP:
-        raise HttpError(400, f"Invalid system. Available systems: {', '.join(SYSTEM_PDF_MAP.keys())}")
+    systems = system_names()
+    if system not in systems:
+        raise HttpError(400, f"Invalid system. Available systems: {', '.join(systems)}")
 
-    ai_solution = process_prompt(system, prompt)
-    solution = AISolution.objects.create(ticket=ticket, solution=ai_solution)
-    return AISolutionOut.from_orm(solution)
+    if mode not in ANSWER_MODES:
+        raise HttpError(400, f"Invalid mode. Available modes: {', '.join(ANSWER_MODES)}")
 
-@router.get("/tickets", response=List[TicketOut])
-def get_all_tickets(request):
+    if get_breaker().retry_after():
+        raise HttpError(503, "The AI provider is temporarily unavailable")
+
+    job = enqueue(ticket, system, requested_by=request.auth, mode=mode)
+    return 202, AISolutionJobOut.from_orm(job)
+
+@router.post("/tickets/ai-solutions/batch", response={202: AISolutionBatchOut}, auth=auth)
+def generate_ai_solutions_batch(request, batch_in: AISolutionBatchIn):
     """
-    Retrieve all tickets.
+    Queue AI solution generation for a batch of tickets.
+
+    Tickets are selected by ID, by status, or both, and each gets a job on
+    the AI solution queue; poll ``/ai-solution-jobs/{job_id}`` for the
+    results. The queue's workers bound how many generations run at once.
+    Tickets with identical descriptions share one generation: the first of
+    their jobs to finish stores its answer for the others in one bulk write.
 
     Args:
         request: The HTTP request object.
+        batch_in (AISolutionBatchIn): The tickets to select, the system and the mode.
 
     Returns:
-        List[TicketOut]: A list of output schemas representing all tickets.
+        AISolutionBatchOut: The queued or already active job of each selected ticket.
     """
-    tickets = Ticket.objects.all().select_related('ai_solution')
-    return [TicketOut.from_orm(ticket) for ticket in tickets]
+    if not request.auth.is_superuser:
+        raise HttpError(403, "Only admins can generate solutions in batch")
+
+    systems = system_names()
+    if batch_in.system not in systems:
+        raise HttpError(400, f"Invalid system. Available systems: {', '.join(systems)}")
+
+    if batch_in.mode not in ANSWER_MODES:
+        raise HttpError(400, f"Invalid mode. Available modes: {', '.join(ANSWER_MODES)}")
+
+    if get_breaker().retry_after():
+        raise HttpError(503, "The AI provider is temporarily unavailable")
+
+    tickets = Ticket.objects.order_by('id')
+    if batch_in.ticket_ids is not None:
+        tickets = tickets.filter(id__in=batch_in.ticket_ids)
+    if batch_in.status:
+        tickets = tickets.filter(status=batch_in.status.upper())
+    if batch_in.missing_only:
+        tickets = tickets.filter(ai_solution__isnull=True)
+
+    tickets = list(tickets[:settings.AI_BATCH_MAX_TICKETS + 1])
+    if len(tickets) > settings.AI_BATCH_MAX_TICKETS:
+        raise HttpError(400, f"A batch can contain at most {settings.AI_BATCH_MAX_TICKETS} tickets")
+
+    jobs = enqueue_many(tickets, batch_in.system, requested_by=request.auth, mode=batch_in.mode)
+    return 202, {"jobs": [AISolutionJobOut.from_orm(job) for job in jobs]}
+
+@router.get("/ai-solution-jobs/{job_id}", response=AISolutionJobOut)
+def get_ai_solution_job(request, job_id: int):
+    """
+    Retrieve the status of an AI solution job, and its solution once done.
+
+    Args:
+        request: The HTTP request object.
+        job_id (int): The ID of the job to retrieve.
+
+    Returns:
+        AISolutionJobOut: The output schema representing the job.
+    """
+    job = get_object_or_404(AISolutionJob.objects.select_related('ticket__ai_solution'), id=job_id)
+    if job.status in AISolutionJob.ACTIVE_STATUSES:
+        start_workers()
+    return AISolutionJobOut.from_orm(job)
+
+@router.get("/tickets", response=TicketPageOut)
+def get_all_tickets(
+    request,
+    filters: TicketFilterIn = Query(...),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include_count: bool = False,
+):
+    """
+    Retrieve one page of tickets, oldest first, optionally filtered and searched.
+
+    Pass the returned ``next_cursor`` with the same filters to get the
+    following page; it is null on the last page. With ``API_FAST_JSON``,
+    rows are encoded straight from ``.values()`` without building
+    ``TicketOut`` models.
+
+    Args:
+        request: The HTTP request object.
+        filters (TicketFilterIn): Exact status, priority and assignee, created and updated ranges, and search text ``q``.
+        cursor (Optional[str]): The cursor of the page to retrieve (default is the first page).
+        limit (Optional[int]): The page size (default is ``TICKET_PAGE_SIZE``, at most ``TICKET_PAGE_SIZE_MAX``).
+        include_count (bool): Whether to include an estimate of the number of matching tickets.
+
+    Returns:
+        TicketPageOut: The tickets of the page, the next cursor and the optional count estimate.
+    """
+    filters = filters.dict()
+    tickets = filter_tickets(Ticket.objects.all(), filters)
+    rows = tickets.values(*TICKET_VALUES) if settings.API_FAST_JSON else tickets.select_related('ai_solution')
+    try:
+        page, next_cursor = paginate(rows, cursor, page_size(limit))
+    except ValueError:
+        raise HttpError(400, "Invalid cursor")
+    count_estimate = estimate_count(tickets, filters) if include_count else None
+    if settings.API_FAST_JSON:
+        return json_response({
+            "items": [ticket_row(ticket) for ticket in page],
+            "next_cursor": next_cursor,
+            "count_estimate": count_estimate,
+        })
+    return TicketPageOut(
+        items=[TicketOut.from_orm(ticket) for ticket in page],
+        next_cursor=next_cursor,
+        count_estimate=count_estimate,
+    )
 
 @router.post("/ai-solutions/{solution_id}/like", auth=auth)
 def like_ai_solution(request, solution_id: int):
@@ -0,0 +1,132 @@
+import csv
+import io
+from typing import AsyncIterator, Iterable, Iterator, List
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import QuerySet
+from chatbot_gpt.renderers import dumps
+from .schemas import TICKET_VALUES, ticket_row
+
+# Export formats and their content types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# CSV columns, with the solution's fields flattened next to the ticket's
+CSV_COLUMNS = [
+    'id', 'title', 'description', 'created_at', 'updated_at', 'priority', 'status', 'assigned_to',
+    'solution_id', 'solution', 'solution_created_at', 'likes', 'dislikes', 'reused_from_id',
+]
+
+
+def export_rows(tickets: QuerySet, after_id: int = 0, chunk_size: int = 0) -> Iterator[dict]:
+    """
+    Read tickets with their solutions in ``id`` order, without caching them.
+
+    Rows are fetched ``chunk_size`` at a time through the database cursor
+    (a server-side cursor on PostgreSQL), so memory does not grow with the
+    number of tickets.
+
+    Args:
+        tickets (QuerySet): The tickets to export.
+        after_id (int): Only export tickets with a greater ID, to resume an interrupted export.
+        chunk_size (int): The rows fetched per round trip (default is ``TICKET_EXPORT_CHUNK_SIZE``).
+
+    Returns:
+        Iterator[dict]: The tickets, shaped like ``TicketOut``.
+    """
+    rows = tickets.filter(id__gt=after_id).order_by('id').values(*TICKET_VALUES)
+    for row in rows.iterator(chunk_size=chunk_size or settings.TICKET_EXPORT_CHUNK_SIZE):
+        yield ticket_row(row)
+
+
+def csv_record(ticket: dict) -> List:
+    """
+    Flatten an exported ticket into a CSV record.
+
+    Args:
+        ticket (dict): The ticket, shaped like ``TicketOut``.
+
+    Returns:
+        List: The values of ``CSV_COLUMNS``.
+    """
+    solution = ticket['ai_solution'] or {}
+    return [
+        ticket['id'], ticket['title'], ticket['description'], ticket['created_at'].isoformat(),
+        ticket['updated_at'].isoformat(), ticket['priority'], ticket['status'], ticket['assigned_to'],
+        solution.get('id'), solution.get('solution'),
+        solution['created_at'].isoformat() if solution else None,
+        solution.get('likes'), solution.get('dislikes'), solution.get('reused_from_id'),
+    ]
+
+
+def encode(tickets: Iterable[dict], export_format: str, header: bool = True, batch_size: int = 0) -> Iterator[bytes]:
+    """
+    Encode exported tickets as NDJSON lines or CSV records.
+
+    Records are joined into blocks of ``batch_size`` so a streaming response
+    or file write handles a block rather than each record.
+
+    Args:
+        tickets (Iterable[dict]): The tickets from ``export_rows``.
+        export_format (str): One of ``EXPORT_FORMATS``.
+        header (bool): Whether to start a CSV export with its header row.
+        batch_size (int): The records per block (default is ``TICKET_EXPORT_CHUNK_SIZE``).
+
+    Returns:
+        Iterator[bytes]: The encoded blocks, each ending with a complete record.
+    """
+    batch_size = batch_size or settings.TICKET_EXPORT_CHUNK_SIZE
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if export_format == 'csv' and header:
+        writer.writerow(CSV_COLUMNS)
+
+    block: List[bytes] = []
+    for count, ticket in enumerate(tickets, start=1):
+        if export_format == 'csv':
+            writer.writerow(csv_record(ticket))
+        else:
+            block.append(dumps(ticket) + b'\n')
+        if count % batch_size == 0:
+            yield _flush(block, buffer)
+    tail = _flush(block, buffer)
+    if tail:
+        yield tail
+
+
+def _flush(block: List[bytes], buffer: io.StringIO) -> bytes:
+    """Return and clear the records collected in ``block`` (NDJSON) or ``buffer`` (CSV)."""
+    content = b''.join(block) + buffer.getvalue().encode()
+    block.clear()
+    buffer.seek(0)
+    buffer.truncate()
+    return content
+
+
+async def aiter_blocks(blocks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Stream the blocks of ``encode`` from an async context, one block at a time.
+
+    Under ASGI, Django reads a synchronous ``StreamingHttpResponse`` into a
+    list before sending it, which holds the whole export in memory. Each
+    block is instead produced on Django's thread for synchronous code, so
+    the database cursor stays on one thread and connection.
+
+    Args:
+        blocks (Iterator[bytes]): The blocks from ``encode``.
+
+    Returns:
+        AsyncIterator[bytes]: The same blocks.
+    """
+    next_block = sync_to_async(next)
+    try:
+        while True:
+            block = await next_block(blocks, None)
+            if block is None:
+                return
+            yield block
+    finally:
+        # Closing releases the cursor, on the thread that opened it
+        await sync_to_async(blocks.close)()
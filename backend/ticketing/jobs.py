@@ -0,0 +1,478 @@
+import hashlib
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from crewai_api import metrics
+from crewai_api.context import truncate_text
+from crewai_api.resilience import ProviderUnavailable, get_breaker
+from .models import Ticket, AISolution, AISolutionJob
+from .similarity import find_reusable_solution
+
+# How many pending jobs are considered when picking the next one to run
+CANDIDATE_WINDOW = 50
+
+# Speculative jobs are ranked below every explicitly requested job
+SPECULATIVE_PRIORITY_OFFSET = len(Ticket.PRIORITY_RANKS)
+
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def ticket_prompt(ticket: Ticket) -> str:
+    """
+    Build the prompt used to generate a solution for a ticket.
+
+    Long descriptions are shortened to ``TICKET_DESCRIPTION_MAX_TOKENS``,
+    keeping their opening and closing sentences.
+
+    Args:
+        ticket (Ticket): The ticket to solve.
+
+    Returns:
+        str: The prompt sent to the AI system.
+    """
+    description = truncate_text(ticket.description, settings.TICKET_DESCRIPTION_MAX_TOKENS)
+    return f"Provide a solution for the following ticket: {description}"
+
+
+def description_hash(ticket: Ticket) -> str:
+    """
+    Return the digest identifying the ticket description a solution is generated for.
+
+    Args:
+        ticket (Ticket): The ticket.
+
+    Returns:
+        str: The SHA-256 hex digest of the description.
+    """
+    return hashlib.sha256(ticket.description.encode()).hexdigest()
+
+
+def enqueue(ticket: Ticket, system: str, requested_by=None, mode: str = "agent", speculative: bool = False) -> AISolutionJob:
+    """
+    Queue AI solution generation for a ticket.
+
+    If a job for the same ticket, description, system and mode is already
+    pending or running, that job is returned instead of queueing a
+    duplicate. An explicit request for a queued speculative job takes it
+    over at the ticket's full priority.
+
+    Args:
+        ticket (Ticket): The ticket to generate a solution for.
+        system (str): The system to use for generating the solution.
+        requested_by: The user who requested the solution, if any.
+        mode (str): The answer mode, "agent" or "fast".
+        speculative (bool): Whether the job is scheduled ahead of any request, at a lower priority.
+
+    Returns:
+        AISolutionJob: The queued or already active job.
+    """
+    return enqueue_many([ticket], system, requested_by, mode, speculative)[0]
+
+
+def enqueue_many(tickets: List[Ticket], system: str, requested_by=None, mode: str = "agent", speculative: bool = False) -> List[AISolutionJob]:
+    """
+    Queue AI solution generation for many tickets, like ``enqueue`` but with
+    one query to find active jobs and one bulk insert for the new ones.
+
+    Args:
+        tickets (List[Ticket]): The tickets to generate solutions for.
+        system (str): The system to use for generating the solutions.
+        requested_by: The user who requested the solutions, if any.
+        mode (str): The answer mode, "agent" or "fast".
+        speculative (bool): Whether the jobs are scheduled ahead of any request, at a lower priority.
+
+    Returns:
+        List[AISolutionJob]: The queued or already active job of each ticket, in order.
+    """
+    by_id = {ticket.id: ticket for ticket in tickets}
+    digests = {ticket_id: description_hash(ticket) for ticket_id, ticket in by_id.items()}
+    active: Dict[int, AISolutionJob] = {}
+    for job in AISolutionJob.objects.filter(
+        ticket_id__in=list(digests), system=system, mode=mode, status__in=AISolutionJob.ACTIVE_STATUSES
+    ).order_by('id'):
+        if job.description_hash == digests[job.ticket_id]:
+            active.setdefault(job.ticket_id, job)
+
+    if not speculative:
+        for job in active.values():
+            if job.speculative:
+                job.speculative, job.requested_by, job.priority = False, requested_by, by_id[job.ticket_id].priority_rank
+                job.save(update_fields=['speculative', 'requested_by', 'priority'])
+
+    created = AISolutionJob.objects.bulk_create(
+        AISolutionJob(
+            ticket=ticket,
+            system=system,
+            mode=mode,
+            requested_by=requested_by,
+            priority=ticket.priority_rank - (SPECULATIVE_PRIORITY_OFFSET if speculative else 0),
+            speculative=speculative,
+            description_hash=digests[ticket.id],
+        )
+        for ticket in by_id.values() if ticket.id not in active
+    )
+    active.update((job.ticket_id, job) for job in created)
+    start_workers()
+    _wakeup.set()
+    return [active[ticket.id] for ticket in tickets]
+
+
+def speculate(ticket: Ticket) -> Optional[AISolutionJob]:
+    """
+    Queue a speculative AI solution for a saved ticket, if enabled for its priority.
+
+    Pending speculative jobs for an earlier version of the description are
+    cancelled. Nothing is queued if a job was already queued for the
+    current description, or if the ticket has a solution and no job
+    history to compare against.
+
+    Args:
+        ticket (Ticket): The ticket that was saved.
+
+    Returns:
+        Optional[AISolutionJob]: The queued job, or None if nothing was queued.
+    """
+    if not settings.AI_SPECULATIVE_ENABLED or ticket.priority.upper() not in settings.AI_SPECULATIVE_PRIORITIES:
+        return None
+
+    digest = description_hash(ticket)
+    AISolutionJob.objects.filter(ticket=ticket, speculative=True, status='PENDING').exclude(
+        description_hash=digest
+    ).update(status='CANCELLED', error='Superseded by an edited description', finished_at=timezone.now())
+
+    latest = ticket.ai_solution_jobs.order_by('-created_at', '-id').values_list('description_hash', flat=True).first()
+    if latest == digest:
+        return None
+    if latest is None and AISolution.objects.filter(ticket=ticket).exists():
+        return None
+    return enqueue(ticket, settings.AI_SPECULATIVE_SYSTEM, mode=settings.AI_SPECULATIVE_MODE, speculative=True)
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Put jobs left running by a crashed or restarted worker back in the queue.
+
+    A job is given up on once it has been running for ``AI_JOB_STALE_AFTER``
+    seconds, or right away if the process on this host that claimed it is
+    gone. Each run that was cut short counts as an attempt, so a job that
+    keeps crashing its worker fails after ``AI_JOB_MAX_ATTEMPTS``.
+
+    Returns:
+        int: The number of jobs requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.AI_JOB_STALE_AFTER)
+    stale = Q(started_at__lt=cutoff)
+    orphaned = [
+        job_id
+        for job_id, claimed_by in AISolutionJob.objects.filter(
+            status='RUNNING', claimed_by__startswith=f"{socket.gethostname()}:"
+        ).values_list('id', 'claimed_by')
+        if not _process_alive(int(claimed_by.rsplit(':', 1)[1]))
+    ]
+    if orphaned:
+        stale |= Q(id__in=orphaned)
+
+    running = AISolutionJob.objects.filter(stale, status='RUNNING')
+    running.filter(attempts__gte=settings.AI_JOB_MAX_ATTEMPTS).update(
+        status='FAILED', error='The worker stopped while running the job', finished_at=timezone.now()
+    )
+    return running.update(status='PENDING', claimed_by='')
+
+
+def _worker_id() -> str:
+    # Read on every claim, as servers fork their workers after importing the app
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process on this host is still running."""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # os.kill would terminate the process; rely on AI_JOB_STALE_AFTER instead
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def claim_next() -> Optional[AISolutionJob]:
+    """
+    Atomically claim the next job to run.
+
+    Jobs run in order of ticket priority. Within a priority level, users who
+    had fewer jobs started recently go first, so one user queueing many
+    tickets cannot starve everyone else.
+
+    Returns:
+        Optional[AISolutionJob]: The claimed job, or None if the queue is empty.
+    """
+    candidates = list(
+        AISolutionJob.objects.filter(status='PENDING').order_by('-priority', 'created_at')[:CANDIDATE_WINDOW]
+    )
+    if not candidates:
+        return None
+
+    since = timezone.now() - timedelta(seconds=settings.AI_JOB_FAIRNESS_WINDOW)
+    recent = dict(
+        AISolutionJob.objects.filter(
+            requested_by__in={job.requested_by_id for job in candidates if job.requested_by_id},
+            started_at__gte=since,
+        ).values_list('requested_by').annotate(count=Count('id'))
+    )
+    candidates.sort(key=lambda job: (-job.priority, recent.get(job.requested_by_id, 0), job.created_at))
+
+    for job in candidates:
+        claimed = AISolutionJob.objects.filter(id=job.id, status='PENDING').update(
+            status='RUNNING', started_at=timezone.now(), attempts=F('attempts') + 1, claimed_by=_worker_id()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job: AISolutionJob) -> None:
+    """
+    Generate the AI solution for a claimed job and store it on the ticket.
+
+    Invalid systems and missing documentation fail the job immediately; other
+    errors are retried up to ``AI_JOB_MAX_ATTEMPTS`` times. While the AI
+    provider is unavailable the job goes back to the queue without using up
+    an attempt, and nothing is stored as the ticket's solution. A
+    speculative job whose ticket description was edited while it ran is
+    cancelled without storing its answer.
+
+    A ticket without a solution first gets the solution of a near-duplicate
+    earlier ticket, if one qualifies, without calling the LLM. A generated
+    answer is also stored for the queued jobs of other tickets with the same
+    description, system and mode, which then finish without running.
+
+    Args:
+        job (AISolutionJob): The job to run.
+    """
+    from crewai_api.crewai_setup import generate_answer
+
+    with metrics.labelled(endpoint="ai_solution_job", system=job.system):
+        _run_job(job, generate_answer)
+
+
+def _run_job(job: AISolutionJob, generate_answer) -> None:
+    if _reuse_solution(job):
+        return
+    try:
+        answer = generate_answer(job.system, ticket_prompt(job.ticket), job.mode)
+    except (ValueError, FileNotFoundError) as e:
+        job.status = 'FAILED'
+        job.error = str(e)
+    except ProviderUnavailable as e:
+        job.status = 'PENDING'
+        job.error = str(e)
+        job.attempts -= 1
+    except Exception as e:
+        print(f"Error running AI solution job {job.id}: {e}")
+        job.error = str(e)
+        job.status = 'PENDING' if job.attempts < settings.AI_JOB_MAX_ATTEMPTS else 'FAILED'
+    else:
+        if job.speculative and _superseded(job):
+            job.status = 'CANCELLED'
+            job.error = 'Superseded by an edited description'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'finished_at'])
+            return
+        with metrics.timed("db_write"):
+            AISolution.objects.update_or_create(
+                ticket=job.ticket,
+                defaults={
+                    "solution": answer, "likes": 0, "dislikes": 0, "reused_from": None,
+                    "system": job.system, "mode": job.mode,
+                },
+            )
+            _share_solution(job, answer)
+        job.status = 'DONE'
+        job.error = ''
+
+    if job.status != 'PENDING':
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'attempts', 'finished_at'])
+
+
+def _reuse_solution(job: AISolutionJob) -> bool:
+    """Store a near-duplicate ticket's solution for the job's ticket, if one qualifies."""
+    if not settings.AI_REUSE_ENABLED or AISolution.objects.filter(ticket_id=job.ticket_id).exists():
+        return False
+    match = find_reusable_solution(job.ticket, job.system, job.mode)
+    metrics.CACHE_REQUESTS.inc(cache="ticket_reuse", result="hit" if match else "miss")
+    if match is None:
+        return False
+
+    source, _ = match
+    with metrics.timed("db_write"):
+        AISolution.objects.update_or_create(
+            ticket=job.ticket,
+            defaults={
+                "solution": source.solution, "likes": 0, "dislikes": 0, "reused_from_id": source.ticket_id,
+                "system": job.system, "mode": job.mode,
+            },
+        )
+    job.status = 'DONE'
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return True
+
+
+def _share_solution(job: AISolutionJob, answer: str) -> int:
+    """
+    Store a finished job's answer for the queued jobs of other tickets with the same description.
+
+    The matching jobs are finished in one update and their solutions written
+    in one bulk upsert, so a batch of identical tickets calls the LLM once.
+
+    Args:
+        job (AISolutionJob): The finished job.
+        answer (str): The answer generated for it.
+
+    Returns:
+        int: The number of jobs finished with the shared answer.
+    """
+    digest = description_hash(job.ticket)
+    candidates = {}
+    for sibling in AISolutionJob.objects.filter(
+        status='PENDING', system=job.system, mode=job.mode, description_hash=digest
+    ).exclude(ticket_id=job.ticket_id).select_related('ticket'):
+        if description_hash(sibling.ticket) == digest:
+            candidates.setdefault(sibling.ticket_id, sibling.id)
+    if not candidates:
+        return 0
+
+    finished = timezone.now()
+    with transaction.atomic():
+        # Jobs claimed by another worker in the meantime are left to it
+        AISolutionJob.objects.filter(id__in=candidates.values(), status='PENDING').update(
+            status='DONE', error='', finished_at=finished,
+        )
+        ticket_ids = list(AISolutionJob.objects.filter(
+            id__in=candidates.values(), status='DONE', finished_at=finished,
+        ).values_list('ticket_id', flat=True))
+        AISolution.objects.bulk_create(
+            [
+                AISolution(
+                    ticket_id=ticket_id, solution=answer, reused_from_id=job.ticket_id,
+                    system=job.system, mode=job.mode,
+                )
+                for ticket_id in ticket_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['ticket'],
+            update_fields=['solution', 'likes', 'dislikes', 'reused_from', 'system', 'mode'],
+        )
+    metrics.CACHE_REQUESTS.inc(len(ticket_ids), cache="ticket_share", result="hit")
+    return len(ticket_ids)
+
+
+def _superseded(job: AISolutionJob) -> bool:
+    """Check whether a speculative job, not since taken over by a request, is for an outdated description."""
+    if not AISolutionJob.objects.filter(id=job.id, speculative=True).exists():
+        return False
+    ticket = Ticket.objects.filter(id=job.ticket_id).only('description').first()
+    return ticket is None or description_hash(ticket) != job.description_hash
+
+
+def work(stop: Optional[threading.Event] = None) -> None:
+    """
+    Run queued jobs until ``stop`` is set.
+
+    An unexpected error, such as a locked database, is logged and the
+    worker keeps going; the job it was running goes back to the queue, or
+    fails once it used up its attempts.
+
+    Args:
+        stop (Optional[threading.Event]): Set to make the worker exit after its current job.
+    """
+    while stop is None or not stop.is_set():
+        job = None
+        try:
+            # Leave jobs queued while the circuit breaker is open instead of failing them one by one
+            retry_after = get_breaker().retry_after()
+            if retry_after:
+                _wakeup.wait(min(retry_after, settings.AI_JOB_POLL_INTERVAL))
+                _wakeup.clear()
+                continue
+            close_old_connections()
+            job = claim_next()
+            if job is None:
+                requeue_stale_jobs()
+                _wakeup.wait(settings.AI_JOB_POLL_INTERVAL)
+                _wakeup.clear()
+                continue
+            run_job(job)
+            if job.status == 'PENDING':
+                # The job was requeued; give the provider time before claiming it again
+                _wakeup.wait(settings.AI_JOB_POLL_INTERVAL)
+                _wakeup.clear()
+        except Exception as e:
+            print(f"Error in AI solution worker: {e}")
+            if job is not None:
+                _release(job, e)
+            _wakeup.wait(settings.AI_JOB_POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def _release(job: AISolutionJob, error: Exception) -> None:
+    """Put a job whose run crashed back in the queue, or fail it once it used up its attempts."""
+    status = 'PENDING' if job.attempts < settings.AI_JOB_MAX_ATTEMPTS else 'FAILED'
+    try:
+        close_old_connections()
+        AISolutionJob.objects.filter(id=job.id, status='RUNNING').update(
+            status=status, error=str(error), finished_at=timezone.now() if status == 'FAILED' else None
+        )
+    except Exception as e:
+        # The job stays running until requeue_stale_jobs picks it up
+        print(f"Error releasing AI solution job {job.id}: {e}")
+
+
+def start_workers() -> None:
+    """
+    Start the in-process worker pool, if enabled, and replace any worker
+    thread that died.
+
+    Called when a job is queued or polled rather than when the application
+    loads, so commands that import the app, such as ``migrate``, and the
+    master process of pre-fork servers never start threads. Jobs left
+    running by a previous process are requeued first so they survive
+    restarts.
+    """
+    if not settings.AI_JOB_INLINE_WORKERS or _all_alive():
+        return
+    with _workers_lock:
+        if _all_alive():
+            return
+        if not _workers:
+            requeue_stale_jobs()
+        for index in range(settings.AI_JOB_WORKERS):
+            if index < len(_workers) and _workers[index].is_alive():
+                continue
+            worker = threading.Thread(target=work, name=f"ai-solution-worker-{index}", daemon=True)
+            worker.start()
+            if index < len(_workers):
+                print(f"Restarting AI solution worker {index}")
+                _workers[index] = worker
+            else:
+                _workers.append(worker)
+
+
+def _all_alive() -> bool:
+    return len(_workers) >= settings.AI_JOB_WORKERS and all(worker.is_alive() for worker in _workers)
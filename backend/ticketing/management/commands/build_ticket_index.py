@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from ticketing.models import Ticket, TicketLSHBand
+from ticketing.similarity import band_keys
+
+
+class Command(BaseCommand):
+    help = "Build the near-duplicate index for existing tickets. New and edited tickets are indexed as they are saved."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Re-index tickets that are already indexed.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.only('id', 'description').order_by('id')
+        if options['rebuild']:
+            TicketLSHBand.objects.all().delete()
+        else:
+            tickets = tickets.filter(lsh_bands__isnull=True)
+
+        bands = []
+        indexed = 0
+        for ticket in tickets.iterator(chunk_size=options['batch_size']):
+            bands.extend(TicketLSHBand(ticket_id=ticket.id, key=key) for key in band_keys(ticket.description))
+            indexed += 1
+            if len(bands) >= options['batch_size']:
+                TicketLSHBand.objects.bulk_create(bands)
+                bands = []
+        TicketLSHBand.objects.bulk_create(bands)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} ticket(s)"))
@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from ticketing.export import CSV_COLUMNS, EXPORT_FORMATS, encode, export_rows
+from ticketing.models import Ticket
+
+
+def resume_point(path: str, export_format: str) -> int:
+    """
+    Find where an interrupted export stopped.
+
+    The file is scanned record by record, so memory stays flat. A partially
+    written last record is cut off so the export can be appended to.
+
+    Args:
+        path (str): The export file.
+        export_format (str): One of ``EXPORT_FORMATS``.
+
+    Returns:
+        int: The ID of the last complete ticket in the file, or 0.
+    """
+    last_id, last_record, end = 0, None, 0
+    with open(path, 'rb+') as output:
+        raw = [b'']
+
+        def lines():
+            for line in iter(output.readline, b''):
+                raw[0] = line
+                yield line.decode('utf-8')
+
+        records = csv.reader(lines()) if export_format == 'csv' else lines()
+        try:
+            for record in records:
+                # A record cut short ends without a newline, or lacks CSV columns
+                if not raw[0].endswith(b'\n'):
+                    break
+                if export_format == 'csv':
+                    if record == CSV_COLUMNS:
+                        end = output.tell()
+                        continue
+                    if len(record) != len(CSV_COLUMNS):
+                        break
+                    last_id = int(record[0])
+                else:
+                    last_record = record
+                end = output.tell()
+        except (UnicodeDecodeError, csv.Error):
+            # The unfinished last record does not parse
+            pass
+        output.truncate(end)
+    if last_record:
+        last_id = json.loads(last_record)['id']
+    return last_id
+
+
+class Command(BaseCommand):
+    help = "Export tickets with their AI solutions as NDJSON or CSV, streaming rows so memory stays flat."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write to (default is standard output).')
+        parser.add_argument('--after-id', type=int, default=0, help='Only export tickets with a greater ID.')
+        parser.add_argument('--resume', action='store_true', help='Append to --output after the last ticket it holds.')
+        parser.add_argument('--chunk-size', type=int, default=0, help='Rows per database round trip (default is TICKET_EXPORT_CHUNK_SIZE).')
+
+    def handle(self, *args, **options):
+        export_format, path, after_id = options['format'], options['output'], options['after_id']
+        resuming = options['resume'] and path and os.path.exists(path)
+        if options['resume'] and not path:
+            raise CommandError("--resume needs --output")
+        if resuming:
+            after_id = resume_point(path, export_format)
+            self.stderr.write(f"Resuming after ticket {after_id}")
+
+        output = open(path, 'ab' if resuming else 'wb') if path else sys.stdout.buffer
+        exported, last_id = 0, after_id
+
+        def counted(tickets):
+            nonlocal exported, last_id
+            for ticket in tickets:
+                exported, last_id = exported + 1, ticket['id']
+                yield ticket
+
+        rows = export_rows(Ticket.objects.all(), after_id, options['chunk_size'])
+        try:
+            header = not (resuming and os.path.getsize(path))
+            for block in encode(counted(rows), export_format, header=header, batch_size=options['chunk_size']):
+                output.write(block)
+                output.flush()
+        finally:
+            if path:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f"Exported {exported} ticket(s), last ID {last_id}"))
@@ -0,0 +1,29 @@
+import threading
+from django.core.management.base import BaseCommand
+from ticketing.jobs import requeue_stale_jobs, work
+
+
+class Command(BaseCommand):
+    help = "Run AI solution jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker threads.')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        stop = threading.Event()
+        workers = [
+            threading.Thread(target=work, args=(stop,), name=f"ai-solution-worker-{index}", daemon=True)
+            for index in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"Running {len(workers)} AI solution worker(s)"))
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
@@ -0,0 +1,93 @@
+import random
+import secrets
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from authentication.models import Token
+from ticketing.models import Ticket, AISolution, TicketLSHBand
+from ticketing.similarity import band_keys
+
+PRIORITIES = ['LOW', 'MEDIUM', 'HIGH']
+STATUSES = ['OPEN', 'IN_PROGRESS', 'CLOSED']
+
+COMPONENTS = ['login page', 'REST API', 'serializer', 'admin panel', 'payment webhook', 'search', 'report export', 'email notifications']
+SYMPTOMS = ['returns a 500 error', 'times out', 'shows a blank page', 'rejects valid input', 'is very slow', 'logs a permission error']
+TRIGGERS = ['after the last upgrade', 'when more than 100 users are online', 'for accounts created this week', 'only in production', 'after changing the settings']
+
+
+def fake_description(rng: random.Random, index: int) -> str:
+    """Build a ticket description from a small vocabulary, so many tickets are near-duplicates."""
+    return (
+        f"The {rng.choice(COMPONENTS)} {rng.choice(SYMPTOMS)} {rng.choice(TRIGGERS)}. "
+        f"It started on build {rng.randint(1, 50)} and affects customer #{index % 997}. "
+        f"Steps to reproduce: open the {rng.choice(COMPONENTS)} and repeat the request."
+    )
+
+
+class Command(BaseCommand):
+    help = "Seed the database with users, tokens, tickets and AI solutions for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--solution-ratio', type=float, default=0.3, help='Share of tickets that get an AI solution.')
+        parser.add_argument('--like-ratio', type=float, default=0.2, help='Share of solutions that are liked.')
+        parser.add_argument('--password', default='bench-password', help='Password of every seeded user.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--no-index', action='store_true', help='Skip the near-duplicate index.')
+        parser.add_argument('--clear', action='store_true', help='Delete seeded users and their tickets first.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        if options['clear']:
+            User.objects.filter(username__startswith='bench-').delete()
+
+        # Hashing is slow on purpose, so every seeded user shares one hash
+        password = make_password(options['password'])
+        User.objects.bulk_create(
+            [User(username=f'bench-user-{index}', email=f'bench-user-{index}@example.com', password=password)
+             for index in range(options['users'])]
+            + [User(username='bench-admin', email='bench-admin@example.com', password=password, is_staff=True, is_superuser=True)],
+            ignore_conflicts=True,
+        )
+        users = list(User.objects.filter(username__startswith='bench-').values_list('id', flat=True))
+        with_tokens = set(Token.objects.filter(user_id__in=users).values_list('user_id', flat=True))
+        Token.objects.bulk_create([Token(user_id=user_id, key=secrets.token_hex(20)) for user_id in users if user_id not in with_tokens])
+
+        created = 0
+        while created < options['tickets']:
+            count = min(batch_size, options['tickets'] - created)
+            tickets = Ticket.objects.bulk_create([
+                Ticket(
+                    title=f"Ticket {created + index}",
+                    description=fake_description(rng, created + index),
+                    priority=rng.choice(PRIORITIES),
+                    status=rng.choice(STATUSES),
+                    assigned_to_id=rng.choice(users),
+                )
+                for index in range(count)
+            ])
+            AISolution.objects.bulk_create([
+                AISolution(
+                    ticket=ticket,
+                    solution=f"Check the configuration of the affected component and redeploy. (seeded for ticket {ticket.id})",
+                    likes=int(rng.random() < options['like_ratio']),
+                    system='system1',
+                    mode='agent',
+                )
+                for ticket in tickets if rng.random() < options['solution_ratio']
+            ])
+            if not options['no_index']:
+                TicketLSHBand.objects.bulk_create(
+                    [TicketLSHBand(ticket=ticket, key=key) for ticket in tickets for key in band_keys(ticket.description)],
+                    batch_size=batch_size,
+                )
+            created += count
+            self.stdout.write(f"Seeded {created}/{options['tickets']} tickets")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users (password '{options['password']}') and {created} tickets"
+        ))
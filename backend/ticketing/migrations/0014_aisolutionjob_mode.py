@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0013_aisolutionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisolutionjob',
+            name='mode',
+            field=models.CharField(default='agent', max_length=10),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0014_aisolutionjob_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisolutionjob',
+            name='description_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='aisolutionjob',
+            name='speculative',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='aisolutionjob',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=10),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 14:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0015_aisolutionjob_speculative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisolution',
+            name='reused_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reused_solutions', to='ticketing.ticket'),
+        ),
+        migrations.CreateModel(
+            name='TicketLSHBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=24)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_bands', to='ticketing.ticket')),
+            ],
+        ),
+    ]
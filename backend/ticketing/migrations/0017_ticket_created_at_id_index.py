@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0016_aisolution_reused_from_ticketlshband'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_at', 'id'], name='ticketing_t_created_f457dc_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-18 14:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0017_ticket_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='ticketing_t_status_94e1ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['priority', 'created_at', 'id'], name='ticketing_t_priorit_57710d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='ticketing_t_assigne_bbc7ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at'], name='ticketing_t_updated_ddfcbf_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1 on 2026-10-18 14:36
+
+from django.db import migrations
+
+# SQLite: an FTS5 index over the ticket table's title and description, kept in
+# sync by triggers. Migrations that make SQLite rebuild ticketing_ticket drop
+# its triggers, so such migrations must run SQLITE_TRIGGERS again.
+SQLITE_TABLE = """
+CREATE VIRTUAL TABLE ticketing_ticket_fts USING fts5(
+    title, description, content='ticketing_ticket', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER ticketing_ticket_fts_insert AFTER INSERT ON ticketing_ticket BEGIN
+        INSERT INTO ticketing_ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER ticketing_ticket_fts_delete AFTER DELETE ON ticketing_ticket BEGIN
+        INSERT INTO ticketing_ticket_fts(ticketing_ticket_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER ticketing_ticket_fts_update AFTER UPDATE OF title, description ON ticketing_ticket BEGIN
+        INSERT INTO ticketing_ticket_fts(ticketing_ticket_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO ticketing_ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+# PostgreSQL: a generated tsvector column, title weighted above description,
+# with a GIN index. The database recomputes it on every write.
+POSTGRESQL_SQL = [
+    """
+    ALTER TABLE ticketing_ticket ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX ticketing_ticket_search_idx ON ticketing_ticket USING GIN (search_vector)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_TABLE)
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+        schema_editor.execute("INSERT INTO ticketing_ticket_fts(ticketing_ticket_fts) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        for statement in POSTGRESQL_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS ticketing_ticket_fts_{action}")
+        schema_editor.execute("DROP TABLE IF EXISTS ticketing_ticket_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS ticketing_ticket_search_idx")
+        schema_editor.execute("ALTER TABLE ticketing_ticket DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0018_ticket_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
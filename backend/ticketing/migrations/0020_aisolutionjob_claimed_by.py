@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0019_ticket_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisolutionjob',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticketing', '0020_aisolutionjob_claimed_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aisolution',
+            name='mode',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='aisolution',
+            name='system',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
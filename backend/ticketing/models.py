@@ -15,6 +15,12 @@ class Ticket(models.Model):
         ('IN_PROGRESS', 'In Progress'),
         ('CLOSED', 'Closed'),
     ]
+    # Scheduling rank of each priority, higher runs first
+    PRIORITY_RANKS = {
+        'LOW': 0,
+        'MEDIUM': 1,
+        'HIGH': 2,
+    }
 
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -24,9 +30,67 @@ class Ticket(models.Model):
     status = models.CharField(max_length=11, choices=STATUS_CHOICES, default='OPEN')
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='assigned_tickets')
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the ticket list, unfiltered and by each equality filter
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['priority', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'created_at', 'id']),
+            models.Index(fields=['updated_at']),
+        ]
+
+    @property
+    def priority_rank(self):
+        return self.PRIORITY_RANKS.get(self.priority.upper(), self.PRIORITY_RANKS['MEDIUM'])
+
 class AISolution(models.Model):
     ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, related_name='ai_solution')
     solution = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.IntegerField(default=0)
     dislikes = models.IntegerField(default=0)
+    # The near-duplicate ticket whose solution was reused instead of generating one
+    reused_from = models.ForeignKey(Ticket, on_delete=models.SET_NULL, null=True, blank=True, related_name='reused_solutions')
+    # The document system and answer mode the solution was generated with, blank if unknown
+    system = models.CharField(max_length=50, blank=True, default='')
+    mode = models.CharField(max_length=10, blank=True, default='')
+
+class TicketLSHBand(models.Model):
+    """One band of a ticket description's MinHash signature, used to find near-duplicate tickets."""
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='lsh_bands')
+    key = models.CharField(max_length=24, db_index=True)
+
+class AISolutionJob(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = ('PENDING', 'RUNNING')
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='ai_solution_jobs')
+    system = models.CharField(max_length=50)
+    mode = models.CharField(max_length=10, default='agent')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='ai_solution_jobs')
+    priority = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    # Scheduled on ticket save rather than requested by a user
+    speculative = models.BooleanField(default=False)
+    # SHA-256 of the ticket description the job was queued for
+    description_hash = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    # "host:pid" of the process running the job
+    claimed_by = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'created_at']),
+        ]
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, QuerySet
+from .models import Ticket
+
+# Cache key of the estimated number of tickets
+COUNT_CACHE_KEY = 'ticketing:ticket_count_estimate'
+
+
+def encode_cursor(ticket: Union[Ticket, dict]) -> str:
+    """
+    Build the opaque cursor pointing just past a ticket.
+
+    Args:
+        ticket (Union[Ticket, dict]): The last ticket of a page, or its ``.values()`` row.
+
+    Returns:
+        str: A URL-safe token holding the ticket's ``created_at`` and ``id``.
+    """
+    if isinstance(ticket, dict):
+        created_at, ticket_id = ticket['created_at'], ticket['id']
+    else:
+        created_at, ticket_id = ticket.created_at, ticket.id
+    payload = json.dumps([created_at.isoformat(), ticket_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Read the position held by a cursor.
+
+    Args:
+        cursor (str): A cursor returned by ``encode_cursor``.
+
+    Returns:
+        Tuple[datetime, int]: The ``created_at`` and ``id`` of the last ticket already returned.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, ticket_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_size(limit: Optional[int]) -> int:
+    """
+    Clamp a requested page size to the configured bounds.
+
+    Args:
+        limit (Optional[int]): The requested size, or None for ``TICKET_PAGE_SIZE``.
+
+    Returns:
+        int: The page size, between 1 and ``TICKET_PAGE_SIZE_MAX``.
+    """
+    return max(1, min(limit or settings.TICKET_PAGE_SIZE, settings.TICKET_PAGE_SIZE_MAX))
+
+
+def paginate(tickets: QuerySet, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of tickets ordered by ``(created_at, id)``.
+
+    The page starts right after the cursor's position instead of at an
+    offset, so the ``(created_at, id)`` index serves every page with a
+    range scan and later pages cost the same as the first.
+
+    Args:
+        tickets (QuerySet): The tickets, or their ``.values()`` rows, to page through.
+        cursor (Optional[str]): The cursor returned with the previous page, or None for the first page.
+        limit (int): The page size.
+
+    Returns:
+        tuple: The tickets of the page and the cursor of the next page, or None on the last page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    tickets = tickets.order_by('created_at', 'id')
+    if cursor:
+        created_at, ticket_id = decode_cursor(cursor)
+        # The redundant created_at__gte bound lets the database seek the index
+        tickets = tickets.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=ticket_id),
+            created_at__gte=created_at,
+        )
+    page = list(tickets[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    return page[:limit], encode_cursor(page[limit - 1])
+
+
+def estimate_count(tickets: Optional[QuerySet] = None, filters: Optional[Dict] = None) -> int:
+    """
+    Estimate the number of tickets, in total or matching filters.
+
+    The total on PostgreSQL is the planner's row estimate read from the
+    catalog; everything else is counted. Either way the result is cached per
+    set of filters for ``TICKET_COUNT_CACHE_TTL`` seconds, so paging does not
+    scan the table.
+
+    Args:
+        tickets (Optional[QuerySet]): The filtered tickets (default is all tickets).
+        filters (Optional[Dict]): The filters applied to ``tickets``, identifying the cached count.
+
+    Returns:
+        int: The approximate number of tickets.
+    """
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    key = COUNT_CACHE_KEY
+    if filters:
+        key += ':' + hashlib.sha256(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    count = -1
+    if not filters and connection.vendor == 'postgresql':
+        with connection.cursor() as db:
+            db.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [Ticket._meta.db_table])
+            row = db.fetchone()
+        # reltuples is -1 until the table is first vacuumed or analyzed
+        count = int(row[0]) if row else -1
+    if count < 0:
+        count = (tickets if filters and tickets is not None else Ticket.objects).count()
+    cache.set(key, count, settings.TICKET_COUNT_CACHE_TTL)
+    return count
@@ -1,7 +1,8 @@
 from ninja import Schema
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
+from django.core.exceptions import ObjectDoesNotExist
 
 class TicketIn(Schema):
     title: str
@@ -9,17 +10,48 @@ class TicketIn(Schema):
     priority: str
 
 
+class TicketFilterIn(Schema):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assigned_to: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    q: Optional[str] = None
+
+
 class AISolutionOut(BaseModel):
     id: int
     solution: str
     created_at: datetime
     likes: int
     dislikes: int
+    reused_from_id: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+def solution_out(ticket) -> Optional[AISolutionOut]:
+    """
+    Serialize a ticket's AI solution.
+
+    Load tickets with ``select_related('ai_solution')`` so this reads the
+    solution, or its absence, without a query.
+
+    Args:
+        ticket: The ticket.
+
+    Returns:
+        Optional[AISolutionOut]: The solution, or None if the ticket has none.
+    """
+    try:
+        return AISolutionOut.from_orm(ticket.ai_solution)
+    except ObjectDoesNotExist:
+        return None
+
+
 class TicketOut(BaseModel):
     id: int
     title: str
@@ -44,9 +76,109 @@ class TicketOut(BaseModel):
             updated_at=ticket.updated_at,
             priority=ticket.priority,
             status=ticket.status,
-            assigned_to=ticket.assigned_to.id if ticket.assigned_to else None,
-            ai_solution=AISolutionOut.from_orm(ticket.ai_solution) if hasattr(ticket, 'ai_solution') else None
+            assigned_to=ticket.assigned_to_id,
+            ai_solution=solution_out(ticket)
         )
 
+# Columns read by ticket_row, for Ticket.objects.values()
+TICKET_VALUES = (
+    'id', 'title', 'description', 'created_at', 'updated_at', 'priority', 'status', 'assigned_to',
+    'ai_solution__id', 'ai_solution__solution', 'ai_solution__created_at', 'ai_solution__likes',
+    'ai_solution__dislikes', 'ai_solution__reused_from',
+)
+
+
+def ticket_row(row: dict) -> dict:
+    """
+    Shape a ``.values(*TICKET_VALUES)`` row like ``TicketOut`` without validating it.
+
+    Args:
+        row (dict): The ticket row.
+
+    Returns:
+        dict: The ticket, with its solution nested under ``ai_solution``.
+    """
+    solution = None
+    if row['ai_solution__id'] is not None:
+        solution = {
+            'id': row['ai_solution__id'],
+            'solution': row['ai_solution__solution'],
+            'created_at': row['ai_solution__created_at'],
+            'likes': row['ai_solution__likes'],
+            'dislikes': row['ai_solution__dislikes'],
+            'reused_from_id': row['ai_solution__reused_from'],
+        }
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at'],
+        'priority': row['priority'],
+        'status': row['status'],
+        'assigned_to': row['assigned_to'],
+        'ai_solution': solution,
+    }
+
+class TicketPageOut(BaseModel):
+    items: List[TicketOut]
+    next_cursor: Optional[str] = None
+    count_estimate: Optional[int] = None
+
+class SimilarTicketOut(BaseModel):
+    ticket_id: int
+    title: str
+    similarity: float
+    solution: Optional[AISolutionOut] = None
+
+
 class AISolutionIn(Schema):
     ticket_id: int
+
+
+class AISolutionJobOut(BaseModel):
+    id: int
+    ticket_id: int
+    system: str
+    mode: str
+    status: str
+    error: str
+    speculative: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    solution: Optional[AISolutionOut] = None
+
+    class Config:
+        from_attributes = True
+
+    @classmethod
+    def from_orm(cls, job):
+        solution = None
+        if job.status == 'DONE':
+            solution = solution_out(job.ticket)
+        return cls(
+            id=job.id,
+            ticket_id=job.ticket_id,
+            system=job.system,
+            mode=job.mode,
+            status=job.status,
+            error=job.error,
+            speculative=job.speculative,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            solution=solution
+        )
+
+
+class AISolutionBatchIn(Schema):
+    ticket_ids: Optional[List[int]] = None
+    status: Optional[str] = None
+    missing_only: bool = True
+    system: str = "system1"
+    mode: str = "agent"
+
+
+class AISolutionBatchOut(Schema):
+    jobs: List[AISolutionJobOut]
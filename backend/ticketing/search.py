@@ -0,0 +1,104 @@
+import re
+from datetime import datetime
+from typing import Dict, List
+from django.db import connection
+from django.db.models import BooleanField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from .models import Ticket
+
+# Ticket filters mapped to their lookups, each served by an index starting with its field
+FILTER_LOOKUPS = {
+    'status': 'status',
+    'priority': 'priority',
+    'assigned_to': 'assigned_to_id',
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+    'updated_after': 'updated_at__gte',
+    'updated_before': 'updated_at__lt',
+}
+
+# Text configuration of the PostgreSQL search_vector column
+SEARCH_CONFIG = 'english'
+
+_WORD = re.compile(r'\w+')
+
+
+def filter_tickets(tickets: QuerySet, filters: Dict) -> QuerySet:
+    """
+    Narrow tickets down by the given filters and search text.
+
+    Args:
+        tickets (QuerySet): The tickets, or their ``.values()`` rows.
+        filters (Dict): Values keyed by the names in ``FILTER_LOOKUPS``, and optionally the search text as ``q``.
+
+    Returns:
+        QuerySet: The matching tickets.
+    """
+    lookups = {}
+    for name, value in filters.items():
+        if name not in FILTER_LOOKUPS or value is None:
+            continue
+        if name in ('status', 'priority'):
+            value = value.upper()
+        elif isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        lookups[FILTER_LOOKUPS[name]] = value
+    tickets = tickets.filter(**lookups)
+    if filters.get('q'):
+        tickets = search(tickets, filters['q'])
+    return tickets
+
+
+def fts5_query(words: List[str]) -> str:
+    """
+    Build an SQLite FTS5 query matching tickets that contain every word.
+
+    Each word is quoted so user input cannot use the FTS5 query syntax, and
+    the last one also matches as a prefix for search-as-you-type.
+
+    Args:
+        words (List[str]): The search words.
+
+    Returns:
+        str: The FTS5 ``MATCH`` expression.
+    """
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def search(tickets: QuerySet, text: str) -> QuerySet:
+    """
+    Keep the tickets whose title or description matches a full-text search.
+
+    SQLite matches against the FTS5 index and PostgreSQL against the GIN
+    indexed ``search_vector`` column, both created by the ``0019_ticket_search``
+    migration. Other databases fall back to a case-insensitive substring
+    match of every word, which scans the table.
+
+    Args:
+        tickets (QuerySet): The tickets, or their ``.values()`` rows.
+        text (str): The search text.
+
+    Returns:
+        QuerySet: The matching tickets.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return tickets
+
+    table = Ticket._meta.db_table
+    if connection.vendor == 'sqlite':
+        return tickets.filter(RawSQL(
+            f'"{table}"."id" IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s)',
+            [fts5_query(words)],
+            output_field=BooleanField(),
+        ))
+    if connection.vendor == 'postgresql':
+        return tickets.filter(RawSQL(
+            f'"{table}"."search_vector" @@ websearch_to_tsquery(%s::regconfig, %s)',
+            [SEARCH_CONFIG, text],
+            output_field=BooleanField(),
+        ))
+    for word in words:
+        tickets = tickets.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    return tickets
@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .jobs import speculate
+from .models import Ticket
+from .similarity import index_ticket
+
+
+@receiver(post_save, sender=Ticket)
+def schedule_speculative_solution(sender, instance: Ticket, **kwargs):
+    """
+    Queue a speculative AI solution once a saved ticket is committed.
+
+    Args:
+        sender: The Ticket model.
+        instance (Ticket): The saved ticket.
+        **kwargs: The remaining signal arguments.
+    """
+    # A failure to queue must not fail the save, so errors are only logged
+    transaction.on_commit(lambda: speculate(instance), robust=True)
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket_description(sender, instance: Ticket, **kwargs):
+    """
+    Add a saved ticket to the near-duplicate index once it is committed.
+
+    Saves limited to other fields leave the index alone.
+
+    Args:
+        sender: The Ticket model.
+        instance (Ticket): The saved ticket.
+        **kwargs: The remaining signal arguments.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'description' not in update_fields:
+        return
+    transaction.on_commit(lambda: index_ticket(instance), robust=True)
@@ -0,0 +1,174 @@
+import hashlib
+import re
+from typing import List, Optional, Set, Tuple
+import numpy as np
+from django.conf import settings
+from .models import Ticket, AISolution, TicketLSHBand
+
+# MinHash signature length, split into LSH bands of NUM_PERM // LSH_BANDS rows. With 16
+# bands of 4 rows, pairs with a Jaccard similarity of 0.5 share a band about 64% of the
+# time and pairs at 0.8 over 99% of the time.
+NUM_PERM = 64
+LSH_BANDS = 16
+
+# Most candidate tickets compared exactly per lookup
+CANDIDATE_LIMIT = 200
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_random = np.random.RandomState(1)
+_PERM_A = _random.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _random.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    Split a text into its lowercase word n-grams.
+
+    Args:
+        text (str): The text.
+        size (int): The number of words per shingle.
+
+    Returns:
+        Set[str]: The shingles.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[start:start + size]) for start in range(len(words) - size + 1)}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """
+    Return the Jaccard similarity of two shingle sets.
+
+    Args:
+        first (Set[str]): The first set.
+        second (Set[str]): The second set.
+
+    Returns:
+        float: The size of the intersection over the size of the union.
+    """
+    return len(first & second) / max(len(first | second), 1)
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    Compute the MinHash signature of a text's shingles.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        np.ndarray: ``NUM_PERM`` unsigned 64-bit minimum hash values.
+    """
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little') for shingle in shingles(text)],
+        dtype=np.uint64,
+    )
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % np.uint64(_MERSENNE_PRIME) & np.uint64(_MAX_HASH)
+    return permuted.min(axis=0)
+
+
+def band_keys(text: str) -> List[str]:
+    """
+    Return the LSH bucket keys of a text, one per band of its MinHash signature.
+
+    Texts sharing any key are candidate near-duplicates.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The keys, prefixed with their band number.
+    """
+    rows = NUM_PERM // LSH_BANDS
+    signature = minhash(text)
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+
+
+def index_ticket(ticket: Ticket) -> None:
+    """
+    Add a ticket to the near-duplicate index, or bring its entry up to date.
+
+    Only bands whose key changed are rewritten, so saving a ticket without
+    editing its description costs one read.
+
+    Args:
+        ticket (Ticket): The saved ticket.
+    """
+    keys = set(band_keys(ticket.description))
+    stored = set(TicketLSHBand.objects.filter(ticket=ticket).values_list('key', flat=True))
+    if stored - keys:
+        TicketLSHBand.objects.filter(ticket=ticket, key__in=stored - keys).delete()
+    if keys - stored:
+        TicketLSHBand.objects.bulk_create(TicketLSHBand(ticket=ticket, key=key) for key in keys - stored)
+
+
+def find_similar(ticket: Ticket, limit: int = 5, threshold: Optional[float] = None) -> List[Tuple[Ticket, float]]:
+    """
+    Find earlier tickets whose descriptions are near-duplicates of a ticket's.
+
+    Candidates sharing an LSH band with the ticket are compared by the exact
+    Jaccard similarity of their word 3-grams.
+
+    Args:
+        ticket (Ticket): The ticket to match.
+        limit (int): The maximum number of tickets to return.
+        threshold (Optional[float]): The minimum similarity (default is ``AI_REUSE_SIMILARITY``).
+
+    Returns:
+        List[Tuple[Ticket, float]]: The similar tickets, with ``ai_solution`` selected, most similar first.
+    """
+    threshold = settings.AI_REUSE_SIMILARITY if threshold is None else threshold
+    candidates = (
+        Ticket.objects.filter(lsh_bands__key__in=band_keys(ticket.description))
+        .exclude(id=ticket.id)
+        .select_related('ai_solution')
+        .distinct()
+        .order_by('-id')[:CANDIDATE_LIMIT]
+    )
+    target = shingles(ticket.description)
+    matches = []
+    for candidate in candidates:
+        similarity = jaccard(target, shingles(candidate.description))
+        if similarity >= threshold:
+            matches.append((candidate, similarity))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[:limit]
+
+
+def find_reusable_solution(ticket: Ticket, system: str, mode: str) -> Optional[Tuple[AISolution, float]]:
+    """
+    Find the best solution of a near-duplicate ticket to reuse for a ticket.
+
+    Only solutions generated with the requested system and mode qualify,
+    and disliked solutions are never reused. Liked solutions rank above
+    unrated ones, then closer matches above less close ones.
+
+    Args:
+        ticket (Ticket): The ticket that needs a solution.
+        system (str): The system the solution is requested from.
+        mode (str): The requested answer mode, "agent" or "fast".
+
+    Returns:
+        Optional[Tuple[AISolution, float]]: The solution and its ticket's similarity, or None.
+    """
+    rated = []
+    for candidate, similarity in find_similar(ticket, limit=CANDIDATE_LIMIT):
+        try:
+            solution = candidate.ai_solution
+        except AISolution.DoesNotExist:
+            continue
+        if (solution.system, solution.mode) != (system, mode):
+            continue
+        if solution.dislikes == 0 and solution.likes >= settings.AI_REUSE_MIN_LIKES:
+            rated.append((solution, similarity))
+    if not rated:
+        return None
+    return max(rated, key=lambda match: (match[0].likes > 0, match[1]))
@@ -1,3 +1,569 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from authentication.models import Token
+from .models import Ticket, AISolution, AISolutionJob, TicketLSHBand
+from .pagination import COUNT_CACHE_KEY
+from .similarity import LSH_BANDS, find_reusable_solution, index_ticket
 
-# Create your tests here.
+
+class TicketQueryBudgetTests(TestCase):
+    """Serializing tickets costs a fixed number of queries, however many tickets there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='agent', password='password')
+        cls.token = Token.objects.create(user=cls.user, key='a' * 40)
+        cls.solved = cls._create_tickets(3, with_solutions=True)
+        cls.unsolved = cls._create_tickets(3, with_solutions=False)
+
+    @classmethod
+    def _create_tickets(cls, count, with_solutions):
+        tickets = Ticket.objects.bulk_create(
+            Ticket(title=f"Ticket {number}", description=f"Description {number}", assigned_to=cls.user)
+            for number in range(count)
+        )
+        if with_solutions:
+            AISolution.objects.bulk_create(AISolution(ticket=ticket, solution="Restart it") for ticket in tickets)
+        return tickets
+
+    def setUp(self):
+        cache.delete(COUNT_CACHE_KEY)
+
+    def test_list_costs_one_query_per_page(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tickets/tickets')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 6)
+
+        self._create_tickets(20, with_solutions=True)
+        self._create_tickets(20, with_solutions=False)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tickets/tickets', {'limit': 100})
+        self.assertEqual(len(response.json()['items']), 46)
+
+    def test_list_serializes_assignee_and_solution(self):
+        items = {item['id']: item for item in self.client.get('/api/tickets/tickets').json()['items']}
+        self.assertEqual(items[self.solved[0].id]['assigned_to'], self.user.id)
+        self.assertEqual(items[self.solved[0].id]['ai_solution']['solution'], "Restart it")
+        self.assertIsNone(items[self.unsolved[0].id]['ai_solution'])
+
+    def test_next_page_costs_one_query(self):
+        first = self.client.get('/api/tickets/tickets', {'limit': 4}).json()
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/tickets/tickets', {'limit': 4, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['items']), 2)
+        self.assertIsNone(second['next_cursor'])
+
+    def test_count_estimate_is_cached(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tickets/tickets', {'include_count': 'true'})
+        self.assertEqual(response.json()['count_estimate'], 6)
+        with self.assertNumQueries(1):
+            self.client.get('/api/tickets/tickets', {'include_count': 'true'})
+
+    def test_detail_costs_one_query(self):
+        for ticket in (self.solved[0], self.unsolved[0]):
+            with self.assertNumQueries(1):
+                response = self.client.get(f'/api/tickets/tickets/{ticket.id}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['assigned_to'], self.user.id)
+
+    def test_done_job_costs_one_query(self):
+        job = AISolutionJob.objects.create(ticket=self.solved[0], system='system1', status='DONE')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/tickets/ai-solution-jobs/{job.id}')
+        self.assertEqual(response.json()['solution']['solution'], "Restart it")
+
+    def test_create_costs_fixed_queries(self):
+        payload = {"title": "Printer", "description": "The printer is offline", "priority": "LOW"}
+        # Token and user, the ticket insert and its missing solution; indexing runs on commit
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                '/api/tickets/tickets', payload, content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {self.token.key}',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assigned_to'], self.user.id)
+
+
+class TicketFilterTests(TestCase):
+    """The ticket list filters and searches on the server."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='agent', password='password')
+        cls.printer = Ticket.objects.create(
+            title="Printer offline", description="The office printer shows a paper jam", priority='HIGH', assigned_to=cls.user,
+        )
+        cls.login = Ticket.objects.create(title="Login fails", description="Users cannot sign in after the upgrade", status='CLOSED')
+        cls.vpn = Ticket.objects.create(title="VPN drops", description="The connection drops every hour", priority='LOW')
+
+    def _ids(self, **params):
+        response = self.client.get('/api/tickets/tickets', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['items']]
+
+    def test_filters(self):
+        self.assertEqual(self._ids(status='closed'), [self.login.id])
+        self.assertEqual(self._ids(priority='HIGH'), [self.printer.id])
+        self.assertEqual(self._ids(assigned_to=self.user.id), [self.printer.id])
+        self.assertEqual(self._ids(status='OPEN', priority='LOW'), [self.vpn.id])
+        self.assertEqual(self._ids(created_after=self.login.created_at.isoformat()), [self.login.id, self.vpn.id])
+        self.assertEqual(self._ids(created_before=self.login.created_at.isoformat()), [self.printer.id])
+
+    def test_search_matches_title_and_description(self):
+        self.assertEqual(self._ids(q="printer"), [self.printer.id])
+        self.assertEqual(self._ids(q="upgrade sign"), [self.login.id])
+        self.assertEqual(self._ids(q="drop"), [self.vpn.id])
+        self.assertEqual(self._ids(q="printer upgrade"), [])
+        self.assertEqual(self._ids(q='"jam* -'), [self.printer.id])
+
+    def test_search_follows_saved_changes(self):
+        self.vpn.description = "The tunnel reconnects every hour"
+        self.vpn.save()
+        self.assertEqual(self._ids(q="tunnel"), [self.vpn.id])
+        self.assertEqual(self._ids(q="connection"), [])
+        self.printer.delete()
+        self.assertEqual(self._ids(q="printer"), [])
+
+    def test_filters_combine_with_pagination_and_count(self):
+        Ticket.objects.bulk_create(Ticket(title=f"Printer {number}", description="Toner is empty") for number in range(5))
+        cache.clear()
+        first = self.client.get('/api/tickets/tickets', {'q': 'printer', 'limit': 4, 'include_count': 'true'}).json()
+        second = self.client.get('/api/tickets/tickets', {'q': 'printer', 'limit': 4, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(first['count_estimate'], 6)
+        self.assertEqual(len(first['items']) + len(second['items']), 6)
+        self.assertIsNone(second['next_cursor'])
+
+
+class FastTicketListTests(TestCase):
+    """The ``.values()`` path renders the same tickets as the ``TicketOut`` path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='agent', password='password')
+        tickets = Ticket.objects.bulk_create(
+            Ticket(title=f"Ticket {number}", description=f"Description {number}", assigned_to=user if number % 2 else None)
+            for number in range(5)
+        )
+        AISolution.objects.create(ticket=tickets[0], solution="Restart it", likes=1)
+        AISolution.objects.create(ticket=tickets[1], solution="Restart it", reused_from=tickets[0])
+
+    @staticmethod
+    def _normalized(page):
+        # orjson keeps microseconds that the standard encoder truncates
+        for item in page['items']:
+            for value in [item] + ([item['ai_solution']] if item['ai_solution'] else []):
+                for field in ('created_at', 'updated_at'):
+                    if field in value:
+                        value[field] = parse_datetime(value[field]).replace(microsecond=0)
+        return page
+
+    def test_fast_path_matches_schema_path(self):
+        params = {'limit': 3}
+        expected = self.client.get('/api/tickets/tickets', params).json()
+        with override_settings(API_FAST_JSON=True), self.assertNumQueries(1):
+            fast = self.client.get('/api/tickets/tickets', params).json()
+        self.assertEqual(self._normalized(fast), self._normalized(expected))
+
+        params['cursor'] = expected['next_cursor']
+        with override_settings(API_FAST_JSON=True):
+            fast = self.client.get('/api/tickets/tickets', params).json()
+        self.assertEqual(self._normalized(fast), self._normalized(self.client.get('/api/tickets/tickets', params).json()))
+
+
+@override_settings(API_COMPRESSION_MIN_BYTES=100)
+class CompressionMiddlewareTests(TestCase):
+
+    def _response(self, content, accept_encoding):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from chatbot_gpt.compression import CompressionMiddleware
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: HttpResponse(content))(request)
+
+    def test_compresses_large_responses(self):
+        import gzip
+
+        content = b'{"items": []}' * 100
+        response = self._response(content, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_skips_small_responses_and_unsupported_clients(self):
+        self.assertFalse(self._response(b'{}', 'gzip').has_header('Content-Encoding'))
+        self.assertFalse(self._response(b'{"items": []}' * 100, 'identity').has_header('Content-Encoding'))
+
+
+class TicketExportTests(TestCase):
+    """Exports stream every ticket with its solution and can resume after an ID."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='password')
+        cls.agent = User.objects.create_user(username='agent', password='password')
+        Token.objects.create(user=cls.admin, key='a' * 40)
+        Token.objects.create(user=cls.agent, key='b' * 40)
+        cls.tickets = Ticket.objects.bulk_create(
+            Ticket(title=f"Ticket {number}", description=f"Line one\nline \"two\" of {number}", status='CLOSED' if number % 2 else 'OPEN')
+            for number in range(7)
+        )
+        AISolution.objects.create(ticket=cls.tickets[0], solution="Restart it", likes=1)
+
+    def _export(self, token='a' * 40, **params):
+        return self.client.get('/api/tickets/tickets/export', params, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @override_settings(TICKET_EXPORT_CHUNK_SIZE=3)
+    def test_ndjson_streams_all_tickets(self):
+        response = self._export()
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+        self.assertEqual([ticket['id'] for ticket in exported], [ticket.id for ticket in self.tickets])
+        self.assertEqual(exported[0]['ai_solution']['likes'], 1)
+
+    def test_csv_resumes_after_id(self):
+        response = self._export(format='csv', after_id=self.tickets[4].id, status='closed')
+        records = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(record[0]) for record in records], [self.tickets[5].id])
+        self.assertEqual(records[0][2], self.tickets[5].description)
+
+    async def test_streams_without_buffering_under_asgi(self):
+        from django.test import AsyncClient
+
+        response = await AsyncClient().get(
+            '/api/tickets/tickets/export', {'format': 'csv'}, headers={'Authorization': f'Bearer {"a" * 40}'},
+        )
+        self.assertTrue(response.is_async)
+        content = b''.join([block async for block in response.streaming_content]).decode()
+        records = list(csv.reader(io.StringIO(content)))
+        self.assertEqual([int(record[0]) for record in records[1:]], [ticket.id for ticket in self.tickets])
+
+    def test_requires_admin(self):
+        self.assertEqual(self._export(token='b' * 40).status_code, 403)
+        self.assertEqual(self._export(format='xml').status_code, 400)
+
+    def test_command_resumes_interrupted_export(self):
+        for export_format in ('ndjson', 'csv'):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, f'tickets.{export_format}')
+                call_command('export_tickets', format=export_format, output=path, stderr=io.StringIO())
+                with open(path, 'rb') as output:
+                    complete = output.read()
+                # Cut the file in the middle of the fourth ticket
+                with open(path, 'wb') as output:
+                    output.write(complete[:complete.index(f'Ticket 3'.encode()) + 3])
+                call_command('export_tickets', format=export_format, output=path, resume=True, stderr=io.StringIO())
+                with open(path, 'rb') as output:
+                    self.assertEqual(output.read(), complete)
+
+
+@override_settings(AI_JOB_POLL_INTERVAL=0, AI_JOB_MAX_ATTEMPTS=2)
+@mock.patch('ticketing.jobs.close_old_connections')
+class AISolutionWorkerTests(TestCase):
+    """A worker survives errors while running a job and puts the job back in the queue."""
+
+    def setUp(self):
+        self.ticket = Ticket.objects.create(title="Printer offline", description="The printer shows a paper jam")
+        self.job = AISolutionJob.objects.create(ticket=self.ticket, system='system1')
+
+    def _work(self, error):
+        from .jobs import work
+
+        stop = threading.Event()
+
+        def crash(job):
+            stop.set()
+            raise error
+
+        # The worker runs on this thread to see the test transaction; the timer
+        # stops it if the job is never run
+        timeout = threading.Timer(5, stop.set)
+        timeout.start()
+        # Replace the whole run so the test does not need the AI stack installed
+        with mock.patch('ticketing.jobs.run_job', side_effect=crash) as run_job:
+            work(stop)
+        timeout.cancel()
+        run_job.assert_called_once()
+        self.job.refresh_from_db()
+
+    def test_crashed_job_is_requeued_then_failed(self, close_old_connections):
+        self._work(OperationalError("database is locked"))
+        self.assertEqual((self.job.status, self.job.attempts), ('PENDING', 1))
+        self.assertEqual(self.job.error, "database is locked")
+
+        self._work(OperationalError("database is locked"))
+        self.assertEqual((self.job.status, self.job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(self.job.finished_at)
+
+    def test_interrupted_job_is_requeued_until_attempts_run_out(self, close_old_connections):
+        from .jobs import requeue_stale_jobs
+
+        # Claimed by a process on this host that has exited
+        gone = f"{socket.gethostname()}:{2 ** 22 + 1}"
+        AISolutionJob.objects.filter(id=self.job.id).update(status='RUNNING', attempts=1, claimed_by=gone, started_at=timezone.now())
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.claimed_by), ('PENDING', ''))
+
+        AISolutionJob.objects.filter(id=self.job.id).update(status='RUNNING', attempts=2, claimed_by=gone)
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'FAILED')
+
+
+@mock.patch('ticketing.jobs.start_workers')
+class AISolutionQueueTests(TestCase):
+    """Workers claim jobs by ticket priority, then favour users who had fewer jobs started recently."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice', password='password')
+        cls.bob = User.objects.create_user(username='bob', password='password')
+
+    def _enqueue(self, priority, user):
+        from .jobs import enqueue
+
+        ticket = Ticket.objects.create(title=f"{priority} ticket", description=f"{priority} ticket for {user}", priority=priority)
+        return enqueue(ticket, 'system1', requested_by=user)
+
+    def _claim_all(self):
+        from .jobs import claim_next
+
+        claimed = []
+        while (job := claim_next()) is not None:
+            claimed.append(job.id)
+        return claimed
+
+    def test_higher_priority_jobs_are_claimed_first(self, start_workers):
+        low = self._enqueue('LOW', self.alice)
+        high = self._enqueue('HIGH', self.alice)
+        medium = self._enqueue('MEDIUM', self.alice)
+        self.assertEqual(self._claim_all(), [high.id, medium.id, low.id])
+
+    def test_users_with_fewer_recent_jobs_go_first(self, start_workers):
+        alice = [self._enqueue('MEDIUM', self.alice) for _ in range(3)]
+        bob = [self._enqueue('MEDIUM', self.bob) for _ in range(2)]
+        self.assertEqual(self._claim_all(), [alice[0].id, bob[0].id, alice[1].id, bob[1].id, alice[2].id])
+
+    def test_fairness_does_not_override_priority(self, start_workers):
+        alice = [self._enqueue('HIGH', self.alice) for _ in range(2)]
+        bob = self._enqueue('LOW', self.bob)
+        self.assertEqual(self._claim_all(), [alice[0].id, alice[1].id, bob.id])
+
+    def test_claimed_job_is_marked_running_by_this_process(self, start_workers):
+        from .jobs import claim_next
+
+        job = self._enqueue('MEDIUM', self.alice)
+        claimed = claim_next()
+        self.assertEqual((claimed.id, claimed.status, claimed.attempts), (job.id, 'RUNNING', 1))
+        self.assertEqual(claimed.claimed_by, f"{socket.gethostname()}:{os.getpid()}")
+        self.assertIsNone(claim_next())
+
+    @override_settings(AI_REUSE_ENABLED=False)
+    def test_identical_descriptions_share_one_generation(self, start_workers):
+        from .jobs import _run_job, claim_next, enqueue_many
+
+        tickets = [
+            Ticket.objects.create(title=f"Ticket {i}", description=description, priority='MEDIUM')
+            for i, description in enumerate(["The VPN drops", "The VPN drops", "The VPN drops", "The printer jams"])
+        ]
+        jobs = enqueue_many(tickets, 'system1', requested_by=self.alice)
+        # Already claimed by another worker, so left to it
+        AISolutionJob.objects.filter(id=jobs[2].id).update(status='RUNNING')
+
+        prompts = []
+        first = claim_next()
+        self.assertEqual(first.id, jobs[0].id)
+        with mock.patch('ticketing.jobs.ticket_prompt', lambda ticket: ticket.description):
+            _run_job(first, lambda system, prompt, mode: prompts.append(prompt) or "Reconnect")
+
+        self.assertEqual(prompts, ["The VPN drops"])
+        statuses = dict(AISolutionJob.objects.filter(id__in=[job.id for job in jobs]).values_list('id', 'status'))
+        self.assertEqual([statuses[job.id] for job in jobs], ['DONE', 'DONE', 'RUNNING', 'PENDING'])
+        shared = AISolution.objects.get(ticket=tickets[1])
+        self.assertEqual((shared.solution, shared.reused_from_id, shared.system), ("Reconnect", tickets[0].id, 'system1'))
+        self.assertFalse(AISolution.objects.filter(ticket__in=tickets[2:]).exists())
+        self.assertEqual(claim_next().id, jobs[3].id)
+
+
+@override_settings(AI_SPECULATIVE_ENABLED=True, AI_SPECULATIVE_SYSTEM='system1', AI_SPECULATIVE_MODE='agent', AI_REUSE_ENABLED=False)
+@mock.patch('ticketing.jobs.start_workers')
+class SpeculativeSolutionTests(TestCase):
+    """Saved tickets get a low-priority solution job that edits supersede and explicit requests take over."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='agent', password='password')
+        Token.objects.create(user=cls.user, key='a' * 40)
+
+    def _create(self, priority='HIGH', description="The printer shows a paper jam"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(title="Printer offline", description=description, priority=priority)
+
+    def _edit(self, ticket, **fields):
+        for name, value in fields.items():
+            setattr(ticket, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+
+    def _run(self, job, answer):
+        from .jobs import _run_job
+
+        # The prompt is irrelevant to the fake model, and counting its tokens needs the tokenizer files
+        with mock.patch('ticketing.jobs.ticket_prompt', lambda ticket: ticket.description):
+            _run_job(job, lambda system, prompt, mode: answer)
+        job.refresh_from_db()
+
+    def test_creating_a_ticket_queues_a_speculative_job(self, start_workers):
+        from .jobs import SPECULATIVE_PRIORITY_OFFSET, description_hash
+
+        ticket = self._create()
+        job = AISolutionJob.objects.get(ticket=ticket)
+        self.assertEqual((job.status, job.speculative, job.system, job.mode), ('PENDING', True, 'system1', 'agent'))
+        self.assertEqual(job.priority, ticket.priority_rank - SPECULATIVE_PRIORITY_OFFSET)
+        self.assertEqual(job.description_hash, description_hash(ticket))
+
+    def test_editing_the_description_supersedes_the_pending_job(self, start_workers):
+        ticket = self._create()
+        first = AISolutionJob.objects.get(ticket=ticket)
+
+        self._edit(ticket, status='IN_PROGRESS')
+        self.assertEqual(AISolutionJob.objects.filter(ticket=ticket).count(), 1)
+
+        self._edit(ticket, description="The printer shows a paper jam after every page")
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'CANCELLED')
+        second = AISolutionJob.objects.exclude(id=first.id).get(ticket=ticket)
+        self.assertEqual((second.status, second.speculative), ('PENDING', True))
+
+    def test_explicit_request_takes_over_the_speculative_job(self, start_workers):
+        ticket = self._create()
+        speculative = AISolutionJob.objects.get(ticket=ticket)
+
+        with mock.patch('ticketing.api.system_names', return_value=['system1']):
+            response = self.client.post(
+                f'/api/tickets/tickets/{ticket.id}/ai-solution?system=system1', HTTP_AUTHORIZATION=f'Bearer {"a" * 40}'
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['id'], speculative.id)
+        speculative.refresh_from_db()
+        self.assertEqual((speculative.speculative, speculative.priority, speculative.requested_by), (False, ticket.priority_rank, self.user))
+        self.assertEqual(AISolutionJob.objects.filter(ticket=ticket).count(), 1)
+
+    def test_speculative_jobs_run_after_requested_ones(self, start_workers):
+        from .jobs import claim_next, enqueue
+
+        speculative = AISolutionJob.objects.get(ticket=self._create(priority='HIGH'))
+        with override_settings(AI_SPECULATIVE_ENABLED=False):
+            requested = enqueue(self._create(priority='LOW', description="The scanner is offline"), 'system1', requested_by=self.user)
+        self.assertEqual([claim_next().id, claim_next().id], [requested.id, speculative.id])
+
+    def test_answer_for_an_edited_description_is_discarded(self, start_workers):
+        from .jobs import claim_next
+
+        ticket = self._create()
+        job = claim_next()
+        # Edited while the job runs; running jobs are left to finish
+        self._edit(ticket, description="The printer shows a paper jam after every page")
+        self._run(job, "Open the tray")
+        self.assertEqual(job.status, 'CANCELLED')
+        self.assertFalse(AISolution.objects.filter(ticket=ticket).exists())
+
+    def test_answer_for_the_current_description_is_stored(self, start_workers):
+        from .jobs import claim_next
+
+        ticket = self._create()
+        # Saving the same description neither supersedes the job nor queues another
+        self._edit(ticket, description="The printer shows a paper jam")
+        job = claim_next()
+        self._run(job, "Open the tray")
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual(AISolution.objects.get(ticket=ticket).solution, "Open the tray")
+        self.assertEqual(AISolutionJob.objects.filter(ticket=ticket).count(), 1)
+
+
+@mock.patch('ticketing.jobs.start_workers')
+@mock.patch('ticketing.api.system_names', return_value=['system1'])
+class AISolutionBatchTests(TestCase):
+    """A batch queues one job per ticket instead of generating solutions during the request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_superuser(username='admin', password='password')
+        Token.objects.create(user=admin, key='a' * 40)
+        cls.tickets = Ticket.objects.bulk_create(
+            Ticket(title=f"Ticket {number}", description="The printer is offline") for number in range(4)
+        )
+        AISolution.objects.create(ticket=cls.tickets[0], solution="Restart it")
+
+    def _batch(self, **payload):
+        return self.client.post(
+            '/api/tickets/tickets/ai-solutions/batch', payload, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {"a" * 40}',
+        )
+
+    def test_queues_a_job_per_ticket_without_solution(self, system_names, start_workers):
+        response = self._batch()
+        self.assertEqual(response.status_code, 202)
+        jobs = response.json()['jobs']
+        self.assertEqual([job['ticket_id'] for job in jobs], [ticket.id for ticket in self.tickets[1:]])
+        self.assertEqual({job['status'] for job in jobs}, {'PENDING'})
+        self.assertEqual(AISolutionJob.objects.count(), 3)
+
+        # Queueing again returns the active jobs instead of duplicating them
+        again = self._batch(ticket_ids=[ticket.id for ticket in self.tickets], missing_only=False).json()['jobs']
+        self.assertEqual([job['id'] for job in again[1:]], [job['id'] for job in jobs])
+        self.assertEqual(AISolutionJob.objects.count(), 4)
+
+
+class NearDuplicateReuseTests(TestCase):
+    """Solutions are reused only for the same system and mode, and the index is only rewritten on edits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        description = "After the upgrade users cannot sign in to the portal and see an error"
+        cls.source, cls.target = Ticket.objects.bulk_create(
+            Ticket(title=f"Login fails {number}", description=description) for number in range(2)
+        )
+        cls.solution = AISolution.objects.create(ticket=cls.source, solution="Clear the session cache", system='system1', mode='agent')
+        for ticket in (cls.source, cls.target):
+            index_ticket(ticket)
+
+    def test_reuse_matches_system_and_mode(self):
+        self.assertEqual(find_reusable_solution(self.target, 'system1', 'agent')[0], self.solution)
+        self.assertIsNone(find_reusable_solution(self.target, 'system1', 'fast'))
+        self.assertIsNone(find_reusable_solution(self.target, 'system2', 'agent'))
+
+    def test_similar_tickets_include_their_solution(self):
+        similar = self.client.get(f'/api/tickets/tickets/{self.target.id}/similar').json()
+        self.assertEqual([ticket['ticket_id'] for ticket in similar], [self.source.id])
+        self.assertEqual(similar[0]['solution']['solution'], "Clear the session cache")
+
+    def test_index_is_rewritten_only_when_the_description_changes(self):
+        with self.assertNumQueries(1):
+            index_ticket(self.target)
+        self.target.description = "The VPN connection drops every hour for remote staff"
+        with self.assertNumQueries(3):
+            index_ticket(self.target)
+        self.assertEqual(TicketLSHBand.objects.filter(ticket=self.target).count(), LSH_BANDS)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.target.save(update_fields=['status'])
+        # Only the speculative solution check is scheduled
+        self.assertEqual(len(callbacks), 1)
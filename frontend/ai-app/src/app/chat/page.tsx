@@ -4,7 +4,7 @@ import React, { useState } from 'react';
 import { motion } from 'framer-motion';
 import { CornerGrid } from '@/components/CornerGrid';
 import ChatButton from '@/components/ChatButton';
-import { sendChatMessage } from '@/utils/api';
+import { streamChatMessage } from '@/utils/api';
 import ProtectedRoute from '@/components/ProtectedRoute';
 import { Message } from '@/types/types';
 
@@ -37,10 +37,28 @@ export default function ChatPage() {
       setInput('');
       setIsLoading(true);
 
+      // Show the answer as it streams in by updating the last AI message
+      let answer = '';
+      let started = false;
+      const showAnswer = (text: string) => {
+        answer = text;
+        setMessages(prevMessages => started
+          ? [...prevMessages.slice(0, -1), { text, isUser: false }]
+          : [...prevMessages, { text, isUser: false }]);
+        started = true;
+        setIsLoading(false);
+      };
+
       try {
-        const response = await sendChatMessage(selectedSystem, input);
-        const aiMessage: Message = { text: response.result, isUser: false };
-        setMessages(prevMessages => [...prevMessages, aiMessage]);
+        await streamChatMessage(selectedSystem, input, (event) => {
+          if (event.type === 'token') {
+            showAnswer(answer + event.text);
+          } else if (event.type === 'answer') {
+            showAnswer(event.text);
+          } else if (event.type === 'error') {
+            throw new Error(event.error);
+          }
+        });
       } catch (error) {
         console.error('Error sending message:', error);
         const errorMessage: Message = { text: 'Sorry, an error occurred. Please try again.', isUser: false };
@@ -4,24 +4,33 @@ import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { toast } from 'react-hot-toast';
 
-import { TicketWithSolution } from '@/types/types';
+import { TicketFilters, TicketPage, TicketWithSolution } from '@/types/types';
 import { likeAISolution, dislikeAISolution, getAllTickets } from '@/utils/api';
 import { CornerGrid } from '@/components/CornerGrid';
 
 export default function AllTickets() {
   const [tickets, setTickets] = useState<TicketWithSolution[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [filters, setFilters] = useState<TicketFilters>({});
 
   useEffect(() => {
-    fetchTickets();
-  }, []);
+    // Wait for typing to pause before searching
+    const timeout = setTimeout(fetchTickets, 300);
+    return () => clearTimeout(timeout);
+  }, [filters]);
+
+  const updateFilter = (name: keyof TicketFilters, value: string) => {
+    setFilters(prevFilters => ({ ...prevFilters, [name]: value }));
+  };
 
   const fetchTickets = async () => {
     setIsLoading(true);
     try {
-      const fetchedTickets = await getAllTickets();
-      console.log('Fetched tickets:', fetchedTickets);
-      setTickets(fetchedTickets);
+      const page: TicketPage = await getAllTickets(null, filters);
+      setTickets(page.items);
+      setNextCursor(page.next_cursor);
     } catch (error) {
       console.error('Error fetching tickets:', error);
       toast.error('Failed to fetch tickets. Please try again.');
@@ -30,6 +39,21 @@ export default function AllTickets() {
     }
   };
 
+  const fetchMoreTickets = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page: TicketPage = await getAllTickets(nextCursor, filters);
+      setTickets(prevTickets => [...prevTickets, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('Error fetching tickets:', error);
+      toast.error('Failed to fetch more tickets. Please try again.');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleLikeToggle = async (solutionId: number) => {
     try {
       const response = await likeAISolution(solutionId);
@@ -78,19 +102,6 @@ export default function AllTickets() {
     }
   };
 
-  if (isLoading) {
-    return (
-      <motion.div
-        initial={{ opacity: 0 }}
-        animate={{ opacity: 1 }}
-        exit={{ opacity: 0 }}
-        className="text-center mt-8"
-      >
-        Loading tickets...
-      </motion.div>
-    );
-  }
-
   return (
     <div className="relative min-h-screen">
     <div className="absolute inset-0 overflow-hidden">
@@ -111,6 +122,48 @@ export default function AllTickets() {
         >
           All Tickets
         </motion.h1>
+        <div className="flex flex-wrap gap-4 mb-8">
+          <input
+            type="search"
+            placeholder="Search tickets..."
+            value={filters.q || ''}
+            onChange={(e) => updateFilter('q', e.target.value)}
+            className="flex-grow px-3 py-2 bg-zinc-800 text-white rounded focus:outline-none focus:ring-2 focus:ring-zinc-500"
+          />
+          <select
+            value={filters.status || ''}
+            onChange={(e) => updateFilter('status', e.target.value)}
+            className="px-3 py-2 bg-zinc-800 text-white rounded"
+          >
+            <option value="">All statuses</option>
+            <option value="OPEN">Open</option>
+            <option value="IN_PROGRESS">In Progress</option>
+            <option value="CLOSED">Closed</option>
+          </select>
+          <select
+            value={filters.priority || ''}
+            onChange={(e) => updateFilter('priority', e.target.value)}
+            className="px-3 py-2 bg-zinc-800 text-white rounded"
+          >
+            <option value="">All priorities</option>
+            <option value="LOW">Low</option>
+            <option value="MEDIUM">Medium</option>
+            <option value="HIGH">High</option>
+          </select>
+        </div>
+        {isLoading && (
+          <motion.div
+            initial={{ opacity: 0 }}
+            animate={{ opacity: 1 }}
+            exit={{ opacity: 0 }}
+            className="text-center mt-8"
+          >
+            Loading tickets...
+          </motion.div>
+        )}
+        {!isLoading && tickets.length === 0 && (
+          <p className="text-center text-zinc-400">No tickets match these filters.</p>
+        )}
         <AnimatePresence>
           {tickets.map((ticket: TicketWithSolution) => (
             <motion.div
@@ -192,6 +245,19 @@ export default function AllTickets() {
             </motion.div>
           ))}
         </AnimatePresence>
+        {nextCursor && (
+          <div className="text-center">
+            <motion.button
+              whileHover={{ scale: 1.05 }}
+              whileTap={{ scale: 0.95 }}
+              onClick={fetchMoreTickets}
+              disabled={isLoadingMore}
+              className="px-4 py-2 bg-zinc-700 text-white rounded hover:bg-zinc-600 transition duration-300 disabled:opacity-50"
+            >
+              {isLoadingMore ? 'Loading...' : 'Load more'}
+            </motion.button>
+          </div>
+        )}
       </motion.div>
     </div>
   );
@@ -44,6 +44,23 @@ export interface Message {
     ai_solution?: AISolution;
   }
 
+  export interface TicketFilters {
+    q?: string;
+    status?: string;
+    priority?: string;
+    assigned_to?: number;
+    created_after?: string;
+    created_before?: string;
+    updated_after?: string;
+    updated_before?: string;
+  }
+
+  export interface TicketPage {
+    items: TicketWithSolution[];
+    next_cursor: string | null;
+    count_estimate: number | null;
+  }
+
   export interface AuthContextType {
     user: User | null;
     loading: boolean;
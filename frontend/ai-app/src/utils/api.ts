@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { TicketFilters } from '@/types/types';
 
 // Create an axios instance with default settings, you have to change the url if you deployed the backend to a different url
 const api = axios.create({
@@ -63,6 +64,36 @@ export const sendChatMessage = async (system: string, prompt: string) => {
     return response.data;
 };
 
+// Stream a chat message to the AI system, calling onEvent for each agent step, answer token and the final answer
+export const streamChatMessage = async (system: string, prompt: string, onEvent: (event: any) => void) => {
+    const url = `${api.defaults.baseURL}/crewai/ask/stream?` + new URLSearchParams({ system, prompt, format: 'ndjson' });
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { Authorization: String(api.defaults.headers.common['Authorization'] || '') },
+    });
+    if (!response.ok || !response.body) {
+        throw new Error('Failed to stream the answer. Please try again.');
+    }
+    if (!(response.headers.get('Content-Type') || '').includes('ndjson')) {
+        const data = await response.json();
+        throw new Error(data.error || 'Failed to stream the answer. Please try again.');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || '';
+        for (const line of lines) {
+            if (line.trim()) onEvent(JSON.parse(line));
+        }
+    }
+};
+
 // Create a new ticket
 export const createTicket = async (title: string, description: string, priority: string) => {
     try {
@@ -90,23 +121,36 @@ export const getTicket = async (ticketId: number) => {
     return response.data;
 };
 
-// Retrieve all tickets
-export const getAllTickets = async () => {
-    const response = await api.get('/tickets/tickets');
+// Retrieve one page of matching tickets; pass the previous page's next_cursor to get the following one
+export const getAllTickets = async (cursor?: string | null, filters: TicketFilters = {}, limit?: number) => {
+    const params = Object.fromEntries(Object.entries(filters).filter(([, value]) => value !== '' && value != null));
+    const response = await api.get('/tickets/tickets', {
+        params: { ...params, cursor: cursor || undefined, limit },
+    });
     return response.data;
 };
 
-// Generate an AI solution for a ticket
-export const generateAISolution = async (ticketId: number, system: string) => {
+// Generate an AI solution for a ticket, polling the queued job until it finishes
+export const generateAISolution = async (ticketId: number, system: string, pollInterval = 2000) => {
     try {
-        const response = await api.post(`/tickets/tickets/${ticketId}/ai-solution`, { system });
-        return response.data;
+        const response = await api.post(`/tickets/tickets/${ticketId}/ai-solution`, null, {
+            params: { system }
+        });
+        let job = response.data;
+        while (job.status === 'PENDING' || job.status === 'RUNNING') {
+            await new Promise((resolve) => setTimeout(resolve, pollInterval));
+            job = (await api.get(`/tickets/ai-solution-jobs/${job.id}`)).data;
+        }
+        if (job.status === 'FAILED' || job.status === 'CANCELLED') {
+            throw new Error(job.error || 'Failed to generate AI solution. Please try again.');
+        }
+        return job.solution;
     } catch (error) {
         console.error('Error generating AI solution:', error);
         if (axios.isAxiosError(error) && error.response) {
             throw new Error(error.response.data.detail || 'Failed to generate AI solution. Please try again.');
         }
-        throw new Error('An unexpected error occurred. Please try again.');
+        throw error instanceof Error ? error : new Error('An unexpected error occurred. Please try again.');
     }
 };
 